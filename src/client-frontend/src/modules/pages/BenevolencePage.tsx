@@ -31,6 +31,8 @@ const OneTimePaymentComponent = ({
     user: { user_name: string | null; email: string | null };
     token: {user_id: string | null; id_token: string | null; access_token: string | null; refresh_token: string | null;}
   }) => {
+    // Retries and double clicks for the same amount reuse one key, so the server creates one PayPal order.
+    const idempotencyKeyRef = useRef<{ amount: number; key: string } | null>(null);
     const createOrder: PayPalButtonsComponentProps["createOrder"] = async () => {
       const endpoint = `${SERVER}/create-paypal-order`;
   
@@ -42,13 +44,17 @@ const OneTimePaymentComponent = ({
           }
         }
 
+        if (idempotencyKeyRef.current === null || idempotencyKeyRef.current.amount !== amount) {
+          idempotencyKeyRef.current = { amount, key: crypto.randomUUID() };
+        }
+
         const userId = token?.user_id ? token.user_id : "guest";
         const userEmail = user?.email ? user.email : "guest@example.com";
         const userName = user?.user_name ? user.user_name : "guest";
   
         const response = await fetch(endpoint, {
           method: "POST",
-          headers: { "Content-Type": "application/json" },
+          headers: { "Content-Type": "application/json", "Idempotency-Key": idempotencyKeyRef.current.key },
           body: JSON.stringify({
             amount: amount,
             custom_id: `purpose:Benevolence|user_id:${userId}|email:${userEmail}|user_name:${userName}`
@@ -85,6 +91,7 @@ const OneTimePaymentComponent = ({
             };
           }
           setShowThankYouBanner(true);
+          idempotencyKeyRef.current = null;
         } catch (error: any) {
           const userFriendlyMessages: { [key: string]: string } = {
             CaptureFailed: 'Failed to capture the payment. Please try again later.',
@@ -120,6 +127,8 @@ const OneTimePaymentComponent = ({
     user: { user_name: string | null; email: string | null };
     token: {user_id: string | null; id_token: string | null; access_token: string | null; refresh_token: string | null;}
   }> = ({ donationAmountRef, setShowThankYouBanner, setSubmitError, user, token }) => {
+    // Retries and double clicks for the same amount reuse one key, so the server creates one PayPal subscription.
+    const idempotencyKeyRef = useRef<{ amount: number; key: string } | null>(null);
     const createSubscription: PayPalButtonsComponentProps["createSubscription"] = async () => {
       const endpoint = `${SERVER}/create-paypal-subscription`;
   
@@ -131,13 +140,17 @@ const OneTimePaymentComponent = ({
           }
         }
 
+        if (idempotencyKeyRef.current === null || idempotencyKeyRef.current.amount !== amount) {
+          idempotencyKeyRef.current = { amount, key: crypto.randomUUID() };
+        }
+
         const userId = token?.user_id ? token.user_id : "guest";
         const userEmail = user?.email ? user.email : "guest@example.com";
         const userName = user?.user_name ? user.user_name : "guest";
 
         const response = await fetch(endpoint, {
           method: "POST",
-          headers: { "Content-Type": "application/json" },
+          headers: { "Content-Type": "application/json", "Idempotency-Key": idempotencyKeyRef.current.key },
           body: JSON.stringify({
             amount: amount,
             custom_id: `purpose:Benevolence|user_id:${userId}|email:${userEmail}|user_name:${userName}`
@@ -167,6 +180,7 @@ const OneTimePaymentComponent = ({
       try {
         if (data.subscriptionID) {
           setShowThankYouBanner(true);
+          idempotencyKeyRef.current = null;
         } else {
             throw {
               message: 'The order ID is missing in the response. Please try again later.',
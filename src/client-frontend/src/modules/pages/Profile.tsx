@@ -51,12 +51,19 @@ function Profile() {
   const [updateType, setUpdateType] = useState<'name' | 'email' | 'password' | null>(null);
   const [initialFormData, setInitialFormData] = useState<{ [key: string]: string }>({});
 
+  // The /user routes only accept the signed-in user's ID token. It is read at call time,
+  // because changing the email logs in again and stores new tokens.
+  const authHeaders = () => {
+    const storedToken = JSON.parse(localStorage.getItem('userToken') || '{}');
+    return { 'Content-Type': 'application/json', Authorization: `Bearer ${storedToken.id_token}` };
+  };
+
   // Fetch user attributes from the server
   const fetchUserAttributes = async (email: string) => {
     try {
       const response = await fetch(`${SERVER}/user?email=${encodeURIComponent(email)}`, {
         method: 'GET',
-        headers: { 'Content-Type': 'application/json' },
+        headers: authHeaders(),
       });
       if (!response.ok) {
         const errorData = await response.json();
@@ -72,16 +79,18 @@ function Profile() {
     }
   };
 
-  const loginUser = async (email: string, password: string, user_name: string) => {
+  // Renew the stored tokens with the refresh token, so changes such as a new email show up
+  // in the ID token without asking for the password again.
+  const refreshSession = async (email: string, user_name: string) => {
     try {
-      const response = await fetch(`${SERVER}/login`, {
+      const storedToken = JSON.parse(localStorage.getItem('userToken') || '{}');
+      const response = await fetch(`${SERVER}/token/refresh`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
-          email,
-          password,
+          refresh_token: storedToken.refresh_token,
         }),
       });
 
@@ -100,9 +109,12 @@ function Profile() {
       };
 
       const tokenData = {
+        ...storedToken,
+        // The server leaves user_id out when it could not read it; keep the stored one then.
+        user_id: data.user_id ?? storedToken.user_id,
         id_token: data.id_token,
         access_token: data.access_token,
-        refresh_token: data.refresh_token,
+        refresh_token: data.refresh_token || storedToken.refresh_token,
       };
 
       localStorage.setItem('user', JSON.stringify(userData));
@@ -137,7 +149,7 @@ function Profile() {
     try {
       const response = await fetch(`${SERVER}/user`, {
         method: 'PATCH',
-        headers: { 'Content-Type': 'application/json' },
+        headers: authHeaders(),
         body: JSON.stringify({
           email: userEmail,
           attribute_updates: { [cognitoAttribute]: attributeValue },
@@ -249,9 +261,6 @@ function Profile() {
           errors.email = emailError;
         }
       }
-      if (!values.currentPassword) {
-        errors.currentPassword = 'Current password is required';
-      }
     } else if (updateType === 'password') {
       if (!values.password) {
         errors.password = 'Password is required';
@@ -282,7 +291,7 @@ function Profile() {
         await updateUserAttribute('lastName', values.lastName);
       } else if (updateType === 'email') {
         await updateUserAttribute('email', values.email);
-        const accessToken = await loginUser(values.email, values.currentPassword, currentUser?.user_name || '');
+        const accessToken = await refreshSession(values.email, currentUser?.user_name || '');
         await sendCode(accessToken)
       } else if (updateType === 'password') {
         await updateUserAttribute('password', values.password);
@@ -488,19 +497,6 @@ function Profile() {
                         />
                       )}
                     </Field>
-                    <Field name="currentPassword">
-                      {({ input, meta }) => (
-                        <TextField
-                          {...input}
-                          margin="dense"
-                          label={language === 'en-US'? 'Current Password' : language === 'fr-FR' ? `Mot de passe actuel` : language === 'es-MX' ? 'Contraseña actual' : ''}
-                          type="password"
-                          fullWidth
-                          error={meta.touched && Boolean(meta.error)}
-                          helperText={meta.touched && meta.error}
-                        />
-                      )}
-                    </Field>
                   </>
                 )}
                 {updateType === 'password' && (
@@ -69,7 +69,7 @@ function SignIn() {
     
       const data = await response.json();
     
-      const userName = await getUserUsername(values.email);
+      const userName = `${data.profile.first_name} ${data.profile.last_name}`;
     
       const userData = {
         user_name: userName,
@@ -102,31 +102,6 @@ function SignIn() {
     }
   };
 
-const getUserUsername = async (email:string) => {
-  const response = await fetch(
-    `${SERVER}/user?email=${encodeURIComponent(email)}`,
-    {
-      method: 'GET',
-      headers: {
-        'Content-Type': 'application/json',
-      }
-    }
-  )
-
-  if (!response.ok) {
-    const errorData = await response.json();
-    throw { 
-      message: errorData.message
-    };
-  }
-
-  const data = await response.json();
-
-  const userName = `${data.user_attributes['custom:firstName']} ${data.user_attributes['custom:lastName']}`;
-
-  return userName
-}
-
   return (
     <React.Fragment>
       <AppAppBar />
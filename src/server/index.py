@@ -1,25 +1,762 @@
-import boto3
-import json
-import logging
-import requests
-import jwt
 import os
-from dotenv import load_dotenv
+import time
 
-load_dotenv()
+# Startup Profiling
+STARTUP_PROFILE = os.getenv('STARTUP_PROFILE', 'false').lower() == 'true'
 
-client = boto3.client('cognito-idp', region_name='us-west-1')
-ses = boto3.client('ses', region_name='us-west-1')
-ssm = boto3.client('ssm')
+
+def read_rss_kb():
+    """Return the resident set size of this process in KiB, or None where /proc is unavailable."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class NullStep:
+    """Context manager used in place of a timed step when profiling is off."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_STEP = NullStep()
+
+
+class StartupStep:
+    """Times one import or initialization step and records it on the profile."""
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.rss_before = read_rss_kb()
+        self.started_at = self.profile.clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        duration_ms = (self.profile.clock() - self.started_at) * 1000
+        rss_after = read_rss_kb()
+        rss_delta = rss_after - self.rss_before if None not in (rss_after, self.rss_before) else None
+        self.profile.record(self.name, duration_ms, rss_delta)
+        return False
+
+
+class StartupProfile:
+    """
+    Per-step timings and memory deltas of a cold start.
+
+    Steps are timed with ``with startup_profile.step(name):`` around imports and
+    client construction. Only the first occurrence of each step is kept, and the
+    report is logged once as a single JSON record at the end of the first invocation.
+    When disabled, step() returns a shared no-op context manager.
+
+    :param enabled: Whether to record anything.
+    :param clock: Monotonic clock, injectable for tests.
+    """
+
+    def __init__(self, enabled, clock=time.perf_counter):
+        self.clock = clock
+        self.pending = enabled
+        self.awaiting_first_invocation = enabled
+        self.started_at = clock()
+        self.rss_at_start = read_rss_kb()
+        self.phase = 'init'
+        self.init_ms = None
+        self.steps = []
+        self.report = None
+
+    def step(self, name):
+        if not self.pending or any(step['name'] == name for step in self.steps):
+            return NULL_STEP
+        return StartupStep(self, name)
+
+    def record(self, name, duration_ms, rss_delta_kb):
+        self.steps.append({
+            'name': name,
+            'phase': self.phase,
+            'duration_ms': round(duration_ms, 3),
+            'rss_delta_kb': rss_delta_kb,
+        })
+
+    def finish_init(self):
+        """Mark the end of module initialization; later steps belong to the first invocation."""
+        if self.pending:
+            self.init_ms = (self.clock() - self.started_at) * 1000
+            self.phase = 'invocation'
+
+    def observe_first_invocation(self, handler, event, context):
+        """Run the first invocation through handler, then log the startup report once."""
+        self.awaiting_first_invocation = False
+        started_at = self.clock()
+        try:
+            return handler(event, context)
+        finally:
+            self.pending = False
+            self.report = self.build_report((self.clock() - started_at) * 1000, event)
+            logger.info(json.dumps(self.report))
+
+    def build_report(self, invocation_ms, event):
+        rss_now = read_rss_kb()
+        return {
+            'event': 'startup_profile',
+            'function_version': os.getenv('AWS_LAMBDA_FUNCTION_VERSION'),
+            'route': f"{event.get('httpMethod')} {event.get('path')}",
+            'init_ms': round(self.init_ms, 3) if self.init_ms is not None else None,
+            'first_invocation_ms': round(invocation_ms, 3),
+            'rss_kb': rss_now,
+            'rss_delta_kb': rss_now - self.rss_at_start if None not in (rss_now, self.rss_at_start) else None,
+            'steps': self.steps,
+        }
+
+
+startup_profile = StartupProfile(STARTUP_PROFILE)
+
+with startup_profile.step('import stdlib'):
+    import atexit
+    import json
+    import logging
+    import sqlite3
+    import threading
+    from urllib.parse import urlsplit
+
+with startup_profile.step('import requests'):
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+with startup_profile.step('import jwt'):
+    import jwt
+
+with startup_profile.step('import orjson'):
+    try:
+        import orjson  # Optional: faster JSON serialization for response bodies.
+    except ImportError:
+        orjson = None
+
+# Local runs read settings from a .env file; in Lambda they come from the function configuration.
+if not os.getenv('AWS_LAMBDA_FUNCTION_NAME'):
+    with startup_profile.step('load dotenv'):
+        from dotenv import load_dotenv
+        load_dotenv()
 
 environment = os.getenv('ENVIRONMENT')
 domain_name = os.getenv('DOMAIN_NAME')
 
-def get_ssm_parameter(name: str) -> str:
-    """Fetch a parameter from AWS SSM Parameter Store with decryption enabled."""
-    response = ssm.get_parameter(Name=name, WithDecryption=True)
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# Structured Logging
+# "json" (default) writes one JSON object per record with the request ID and route; "text" keeps
+# the handler's own format. Warnings and errors are sampled per signature (level, message template,
+# exception type): the first LOG_SAMPLE_LIMIT per window are logged in full, the rest only counted.
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+LOG_SAMPLE_LIMIT = int(os.getenv('LOG_SAMPLE_LIMIT', '10'))
+LOG_SAMPLE_WINDOW_SECONDS = float(os.getenv('LOG_SAMPLE_WINDOW_SECONDS', '60'))
+
+# Request ID and route of the invocation running on this thread, attached to every log record.
+log_context = threading.local()
+
+
+class JsonLogFormatter(logging.Formatter):
+    """Format a record as one JSON line: level, message, request ID, route, and the exception if any."""
+
+    def format(self, record):
+        entry = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+                         + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "message": record.getMessage(),
+            "request_id": getattr(log_context, 'request_id', None),
+            "route": getattr(log_context, 'route', None),
+            "function": record.funcName,
+        }
+        if record.exc_info and record.exc_info[0] is not None:
+            entry["error"] = {
+                "type": record.exc_info[0].__name__,
+                "message": str(record.exc_info[1]),
+                "stack": self.formatException(record.exc_info),
+            }
+        suppressed = getattr(record, 'suppressed', None)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        return json.dumps(entry, default=str)
+
+
+class LogSampler(logging.Filter):
+    """
+    Let through the first `limit` records of each warning/error signature per window and count the rest.
+
+    Dropped records are filtered out before any handler formats them, so their messages and
+    tracebacks are never rendered. When a signature's window closes with records dropped, one
+    summary record with the count is logged: on the next sampled record, or on flush(), which
+    runs after every invocation and at interpreter exit, so a burst followed by silence is
+    still reported. Info and debug records are never sampled.
+
+    :param limit: Records logged in full per signature and window.
+    :param window_seconds: Length of a sampling window.
+    :param max_signatures: Distinct signatures tracked; further ones share one bucket.
+    :param clock: Monotonic clock, injectable for tests.
+    """
+
+    def __init__(self, limit=10, window_seconds=60.0, max_signatures=256, clock=time.monotonic):
+        super().__init__()
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.max_signatures = max_signatures
+        self.clock = clock
+        # Signature -> [window start, records seen in the window, level, message template]
+        self.windows = {}
+        # Earliest time a window can close, so flush() is a single comparison until then.
+        self.next_close = float('inf')
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def signature(record):
+        exc_type = record.exc_info[0].__name__ if record.exc_info and record.exc_info[0] else None
+        return record.levelno, str(record.msg), exc_type
+
+    def filter(self, record):
+        if record.levelno < logging.WARNING or getattr(record, 'suppressed', None):
+            return True
+        now = self.clock()
+        with self.lock:
+            summaries = self._take_closed(now)
+            key = self.signature(record)
+            if key not in self.windows and len(self.windows) >= self.max_signatures:
+                key = (record.levelno, "(other)", None)
+            window = self.windows.get(key)
+            if window is None:
+                window = self.windows[key] = [now, 0, record.levelno, key[1]]
+                self.next_close = min(self.next_close, now + self.window_seconds)
+            window[1] += 1
+            allowed = window[1] <= self.limit
+
+        self._log_summaries(summaries)
+        return allowed
+
+    def flush(self, force=False):
+        """
+        Log the summaries of windows that have closed.
+
+        :param force: Close every window now, e.g. at shutdown.
+        """
+        now = float('inf') if force else self.clock()
+        if now < self.next_close:
+            return
+        with self.lock:
+            summaries = self._take_closed(now)
+        self._log_summaries(summaries)
+
+    def reset(self):
+        with self.lock:
+            self.windows.clear()
+            self.next_close = float('inf')
+
+    def _take_closed(self, now):
+        if now < self.next_close:
+            return []
+        closed = []
+        for key, window in list(self.windows.items()):
+            if now - window[0] >= self.window_seconds:
+                del self.windows[key]
+                if window[1] > self.limit:
+                    closed.append(window)
+        self.next_close = min((window[0] + self.window_seconds for window in self.windows.values()),
+                              default=float('inf'))
+        return closed
+
+    def _log_summaries(self, summaries):
+        for _, seen, level, template in summaries:
+            logger.log(level, "Suppressed repeated log records: %s", template,
+                       extra={"suppressed": seen - self.limit})
+
+
+log_sampler = LogSampler(LOG_SAMPLE_LIMIT, LOG_SAMPLE_WINDOW_SECONDS)
+logger.addFilter(log_sampler)
+atexit.register(log_sampler.flush, force=True)
+if LOG_FORMAT == 'json':
+    # The Lambda runtime installs its handler before importing this module; local runs have none.
+    for log_handler in logger.handlers:
+        log_handler.setFormatter(JsonLogFormatter())
+
+# Invocation Metrics
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+METRICS_NAMESPACE = os.getenv('METRICS_NAMESPACE', 'RCWClientBackend')
+# Opt-in: attach a Server-Timing header with the downstream calls to every cors_response.
+SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'false').lower() == 'true'
+
+# Metrics of the invocation running on this thread; background threads (e.g. SSM refresh) have none.
+metrics_state = threading.local()
+
+
+class InvocationMetrics:
+    """
+    Timings of one lambda_handler invocation, emitted as a CloudWatch Embedded Metric Format record.
+
+    Every downstream call is recorded as a metric named after the dependency
+    ("cognito-idp.InitiateAuth", "paypal.CreateOrder", ...) in milliseconds; a dependency
+    called more than once contributes one value per call. Cache lookups are reported as
+    flags that are true only if every lookup of that cache hit.
+
+    :param route: Route label used as the metric dimension, e.g. "POST /login".
+    :param request_id: The Lambda request ID, if known.
+    :param clock: Monotonic clock, injectable for tests.
+    """
+
+    def __init__(self, route, request_id=None, clock=time.perf_counter):
+        self.route = route
+        self.request_id = request_id
+        self.clock = clock
+        self.started_at = clock()
+        self.dependencies = {}
+        self.errors = {}
+        self.caches = {}
+        self.in_flight = {}
+
+    def record(self, dependency, duration_ms, error=False):
+        self.dependencies.setdefault(dependency, []).append(round(duration_ms, 3))
+        if error:
+            self.errors[dependency] = self.errors.get(dependency, 0) + 1
+
+    def record_cache(self, cache, hit):
+        self.caches[cache] = self.caches.get(cache, True) and hit
+
+    def start_call(self, key, dependency):
+        self.in_flight[key] = (dependency, self.clock())
+
+    def finish_call(self, key, error=False):
+        call = self.in_flight.pop(key, None)
+        if call is not None:
+            self.record(call[0], (self.clock() - call[1]) * 1000, error)
+
+    def server_timing(self):
+        """
+        Return a Server-Timing header value listing every downstream call made so far,
+        the cache lookups and the elapsed time, e.g.
+        'cognito-idp.InitiateAuth;dur=41.2, cache-ssm;desc=hit, total;dur=43.9'.
+        """
+        entries = []
+        for dependency, values in self.dependencies.items():
+            name = server_timing_token(dependency)
+            entries.extend(f"{name};dur={value:.1f}" for value in values)
+        for cache, hit in self.caches.items():
+            entries.append(f"cache-{server_timing_token(cache)};desc={'hit' if hit else 'miss'}")
+        entries.append(f"total;dur={(self.clock() - self.started_at) * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_emf(self, status_code, timestamp_ms=None):
+        # Calls that never finished raised out of the client; they ended about now.
+        for key in list(self.in_flight):
+            self.finish_call(key, error=True)
+
+        duration_ms = round((self.clock() - self.started_at) * 1000, 3)
+        metric_names = ["Duration", *self.dependencies]
+        record = {
+            "_aws": {
+                "Timestamp": timestamp_ms if timestamp_ms is not None else int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": METRICS_NAMESPACE,
+                    "Dimensions": [["Route"]],
+                    "Metrics": [{"Name": name, "Unit": "Milliseconds"} for name in metric_names],
+                }],
+            },
+            "Route": self.route,
+            "StatusCode": status_code,
+            "Duration": duration_ms,
+            "cache": self.caches,
+        }
+        for dependency, values in self.dependencies.items():
+            record[dependency] = values[0] if len(values) == 1 else values
+        if self.errors:
+            record["errors"] = self.errors
+        if self.request_id:
+            record["requestId"] = self.request_id
+        return record
+
+
+def server_timing_token(name):
+    """Replace characters that are not allowed in a Server-Timing metric name."""
+    return "".join(char if char.isalnum() or char in "!#$%&'*+-.^_`|~" else "-" for char in name)
+
+
+class MemoryMetricsSink:
+    """Metrics sink that keeps the EMF records in a list, for tests and local tools."""
+
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
+
+
+def stdout_metrics_sink(record):
+    """Write an EMF record as its own stdout line, where CloudWatch Logs extracts the metrics."""
+    print(json.dumps(record, separators=(",", ":")), flush=True)
+
+
+metrics_sink = stdout_metrics_sink
+
+
+def set_metrics_sink(sink):
+    """
+    Replace the callable that receives every EMF record.
+
+    :param sink: Callable taking the record dictionary.
+    :return: The previous sink, so callers can restore it.
+    """
+    global metrics_sink
+    previous, metrics_sink = metrics_sink, sink
+    return previous
+
+
+def current_metrics():
+    """Return the metrics of the invocation running on this thread, or None."""
+    return getattr(metrics_state, 'current', None)
+
+
+def record_cache_lookup(cache, hit):
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.record_cache(cache, hit)
+
+
+class DependencyTimer:
+    """Context manager recording the duration of one downstream call on the current invocation."""
+
+    __slots__ = ('dependency', 'metrics', 'started_at')
+
+    def __init__(self, dependency):
+        self.dependency = dependency
+
+    def __enter__(self):
+        self.metrics = current_metrics()
+        if self.metrics is not None:
+            self.started_at = self.metrics.clock()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        if self.metrics is not None:
+            self.metrics.record(self.dependency, (self.metrics.clock() - self.started_at) * 1000, exc_type is not None)
+        return False
+
+
+def start_aws_call(model, context, **kwargs):
+    """botocore before-call hook: start timing the operation."""
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.start_call(id(context), f"{model.service_model.service_name}.{model.name}")
+
+
+def finish_aws_call(http_response, context, **kwargs):
+    """botocore after-call hook: record the operation, flagging error responses."""
+    metrics = current_metrics()
+    if metrics is not None:
+        metrics.finish_call(id(context), error=http_response.status_code >= 300)
+
+
+# AWS Clients
+AWS_CONNECT_TIMEOUT_SECONDS = float(os.getenv('AWS_CONNECT_TIMEOUT_SECONDS', '2'))
+AWS_READ_TIMEOUT_SECONDS = float(os.getenv('AWS_READ_TIMEOUT_SECONDS', '5'))
+AWS_MAX_POOL_CONNECTIONS = int(os.getenv('AWS_MAX_POOL_CONNECTIONS', '10'))
+
+# Module attribute -> (boto3 service name, region). None uses the default region.
+AWS_CLIENT_SPECS = {
+    'client': ('cognito-idp', 'us-west-1'),
+    'ses': ('ses', 'us-west-1'),
+    'ssm': ('ssm', None),
+}
+aws_client_lock = threading.Lock()
+
+
+def create_aws_client(service_name, region_name=None):
+    """
+    Create a boto3 client with tuned timeouts, connection pool size and TCP keepalive.
+
+    boto3 is imported here rather than at module load, so a cold start that never
+    reaches AWS (e.g. an OPTIONS preflight) does not pay for importing it.
+    """
+    with startup_profile.step('import boto3'):
+        import boto3
+        from botocore.config import Config
+
+    config = Config(
+        connect_timeout=AWS_CONNECT_TIMEOUT_SECONDS,
+        read_timeout=AWS_READ_TIMEOUT_SECONDS,
+        max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        retries={'mode': 'standard', 'max_attempts': 3},
+    )
+    with startup_profile.step(f'create {service_name} client'):
+        aws_client = boto3.client(service_name, region_name=region_name, config=config)
+    aws_client.meta.events.register('before-call.*.*', start_aws_call)
+    aws_client.meta.events.register('after-call.*.*', finish_aws_call)
+    return aws_client
+
+
+def get_aws_client(name):
+    """
+    Return the module-level boto3 client stored under name, creating it on first use.
+
+    Clients live in the module globals (index.client, index.ses, index.ssm) so tests
+    can keep patching them by name.
+    """
+    module_globals = globals()
+    try:
+        return module_globals[name]
+    except KeyError:
+        pass
+    # boto3's default session is not thread-safe, so clients are created one at a time.
+    with aws_client_lock:
+        if name not in module_globals:
+            service_name, region_name = AWS_CLIENT_SPECS[name]
+            module_globals[name] = create_aws_client(service_name, region_name)
+        return module_globals[name]
+
+
+def __getattr__(name):
+    """Create the lazily built AWS clients (client, ses, ssm) on attribute access."""
+    if name in AWS_CLIENT_SPECS:
+        return get_aws_client(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_cognito_client():
+    """Return the Cognito Identity Provider client."""
+    return get_aws_client('client')
+
+
+def get_ses_client():
+    """Return the SES client."""
+    return get_aws_client('ses')
+
+
+def get_ssm_client():
+    """Return the SSM client."""
+    return get_aws_client('ssm')
+
+# SSM Parameter Cache
+SSM_CACHE_TTL_SECONDS = float(os.getenv('SSM_CACHE_TTL_SECONDS', '300'))
+SSM_CACHE_REFRESH_AHEAD_SECONDS = float(os.getenv('SSM_CACHE_REFRESH_AHEAD_SECONDS', '60'))
+SSM_CACHE_STALE_RETRY_SECONDS = float(os.getenv('SSM_CACHE_STALE_RETRY_SECONDS', '5'))
+
+# Error codes AWS uses when a caller is being rate limited.
+THROTTLING_ERROR_CODES = frozenset({
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ThrottledException",
+    "RequestLimitExceeded",
+    "TooManyUpdates",
+})
+
+
+def is_throttling_error(error) -> bool:
+    """Return True if a botocore error indicates the caller is being throttled."""
+    response = getattr(error, 'response', None)
+    if not isinstance(response, dict):
+        return False
+    return response.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES
+
+
+class ParameterCache:
+    """
+    Process-wide TTL cache in front of SSM Parameter Store.
+
+    Values are served from memory until they expire. Inside the refresh-ahead window
+    the current value is returned immediately while a background thread reloads it,
+    and once expired (or on first use) a synchronous reload is attempted. Loads are
+    single-flight per key: concurrent callers wait for the one in progress, background
+    refreshes included, instead of each calling SSM. If a reload is throttled the stale
+    value keeps being served (stale-while-revalidate) instead of failing the request, and
+    SSM is not tried again for that key for `stale_retry` seconds, refresh-ahead included.
+
+    :param loader: Callable taking a parameter name and returning its value.
+    :param ttl: Default time-to-live in seconds for every key.
+    :param refresh_ahead: Seconds before expiry at which a background refresh starts.
+    :param stale_retry: Seconds a stale value is served before retrying a throttled reload.
+    :param clock: Monotonic clock, injectable for tests.
+    """
+
+    def __init__(self, loader, ttl=SSM_CACHE_TTL_SECONDS, refresh_ahead=SSM_CACHE_REFRESH_AHEAD_SECONDS,
+                 stale_retry=SSM_CACHE_STALE_RETRY_SECONDS, clock=time.monotonic):
+        self.loader = loader
+        self.ttl = ttl
+        self.refresh_ahead = refresh_ahead
+        self.stale_retry = stale_retry
+        self.clock = clock
+        self.ttl_overrides = {}
+        self._entries = {}  # name -> (value, expires_at, refresh_at: earliest refresh-ahead start)
+        self._refreshing = set()
+        self._load_locks = {}  # name -> Lock held while that name is being loaded
+        self._lock = threading.Lock()
+
+    def set_ttl(self, name, ttl):
+        """Override the time-to-live for a single parameter name."""
+        self.ttl_overrides[name] = ttl
+
+    def get(self, name):
+        """Return the cached value for name, loading or refreshing it as needed."""
+        entry = self._entries.get(name)
+        if entry is not None:
+            value, expires_at, refresh_at = entry
+            now = self.clock()
+            if now < refresh_at:
+                return value
+            if now < expires_at:
+                self._refresh_in_background(name)
+                return value
+
+        with self._load_lock(name):
+            # Another caller may have loaded the value while this one waited.
+            entry = self._entries.get(name)
+            if entry is not None and self.clock() < entry[1]:
+                return entry[0]
+            try:
+                return self._load(name)
+            except Exception as e:
+                if entry is None or not is_throttling_error(e):
+                    raise
+                logger.warning("SSM throttled while refreshing %s; serving stale value.", name)
+                # No refresh-ahead for the stale value: the next attempt is the reload at expiry.
+                expires_at = self.clock() + self.stale_retry
+                self._entries[name] = (entry[0], expires_at, expires_at)
+                return entry[0]
+
+    def is_fresh(self, name):
+        """Return True if name is cached and not yet expired."""
+        entry = self._entries.get(name)
+        return entry is not None and self.clock() < entry[1]
+
+    def put(self, name, value, ttl=None):
+        """Store a value for name, expiring after ttl (or the key's configured TTL)."""
+        if ttl is None:
+            ttl = self.ttl_overrides.get(name, self.ttl)
+        expires_at = self.clock() + ttl
+        self._entries[name] = (value, expires_at, expires_at - self.refresh_ahead)
+
+    def clear(self):
+        """Drop every cached value."""
+        with self._lock:
+            self._entries.clear()
+            self._refreshing.clear()
+
+    def _load(self, name):
+        value = self.loader(name)
+        self.put(name, value)
+        return value
+
+    def _load_lock(self, name):
+        with self._lock:
+            return self._load_locks.setdefault(name, threading.Lock())
+
+    def _refresh_in_background(self, name):
+        with self._lock:
+            if name in self._refreshing:
+                return
+            self._refreshing.add(name)
+        threading.Thread(target=self._background_refresh, args=(name,), daemon=True).start()
+
+    def _background_refresh(self, name):
+        try:
+            with self._load_lock(name):
+                self._load(name)
+        except Exception as e:
+            # The current value is still valid; back off before refreshing ahead again.
+            logger.warning("Background refresh of SSM parameter %s failed: %s", name, e)
+            entry = self._entries.get(name)
+            if entry is not None:
+                value, expires_at, _ = entry
+                self._entries[name] = (value, expires_at, min(expires_at, self.clock() + self.stale_retry))
+        finally:
+            with self._lock:
+                self._refreshing.discard(name)
+
+
+def fetch_ssm_parameter(name: str) -> str:
+    """
+    Cache loader for SSM parameters.
+
+    Names inside this deployment's namespace are loaded together with the rest of the
+    namespace in one paginated get_parameters_by_path call. Anything the bulk load did
+    not return (or if it failed) falls back to a single get_parameter call.
+    """
+    namespace = get_ssm_namespace()
+    if name.startswith(namespace) and ssm_namespace_needs_load(namespace):
+        values = load_ssm_namespace(namespace)
+        if name in values:
+            return values[name]
+
+    response = get_ssm_client().get_parameter(Name=name, WithDecryption=True)
     return response['Parameter']['Value']
 
+
+ssm_parameter_cache = ParameterCache(fetch_ssm_parameter)
+
+# Namespace path -> clock reading of its last bulk load.
+ssm_namespace_loaded_at = {}
+ssm_namespace_lock = threading.Lock()
+
+
+def get_ssm_parameter(name: str) -> str:
+    """Return an SSM parameter, served from the process-wide cache when warm."""
+    record_cache_lookup('ssm', ssm_parameter_cache.is_fresh(name))
+    return ssm_parameter_cache.get(name)
+
+
+def get_ssm_namespace() -> str:
+    """Return the SSM path holding every parameter for the current environment."""
+    return f"/rcw-client-backend-{get_environment()}/"
+
+
+def ssm_namespace_needs_load(namespace: str) -> bool:
+    """Return True if the namespace has not been bulk loaded within the cache TTL."""
+    loaded_at = ssm_namespace_loaded_at.get(namespace)
+    if loaded_at is None:
+        return True
+    return ssm_parameter_cache.clock() - loaded_at >= ssm_parameter_cache.ttl - ssm_parameter_cache.refresh_ahead
+
+
+def load_ssm_namespace(namespace: str) -> dict:
+    """
+    Load every parameter under an SSM path into the parameter cache.
+
+    Uses one paginated get_parameters_by_path call (10 parameters per page) instead of
+    one get_parameter call per key. Concurrent callers wait for a single load.
+
+    :param namespace: The SSM path to load, e.g. "/rcw-client-backend-dev/".
+    :return: A dictionary of parameter names to values (empty if the load failed).
+    """
+    with ssm_namespace_lock:
+        if not ssm_namespace_needs_load(namespace):
+            return {}
+
+        values = {}
+        try:
+            paginator = get_ssm_client().get_paginator('get_parameters_by_path')
+            for page in paginator.paginate(Path=namespace, Recursive=True, WithDecryption=True):
+                for parameter in page.get('Parameters', []):
+                    values[parameter['Name']] = parameter['Value']
+        except Exception as e:
+            # Missing ssm:GetParametersByPath permission or throttling; fall back to per-key reads.
+            logger.warning("Bulk load of SSM namespace %s failed: %s", namespace, e)
+            values = {}
+
+        for name, value in values.items():
+            ssm_parameter_cache.put(name, value)
+        ssm_namespace_loaded_at[namespace] = ssm_parameter_cache.clock()
+        return values
+
+
+def clear_ssm_parameter_cache():
+    """Drop every cached SSM parameter and forget which namespaces were bulk loaded."""
+    ssm_parameter_cache.clear()
+    ssm_namespace_loaded_at.clear()
+
 def get_environment() -> str:
     """Retrieve the deployment environment, defaulting to 'dev' if not set."""
     return os.environ.get("ENVIRONMENT", "dev")
@@ -48,83 +785,422 @@ def get_recipient_email() -> str:
     """Retrieve SES Recipient Email from SSM."""
     return get_ssm_parameter(f"/rcw-client-backend-{get_environment()}/SESRecipientParameter")
 
+def clear_caches():
+    """Drop every process-wide cache, returning the module to its cold-start state."""
+    clear_ssm_parameter_cache()
+    paypal_token_cache.clear()
+    paypal_catalog.clear()
+    log_sampler.reset()
+    idempotency_cache.clear()
+    token_verifiers.clear()
+    user_cache.clear()
+
+
+# Optionally warm the parameter cache during the Lambda init phase instead of on the first request.
+if os.getenv('SSM_PREFETCH_AT_INIT', 'false').lower() == 'true':
+    with startup_profile.step('prefetch ssm namespace'):
+        load_ssm_namespace(get_ssm_namespace())
+
 # ALLOW_ORIGIN = domain_name
 
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
+# Route registry: (path, HTTP method) -> handler taking a Request. Filled once at import by @route.
+ROUTES = {}
+
+
+def route(path, method):
+    """Register the decorated function as the handler for a path and HTTP method."""
+    def register(handler):
+        ROUTES[(path, method)] = handler
+        return handler
+    return register
+
+
+class Request:
+    """
+    Lazily parsed view of an API Gateway proxy event.
+
+    The JSON body is only decoded the first time a handler reads from it, and only the
+    fields a handler asks for are extracted.
+
+    :param event: The API Gateway proxy event.
+    """
+    __slots__ = ('event', '_body')
+
+    def __init__(self, event):
+        self.event = event
+        self._body = None
+
+    @property
+    def method(self):
+        return self.event['httpMethod']
+
+    @property
+    def path(self):
+        return self.event['path']
+
+    @property
+    def body(self):
+        """The decoded JSON body (an empty dict when there is none)."""
+        if self._body is None:
+            raw_body = self.event.get('body')
+            self._body = json.loads(raw_body) if raw_body else {}
+        return self._body
+
+    def get(self, name, default=None):
+        """Return a field from the JSON body."""
+        return self.body.get(name, default)
+
+    def query(self, name, default=None):
+        """Return a query string parameter."""
+        return (self.event.get('queryStringParameters') or {}).get(name, default)
+
+    def header(self, name, default=None):
+        """Return a request header, matching the name case-insensitively."""
+        name = name.lower()
+        for key, value in (self.event.get('headers') or {}).items():
+            if key.lower() == name:
+                return value
+        return default
+
+
+# Traffic Capture
+# Opt-in: append every invocation, sanitized, to a gzip-compressed JSONL file for tools/replay.py.
+# "{pid}" in the path is replaced with the process ID so concurrent processes never share a file.
+TRAFFIC_CAPTURE_PATH = os.getenv('TRAFFIC_CAPTURE_PATH')
+TRAFFIC_CAPTURE_SAMPLE_RATE = float(os.getenv('TRAFFIC_CAPTURE_SAMPLE_RATE', '1'))
+
+# Body, query and header fields whose values are never written to a capture.
+REDACTED_FIELDS = frozenset({
+    "password", "new_password", "old_password", "access_token", "refresh_token", "id_token",
+    "token", "confirmation_code", "code", "secret", "authorization", "cookie", "x-api-key",
+})
+REDACTED = "[REDACTED]"
+
+
+def sanitize(value):
+    """Return a copy of a JSON value with secrets redacted and email addresses pseudonymized."""
+    if isinstance(value, dict):
+        return {key: sanitize_field(key, item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [sanitize(item) for item in value]
+    return value
+
+
+def sanitize_field(key, value):
+    name = str(key).lower()
+    if name in REDACTED_FIELDS:
+        return REDACTED
+    if name == "email" and isinstance(value, str):
+        return pseudonymize_email(value)
+    return sanitize(value)
+
+
+def pseudonymize_email(email):
+    """Map an email address to a stable stand-in, so repeat visitors stay recognizable in a capture."""
+    import hashlib
+    digest = hashlib.sha256(email.strip().lower().encode()).hexdigest()[:12]
+    return f"user-{digest}@example.invalid"
+
+
+class TrafficRecorder:
+    """
+    Writes one sanitized JSON line per invocation to a gzip file.
+
+    Each line holds the arrival time (epoch seconds, so replays keep the original
+    spacing), the method, path, query, sanitized headers and body, the status
+    code and the handler duration. Passwords, tokens and codes are redacted and
+    email addresses are replaced with stable pseudonyms.
+
+    :param path: Output file; "{pid}" is replaced with the process ID.
+    :param sample_rate: Fraction of invocations to capture.
+    """
+
+    def __init__(self, path, sample_rate=1.0):
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self.sample_rate = sample_rate
+        self._file = None
+        self._lock = threading.Lock()
+
+    def capture(self, handler, event, context):
+        """Run handler(event, context) and write the invocation to the capture."""
+        if self.sample_rate < 1:
+            import random
+            if random.random() >= self.sample_rate:
+                return handler(event, context)
+
+        arrived_at = time.time()
+        started_at = time.perf_counter()
+        response = handler(event, context)
+        duration_ms = (time.perf_counter() - started_at) * 1000
+        try:
+            self.write(self.build_record(event, response, arrived_at, duration_ms))
+        except Exception as e:
+            logger.warning("Could not capture traffic: %s", e)
+        return response
+
+    @staticmethod
+    def build_record(event, response, arrived_at, duration_ms):
+        raw_body = event.get('body')
+        try:
+            body = sanitize(json.loads(raw_body)) if raw_body else None
+        except ValueError:
+            body = REDACTED
+        return {
+            "t": round(arrived_at, 6),
+            "method": event.get('httpMethod'),
+            "path": event.get('path'),
+            "query": sanitize(event.get('queryStringParameters')),
+            "headers": sanitize(event.get('headers') or {}),
+            "body": body,
+            "status": response.get('statusCode') if isinstance(response, dict) else None,
+            "duration_ms": round(duration_ms, 3),
+        }
+
+    def write(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._file is None:
+                import gzip
+                self._file = gzip.open(self.path, "at", encoding="utf-8")
+                atexit.register(self.close)
+            self._file.write(line)
+            # Sync-flush so each record is readable even if the container is frozen or killed.
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+traffic_recorder = TrafficRecorder(TRAFFIC_CAPTURE_PATH, TRAFFIC_CAPTURE_SAMPLE_RATE) if TRAFFIC_CAPTURE_PATH else None
+
 
 def lambda_handler(event, context):
+    if startup_profile.awaiting_first_invocation:
+        return startup_profile.observe_first_invocation(lambda_handler, event, context)
+    log_context.request_id = getattr(context, 'aws_request_id', None)
+    log_context.route = route_label(event)
+    try:
+        if traffic_recorder is not None:
+            return traffic_recorder.capture(measured_dispatch, event, context)
+        return measured_dispatch(event, context)
+    finally:
+        log_context.request_id = log_context.route = None
+        log_sampler.flush()
+
+
+def measured_dispatch(event, context):
+    """Dispatch an event, collecting its metrics (EMF record, Server-Timing) when enabled."""
+    if not (METRICS_ENABLED or SERVER_TIMING_ENABLED):
+        return dispatch(event)
+
+    metrics = InvocationMetrics(route_label(event), getattr(context, 'aws_request_id', None))
+    metrics_state.current = metrics
+    response = None
+    try:
+        response = dispatch(event)
+        return response
+    finally:
+        metrics_state.current = None
+        if METRICS_ENABLED:
+            emit_metrics(metrics, response)
+
+
+def emit_metrics(metrics, response):
+    """Hand the invocation's EMF record to the sink; metrics problems never fail a request."""
+    try:
+        metrics_sink(metrics.to_emf(response['statusCode'] if response else 500))
+    except Exception as e:
+        logger.warning("Could not emit metrics: %s", e)
+
+
+def route_label(event):
+    """Return the metric dimension for an event; unknown paths share one label to bound cardinality."""
+    method, path = event.get('httpMethod'), event.get('path')
+    if method == "OPTIONS":
+        return "OPTIONS"
+    if (path, method) in ROUTES:
+        return f"{method} {path}"
+    return "UNMATCHED"
+
+
+def dispatch(event):
     try:
-        # Extract HTTP method and resource path from the event
-        http_method = event['httpMethod']
-        resource_path = event['path']
-        
         # Handle OPTIONS preflight request upfront to avoid multiple checks
-        if http_method == "OPTIONS":
-            return cors_response(200, {"message": "CORS preflight successful"})
-        
-        # Parse body for non-GET/DELETE requests
-        if http_method not in ['GET', 'DELETE']:
-            body = json.loads(event.get('body', "{}"))
-        
-        # Extract common parameters from query or body
-        email = body.get('email') if http_method not in ['GET', 'DELETE'] else event.get('queryStringParameters', {}).get('email')
-        password = body.get('password') if http_method != 'GET' else None
-        first_name = body.get('first_name') if http_method != 'GET' else None
-        last_name = body.get('last_name') if http_method != 'GET' else None
-        confirmation_code = body.get('confirmation_code') if http_method != 'GET' else None
-        access_token = body.get('access_token') if http_method != 'GET' else None
-        new_password = body.get('new_password') if http_method != 'GET' else None
-        attribute_updates = body.get('attribute_updates', {}) if http_method != 'GET' else {}
-        message = body.get('message') if http_method != 'GET' else None
-        custom_id = body.get('custom_id') if http_method != 'GET' else None
-        amount = body.get('amount') if http_method != 'GET' else None
-        currency = body.get('currency', "USD") if http_method == "POST" and resource_path in ["/create-paypal-order", "/create-paypal-subscription"] else None
-
-        # Route handler map
-        route_map = {
-            ("/signup", "POST"): lambda: sign_up(password, email, first_name, last_name),
-            ("/confirm", "POST"): lambda: confirm_user(email),
-            ("/confirm-email", "POST"): lambda: confirm_email(access_token, confirmation_code),
-            ("/confirm-email-resend", "POST"): lambda: confirm_email_resend(access_token),
-            ("/login", "POST"): lambda: log_in(email, password),
-            ("/forgot-password", "POST"): lambda: forgot_password(email),
-            ("/confirm-forgot-password", "POST"): lambda: confirm_forgot_password(email, confirmation_code, new_password),
-            ("/user", "GET"): lambda: get_user(email),
-            ("/user", "PATCH"): lambda: update_user(email, attribute_updates),
-            ("/user", "DELETE"): lambda: delete_user(email),
-            ("/contact-us", "POST"): lambda: contact_us(first_name, email, message),
-            ("/create-paypal-order", "POST"): lambda: create_paypal_order_route(amount, custom_id, currency),
-            ("/create-paypal-subscription", "POST"): lambda: create_paypal_subscription_route(amount, custom_id),
-        }
-        
-        # Check if the route exists and execute the corresponding function
-        result = route_map.get((resource_path, http_method))
-        if result:
-            return result()
-        else:
-            return cors_response(404, {"message": "Resource not found"})
+        if event['httpMethod'] == "OPTIONS":
+            return preflight_response()
+
+        handler = ROUTES.get((event['path'], event['httpMethod']))
+        if handler is None:
+            return not_found_response()
+        return handler(Request(event))
 
     except Exception as e:
-        logger.error(f"Error: {str(e)}")
+        logger.error("Error: %s", e)
         return cors_response(500, {"message": str(e)})
 
 
+# CORS headers for every response. Each response gets its own copy: callers may add
+# headers to a response (e.g. Idempotent-Replayed), and a shared dict would carry them
+# into every later response from the same warm container.
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, PUT, PATCH, DELETE, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, Authorization, Idempotency-Key",
+    #"Access-Control-Allow-Credentials": "true"
+}
+
+
+def dumps_json(body) -> str:
+    """
+    Serialize a response body, using orjson when it is installed and stdlib json otherwise.
+
+    orjson is not a hard dependency; bodies it cannot encode (e.g. non-string keys)
+    fall back to json.dumps.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(body).decode()
+        except TypeError:
+            pass
+    return json.dumps(body)
+
+
 # Helper function to add CORS headers
 def cors_response(status_code, body):
+    headers = {**CORS_HEADERS}
+    if SERVER_TIMING_ENABLED:
+        metrics = current_metrics()
+        if metrics is not None:
+            headers["Server-Timing"] = metrics.server_timing()
+            # Without this, browsers hide Server-Timing from cross-origin pages.
+            headers["Timing-Allow-Origin"] = "*"
     return {
         "statusCode": status_code,
-        "headers": {
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Methods": "GET, POST, PUT, PATCH, DELETE, OPTIONS",
-            "Access-Control-Allow-Headers": "Content-Type, Authorization",
-            #"Access-Control-Allow-Credentials": "true"
-
-        },
-        "body": json.dumps(body)
+        "headers": headers,
+        "body": dumps_json(body)
     }
 
 
+def static_response(status_code, body):
+    """
+    Build a response factory for a body that never changes.
+
+    The body is serialized once at import; each call only allocates the small response
+    and headers dicts.
+    """
+    serialized_body = dumps_json(body)
+
+    def respond():
+        return {
+            "statusCode": status_code,
+            "headers": {**CORS_HEADERS},
+            "body": serialized_body
+        }
+    return respond
+
+
+preflight_response = static_response(200, {"message": "CORS preflight successful"})
+not_found_response = static_response(404, {"message": "Resource not found"})
+
+
+class ErrorMap:
+    """
+    Translates exceptions raised by AWS or PayPal calls to an HTTP status and message.
+
+    Keys are exception classes or exception class names. Botocore builds its modeled
+    exceptions (client.exceptions.UserNotFoundException, ...) per client, so those are
+    matched by name. An exception's MRO is walked once per exception type, most
+    specific class first, and the result is cached. With multiple inheritance the
+    first mapped base in MRO order wins, so register such classes explicitly when
+    another base should decide. Repeated errors (e.g. a burst of
+    throttling) resolve with a single dictionary lookup.
+
+    Messages are used as-is. A message of None uses the service's own error message,
+    and a message containing "{error}" has the service's message substituted in.
+
+    :param mapping: Dictionary of exception class or class name -> (HTTP status, message).
+    """
+    max_cached_types = 512
+
+    def __init__(self, mapping):
+        self.by_type = {key: value for key, value in mapping.items() if isinstance(key, type)}
+        self.by_name = {key: value for key, value in mapping.items() if isinstance(key, str)}
+        self._cache = {}
+
+    def resolve(self, error):
+        """
+        Return (status, message) for an exception, or None if it is not mapped.
+
+        :param error: The caught exception.
+        """
+        error_type = type(error)
+        try:
+            entry = self._cache[error_type]
+        except KeyError:
+            entry = self._lookup(error_type)
+            if len(self._cache) >= self.max_cached_types:
+                self._cache.clear()
+            self._cache[error_type] = entry
+
+        if entry is None:
+            return None
+        status, message = entry
+        if message is None:
+            return status, service_error_message(error)
+        if "{error}" in message:
+            return status, message.format(error=service_error_message(error))
+        return status, message
+
+    def _lookup(self, error_type):
+        for cls in error_type.__mro__:
+            if cls in self.by_type:
+                return self.by_type[cls]
+            if cls.__name__ in self.by_name:
+                return self.by_name[cls.__name__]
+        return None
+
+
+def service_error_message(error):
+    """Return the message an AWS service attached to an error, or the exception text."""
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict) and 'Message' in response.get('Error', {}):
+        return response['Error']['Message']
+    return str(error)
+
+
+# Errors raised by requests while talking to the PayPal API.
+PAYPAL_REQUEST_ERRORS = ErrorMap({
+    requests.exceptions.ConnectTimeout: (
+        504, "The request to the PayPal API timed out. Please try again later."
+    ),
+    requests.exceptions.Timeout: (
+        504, "The request to the PayPal API timed out. Please try again later."
+    ),
+    requests.exceptions.ConnectionError: (
+        503, "Unable to connect to the PayPal API. Please check your network and try again."
+    ),
+    requests.exceptions.RequestException: (
+        500, "An unexpected error occurred while connecting to the PayPal API."
+    )
+})
+
+
+# Map known exceptions to their corresponding HTTP status and messages.
+# For some exceptions, if the message is None, use the dynamic error message from Cognito.
+SIGN_UP_ERRORS = ErrorMap({
+    "UsernameExistsException": (409, "User already exists"),
+    "AliasExistsException": (409, "A user with this email or phone number already exists."),
+    "InvalidPasswordException": (400, None),
+    "InvalidParameterException": (400, None),
+    "UserLambdaValidationException": (400, None),
+    "TooManyRequestsException": (429, "Too many requests. Please try again later."),
+    "CodeDeliveryFailureException": (500, "Failed to send confirmation code. Please try again.")
+})
+
+
 # User Sign-Up
 def sign_up(password, email, first_name, last_name):
     """
@@ -143,7 +1219,7 @@ def sign_up(password, email, first_name, last_name):
     
     try:
         # Attempt to sign the user up using the Cognito admin API.
-        client.sign_up(
+        get_cognito_client().sign_up(
             ClientId=get_user_pool_client_id(), # Retrieve the Cognito User Pool ID.
             Username=email,
             Password=password,
@@ -153,32 +1229,31 @@ def sign_up(password, email, first_name, last_name):
                 {'Name': 'custom:lastName', 'Value': last_name}
             ]
         )
+        invalidate_cached_user(email)
         return cors_response(200, {"message": "User signed up successfully"})
     
     except Exception as e:
-        # Map known exceptions to their corresponding HTTP status and messages.
-        # For some exceptions, if the message is None, use the dynamic error message from Cognito.
-        error_map = {
-            client.exceptions.UsernameExistsException: (409, "User already exists"),
-            client.exceptions.AliasExistsException: (409, "A user with this email or phone number already exists."),
-            client.exceptions.InvalidPasswordException: (400, None),
-            client.exceptions.InvalidParameterException: (400, None),
-            client.exceptions.UserLambdaValidationException: (400, None),
-            client.exceptions.TooManyRequestsException: (429, "Too many requests. Please try again later."),
-            client.exceptions.CodeDeliveryFailureException: (500, "Failed to send confirmation code. Please try again.")
-        }
-        
-        # Iterate over the error map to check if the caught exception is an instance of any known exception.
-        for exc_type, (status, message) in error_map.items():
-            if isinstance(e, exc_type):
-                # If a matching exception type is found, return the corresponding CORS response.
-                return cors_response(status, {"message": message if message is not None else e.response['Error']['Message']})
+        matched = SIGN_UP_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            return cors_response(status, {"message": message})
         
         # Log any unexpected exceptions to aid in debugging.
-        logger.error(f"Error in sign_up: {str(e)}", exc_info=True)
+        logger.error("Error in sign_up: %s", e, exc_info=True)
         return cors_response(500, {"message": "An internal server error occurred"})
 
 
+# Define an error map to associate specific exception types with their respective HTTP status codes and messages.
+CONFIRM_USER_ERRORS = ErrorMap({
+    "UserNotFoundException": (
+        404, "We could not find a user with this email address."
+    ),
+    "NotAuthorizedException": (
+        403, "You do not have the necessary permissions to confirm this user."
+    )
+})
+
+
 # Confirm User
 def confirm_user(email):
     """
@@ -192,35 +1267,41 @@ def confirm_user(email):
     """
     try:
         # Attempt to confirm the user's sign-up using the Cognito admin API.
-        client.admin_confirm_sign_up(
+        get_cognito_client().admin_confirm_sign_up(
             UserPoolId=get_user_pool_id(),  # Retrieve the Cognito User Pool ID.
             Username=email                   # Use the email as the username.
         )
         return cors_response(200, {"message": "User confirmed successfully"})
 
     except Exception as e:
-        # Define an error map to associate specific exception types with their respective HTTP status codes and messages.
-        error_map = {
-            client.exceptions.UserNotFoundException: (
-                404, "We could not find a user with this email address."
-            ),
-            client.exceptions.NotAuthorizedException: (
-                403, "You do not have the necessary permissions to confirm this user."
-            )
-        }
-
-        # Iterate over the error map to check if the caught exception is an instance of any known exception.
-        for exc_type, (status, message) in error_map.items():
-            if isinstance(e, exc_type):
-                # If a matching exception type is found, return the corresponding CORS response.
-                return cors_response(status, {"message": message})
+        matched = CONFIRM_USER_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            return cors_response(status, {"message": message})
         
         # Log any unexpected exceptions to aid in debugging.
-        logger.error(f"Error in confirm_user: {str(e)}", exc_info=True)
+        logger.error("Error in confirm_user: %s", e, exc_info=True)
         # Return a generic 500 Internal Server Error response for any unhandled exceptions.
         return cors_response(500, {"message": "Something went wrong while confirming the user. Please try again later."})
 
 
+# Mapping of known exception types to their corresponding response status and message.
+CONFIRM_EMAIL_ERRORS = ErrorMap({
+    "CodeMismatchException": (
+        400, "The confirmation code you entered is incorrect. Please check and try again."
+    ),
+    "ExpiredCodeException": (
+        400, "The confirmation code has expired. Please request a new code and try again."
+    ),
+    "NotAuthorizedException": (
+        403, "You are not authorized to perform this action. Please ensure you are logged in and try again."
+    ),
+    "UserNotFoundException": (
+        404, "We couldn't find a user associated with this request. Please check your details and try again."
+    )
+})
+
+
 # Confirm Email
 def confirm_email(access_token, confirmation_code):
     """
@@ -235,44 +1316,43 @@ def confirm_email(access_token, confirmation_code):
     """
     try:
         # Attempt to verify the email attribute using the confirmation code.
-        client.verify_user_attribute(
+        get_cognito_client().verify_user_attribute(
             AccessToken=access_token,
             AttributeName='email',
             Code=confirmation_code
         )
-        # If the verification is successful, return a success response.
+        # email_verified has changed, so drop the cached attributes.
+        invalidate_cached_user(access_token_username(access_token))
         return cors_response(200, {"message": "Email confirmed successfully."})
     
     except Exception as e:
-        # Mapping of known exception types to their corresponding response status and message.
-        error_map = {
-            client.exceptions.CodeMismatchException: (
-                400, "The confirmation code you entered is incorrect. Please check and try again."
-            ),
-            client.exceptions.ExpiredCodeException: (
-                400, "The confirmation code has expired. Please request a new code and try again."
-            ),
-            client.exceptions.NotAuthorizedException: (
-                403, "You are not authorized to perform this action. Please ensure you are logged in and try again."
-            ),
-            client.exceptions.UserNotFoundException: (
-                404, "We couldn't find a user associated with this request. Please check your details and try again."
-            )
-        }
-
-        # Check if the caught exception matches any in our error map.
-        for exc_type, (status, message) in error_map.items():
-            if isinstance(e, exc_type):
-                return cors_response(status, {"message": message})
+        matched = CONFIRM_EMAIL_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            return cors_response(status, {"message": message})
         
         # Log unexpected exceptions for debugging.
-        logger.error(f"Error in confirm_email: {str(e)}", exc_info=True)
+        logger.error("Error in confirm_email: %s", e, exc_info=True)
         # Return a generic error response if the exception type is unrecognized.
         return cors_response(500, {
             "message": "An unexpected error occurred while confirming your email. Please try again later."
         })
 
 
+# Map known exceptions to their HTTP status codes and error messages.
+CONFIRM_EMAIL_RESEND_ERRORS = ErrorMap({
+    "LimitExceededException": (
+        429, "You have exceeded the number of allowed attempts. Please wait before trying again."
+    ),
+    "NotAuthorizedException": (
+        403, "You are not authorized to request a new verification code. Please log in and try again."
+    ),
+    "UserNotFoundException": (
+        404, "We could not find a user associated with this request. Please check your details and try again."
+    )
+})
+
+
 # Confirm Email Resend
 def confirm_email_resend(access_token):
     """
@@ -286,52 +1366,110 @@ def confirm_email_resend(access_token):
     """
     try:
         # Request a new verification code for the email attribute.
-        client.get_user_attribute_verification_code(
+        get_cognito_client().get_user_attribute_verification_code(
             AccessToken=access_token,
             AttributeName='email'
         )
         return cors_response(200, {"message": "Verification code sent successfully."})
     
     except Exception as e:
-        # Map known exceptions to their HTTP status codes and error messages.
-        error_map = {
-            client.exceptions.LimitExceededException: (
-                429, "You have exceeded the number of allowed attempts. Please wait before trying again."
-            ),
-            client.exceptions.NotAuthorizedException: (
-                403, "You are not authorized to request a new verification code. Please log in and try again."
-            ),
-            client.exceptions.UserNotFoundException: (
-                404, "We could not find a user associated with this request. Please check your details and try again."
-            )
-        }
-        
-        # Iterate over the error map and return the corresponding response if a match is found.
-        for exc_type, (status, message) in error_map.items():
-            if isinstance(e, exc_type):
-                return cors_response(status, {"message": message})
+        matched = CONFIRM_EMAIL_RESEND_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            return cors_response(status, {"message": message})
         
         # Log unexpected exceptions and return a generic error response.
-        logger.error(f"Error in confirm_email_resend: {str(e)}", exc_info=True)
+        logger.error("Error in confirm_email_resend: %s", e, exc_info=True)
         return cors_response(500, {
             "message": "An unexpected error occurred while trying to resend the verification code. Please try again later."
         })
 
 
+# Define known exceptions with corresponding HTTP status codes and messages.
+LOG_IN_ERRORS = ErrorMap({
+    "NotAuthorizedException": (
+        401, "The email or password provided is incorrect. Please try again."
+    ),
+    "UserNotFoundException": (
+        404, "We couldn't find a user with this email address. Please check the email entered or sign up if you don't have an account."
+    )
+})
+
+
+# Login Profile
+# /login returns the user's profile built from the ID token's claims, so clients need no
+# follow-up GET /user. Claims missing from the token (e.g. custom attributes the app client
+# may not read) are topped up from admin_get_user, unless LOGIN_PROFILE_TOP_UP is false.
+LOGIN_PROFILE_TOP_UP = os.getenv('LOGIN_PROFILE_TOP_UP', 'true').lower() == 'true'
+
+# Profile field -> Cognito attribute (and ID token claim) it is read from.
+PROFILE_ATTRIBUTES = {
+    "user_id": "sub",
+    "email": "email",
+    "email_verified": "email_verified",
+    "first_name": "custom:firstName",
+    "last_name": "custom:lastName",
+}
+
+
+def build_profile(attributes):
+    """
+    Normalize ID token claims or Cognito user attributes into a profile.
+
+    :param attributes: Claims or attributes by Cognito name; email_verified may be a bool or "true"/"false".
+    :return: The profile, with None for every attribute that is missing.
+    """
+    profile = {field: attributes.get(name) for field, name in PROFILE_ATTRIBUTES.items()}
+    if profile["email_verified"] is not None:
+        profile["email_verified"] = str(profile["email_verified"]).lower() == "true"
+    return profile
+
+
+def login_profile(email, id_token):
+    """
+    Return the profile of a user who has just logged in or refreshed their tokens.
+
+    The ID token is verified like a bearer token on /user (the cached JWKS makes this local
+    once warm). If it cannot be verified, for example while the signing keys are
+    unavailable, none of its claims are used and the profile is read from Cognito instead.
+
+    :param email: The username the user logged in with, or None to read it from the token.
+    :param id_token: The ID token Cognito issued.
+    """
+    try:
+        claims = get_token_verifier().verify(id_token, token_use=("id",))
+    except TokenError as e:
+        # The tokens themselves are fine to return; only the profile must not rely on them.
+        logger.warning("Could not verify the ID token for the login profile: %s", e)
+        claims = {}
+    profile = build_profile(claims)
+    username = email or claims.get("cognito:username") or claims.get("email")
+    missing = [field for field, value in profile.items() if value is None]
+    if missing and username and LOGIN_PROFILE_TOP_UP:
+        try:
+            attributes = user_cache.get(user_cache_key(username), lambda: fetch_user_attributes(username))
+            topped_up = build_profile(attributes)
+            profile.update({field: topped_up[field] for field in missing})
+        except Exception as e:
+            # The tokens are valid either way; a partial profile is better than a failed login.
+            logger.warning("Could not top up the login profile (missing %s): %s", ", ".join(missing), e)
+    return profile
+
+
 # User Log-In
 def log_in(email, password):
     """
-    Authenticate a user with Cognito and return tokens and user id on success.
+    Authenticate a user with Cognito and return tokens, user id and profile on success.
     
     :param email: The user's email address (username).
     :param password: The user's password.
-    :return: A CORS response with authentication tokens or an error message.
+    :return: A CORS response with authentication tokens and the user's profile, or an error message.
     """
     if not all([email, password]):
         return cors_response(400, {"message": "Email and password are required"})
     
     try:
-        response = client.initiate_auth(
+        response = get_cognito_client().initiate_auth(
             ClientId=get_user_pool_client_id(),
             AuthFlow='USER_PASSWORD_AUTH',
             AuthParameters={
@@ -341,36 +1479,96 @@ def log_in(email, password):
         )
 
         id_token = response['AuthenticationResult']['IdToken']
-        decoded_token = jwt.decode(id_token, options={"verify_signature": False})
-        user_id = decoded_token.get("sub")
+        profile = login_profile(email, id_token)
         
         return cors_response(200, {
             "message": "User logged in successfully",
-            "user_id": user_id,
+            "user_id": profile["user_id"],
+            "profile": profile,
             "id_token": id_token,
             "access_token": response['AuthenticationResult']['AccessToken'],
             "refresh_token": response['AuthenticationResult']['RefreshToken']
         })
     
     except Exception as e:
-        # Define known exceptions with corresponding HTTP status codes and messages.
-        error_map = {
-            client.exceptions.NotAuthorizedException: (
-                401, "The email or password provided is incorrect. Please try again."
-            ),
-            client.exceptions.UserNotFoundException: (
-                404, "We couldn't find a user with this email address. Please check the email entered or sign up if you don't have an account."
-            )
-        }
-        
-        for exc_type, (status, message) in error_map.items():
-            if isinstance(e, exc_type):
-                return cors_response(status, {"message": message})
+        matched = LOG_IN_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            return cors_response(status, {"message": message})
         
-        logger.error(f"Error in log_in: {str(e)}", exc_info=True)
+        logger.error("Error in log_in: %s", e, exc_info=True)
         return cors_response(500, {"message": "An unexpected error occurred while attempting to log in. Please try again later."})
 
 
+# Map known exceptions to their HTTP status codes and error messages.
+REFRESH_TOKENS_ERRORS = ErrorMap({
+    "NotAuthorizedException": (
+        401, "Your session has expired or was signed out. Please log in again."
+    ),
+    "UserNotFoundException": (
+        404, "We couldn't find the user this session belongs to. Please log in again."
+    )
+})
+
+
+# Refresh Tokens
+def refresh_tokens(refresh_token):
+    """
+    Exchange a refresh token for new ID and access tokens, without the user's password.
+
+    :param refresh_token: The refresh token returned by /login.
+    :return: A CORS response with the new tokens and the user's profile, or an error message.
+    """
+    if not refresh_token:
+        return cors_response(400, {"message": "A refresh token is required"})
+
+    try:
+        response = get_cognito_client().initiate_auth(
+            ClientId=get_user_pool_client_id(),
+            AuthFlow='REFRESH_TOKEN_AUTH',
+            AuthParameters={'REFRESH_TOKEN': refresh_token}
+        )
+
+        result = response['AuthenticationResult']
+        profile = login_profile(None, result['IdToken'])
+        body = {
+            "message": "Tokens refreshed successfully",
+            "profile": profile,
+            "id_token": result['IdToken'],
+            "access_token": result['AccessToken'],
+            "expires_in": result.get('ExpiresIn'),
+        }
+        # Without a verified ID token the user is unknown here; never hand clients a null ID.
+        if profile["user_id"] is not None:
+            body["user_id"] = profile["user_id"]
+        # Cognito only returns a new refresh token when refresh token rotation is enabled.
+        if result.get('RefreshToken'):
+            body["refresh_token"] = result['RefreshToken']
+        return cors_response(200, body)
+
+    except Exception as e:
+        matched = REFRESH_TOKENS_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            return cors_response(status, {"message": message})
+
+        logger.error("Error in refresh_tokens: %s", e, exc_info=True)
+        return cors_response(500, {"message": "An unexpected error occurred while refreshing your session. Please try again later."})
+
+
+# Map specific exceptions to their corresponding HTTP status codes and messages.
+FORGOT_PASSWORD_ERRORS = ErrorMap({
+    "UserNotFoundException": (
+        404, "We could not find an account associated with this email address."
+    ),
+    "LimitExceededException": (
+        429, "You have exceeded the number of allowed attempts. Please wait a while before trying again."
+    ),
+    # For NotAuthorizedException, we'll use the dynamic message from the exception.
+    "NotAuthorizedException": (403, None)
+})
+
+
 # Forgot Password (Initiate)
 def forgot_password(email):
     """
@@ -380,84 +1578,471 @@ def forgot_password(email):
     :return: A CORS response indicating the result of the password reset request.
     """
     try:
-        client.forgot_password(
+        get_cognito_client().forgot_password(
             ClientId=get_user_pool_client_id(),
             Username=email
         )
         return cors_response(200, {"message": "Password reset initiated. Check your email for the code."})
     
     except Exception as e:
-        # Map specific exceptions to their corresponding HTTP status codes and messages.
-        error_map = {
-            client.exceptions.UserNotFoundException: (
-                404, "We could not find an account associated with this email address."
-            ),
-            client.exceptions.LimitExceededException: (
-                429, "You have exceeded the number of allowed attempts. Please wait a while before trying again."
-            ),
-            # For NotAuthorizedException, we'll use the dynamic message from the exception.
-            client.exceptions.NotAuthorizedException: (403, None)
-        }
+        matched = FORGOT_PASSWORD_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            return cors_response(status, {"message": message})
         
-        for exc_type, (status, message) in error_map.items():
-            if isinstance(e, exc_type):
-                if message is None:
-                    message = e.response['Error']['Message']
-                return cors_response(status, {"message": message})
-        
-        logger.error(f"Error in forgot_password: {str(e)}", exc_info=True)
+        logger.error("Error in forgot_password: %s", e, exc_info=True)
         return cors_response(500, {"message": "An unexpected error occurred while initiating the password reset. Please try again later."})
 
 
-# Confirm Forgot Password
-def confirm_forgot_password(email, confirmation_code, new_password):
+# Define a mapping of exceptions to their respective HTTP status codes and messages.
+CONFIRM_FORGOT_PASSWORD_ERRORS = ErrorMap({
+    "CodeMismatchException": (
+        400, "The confirmation code you entered is incorrect. Please check the code and try again."
+    ),
+    "ExpiredCodeException": (
+        400, "The confirmation code has expired. Please request a new code and try again."
+    ),
+    "InvalidPasswordException": (
+        400, "Your new password is invalid: {error}. Please ensure it meets the required criteria."
+    ),
+    "UserNotFoundException": (
+        404, "We could not find an account associated with this email address. Please check your details."
+    ),
+    "LimitExceededException": (
+        429, "You have made too many attempts. Please wait a while before trying again."
+    )
+})
+
+
+# Confirm Forgot Password
+def confirm_forgot_password(email, confirmation_code, new_password):
+    """
+    Confirm the password reset by verifying the confirmation code and setting a new password.
+
+    :param email: The user's email address.
+    :param confirmation_code: The confirmation code received by the user.
+    :param new_password: The new password to be set.
+    :return: A CORS response indicating the result of the password reset confirmation.
+    """
+    try:
+        get_cognito_client().confirm_forgot_password(
+            ClientId=get_user_pool_client_id(),
+            Username=email,
+            ConfirmationCode=confirmation_code,
+            Password=new_password
+        )
+        return cors_response(200, {"message": "Password reset successfully."})
+    
+    except Exception as e:
+        matched = CONFIRM_FORGOT_PASSWORD_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            return cors_response(status, {"message": message})
+        
+        logger.error("Error in confirm_forgot_password: %s", e, exc_info=True)
+        return cors_response(500, {"message": "An unexpected error occurred while resetting your password. Please try again later."})
+
+
+# Map specific exceptions to HTTP statuses and messages.
+GET_USER_ERRORS = ErrorMap({
+    "UserNotFoundException": (
+        404, "The requested user could not be found. Please check the provided details and try again."
+    ),
+    "InvalidParameterException": (
+        400, "The input parameters are invalid. Please verify the information and try again."
+    ),
+    "TooManyRequestsException": (
+        429, "Too many requests have been made in a short period. Please wait a while before retrying."
+    )
+})
+
+
+# Token Verification
+# Cognito access and ID tokens are verified locally against the user pool's JWKS, which is
+# cached in memory, so protected routes cost no extra round trip once the keys are loaded.
+USER_ROUTES_REQUIRE_AUTH = os.getenv('USER_ROUTES_REQUIRE_AUTH', 'true').lower() == 'true'
+JWKS_CACHE_TTL_SECONDS = float(os.getenv('JWKS_CACHE_TTL_SECONDS', '3600'))
+# Keys are downloaded at most this often, whether for an unknown key ID or a retry after a failure.
+JWKS_MIN_REFRESH_SECONDS = float(os.getenv('JWKS_MIN_REFRESH_SECONDS', '60'))
+TOKEN_LEEWAY_SECONDS = 30
+
+
+class TokenError(Exception):
+    """A bearer token failed verification. The message is safe to return to the client."""
+
+
+def fetch_cognito_jwks(user_pool_id):
+    """Download the signing keys of a Cognito user pool."""
+    region = user_pool_id.split("_", 1)[0]
+    url = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}/.well-known/jwks.json"
+    with DependencyTimer("cognito-idp.GetJWKS"):
+        response = requests.get(url, timeout=(AWS_CONNECT_TIMEOUT_SECONDS, AWS_READ_TIMEOUT_SECONDS))
+    response.raise_for_status()
+    return response.json()
+
+
+# Callable taking a user pool ID and returning its JWKS; replaceable for tests and local tools.
+jwks_fetcher = fetch_cognito_jwks
+
+
+def set_jwks_fetcher(fetcher):
+    """Replace the function that loads a user pool's JWKS and return the previous one."""
+    global jwks_fetcher
+    previous, jwks_fetcher = jwks_fetcher, fetcher
+    token_verifiers.clear()
+    return previous
+
+
+class CognitoTokenVerifier:
+    """
+    Verifies Cognito access and ID tokens without calling Cognito.
+
+    Checks the signature against the pool's JWKS, the expiry, the issuer, the token_use and
+    the client (the "aud" claim of ID tokens, "client_id" of access tokens). The signing
+    algorithm comes from the trusted JWK, never from the token header. The keys are cached
+    for `ttl` seconds; a token signed with an unknown key ID triggers an early refresh, so key
+    rotation is picked up. Downloads are attempted at most every `min_refresh_interval`
+    seconds, whatever the outcome, so unknown key IDs or a Cognito outage cannot cause one
+    download per request. If a refresh fails, the keys already loaded keep being used.
+
+    :param user_pool_id: The Cognito user pool ID, e.g. "us-west-1_AbCdEf123".
+    :param client_id: The app client ID tokens must be issued to.
+    :param fetch_jwks: Callable taking the user pool ID and returning its JWKS.
+    :param ttl: Seconds the keys are cached.
+    :param min_refresh_interval: Minimum seconds between download attempts.
+    :param clock: Monotonic clock, injectable for tests.
+    """
+
+    def __init__(self, user_pool_id, client_id, fetch_jwks=fetch_cognito_jwks, ttl=JWKS_CACHE_TTL_SECONDS,
+                 min_refresh_interval=JWKS_MIN_REFRESH_SECONDS, clock=time.monotonic):
+        region = user_pool_id.split("_", 1)[0]
+        self.user_pool_id = user_pool_id
+        self.client_id = client_id
+        self.issuer = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}"
+        self.fetch_jwks = fetch_jwks
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.clock = clock
+        self.keys = {}
+        self.loaded_at = None
+        self.attempted_at = None
+        self._lock = threading.Lock()
+
+    def verify(self, token, token_use=("access", "id")):
+        """
+        Return the claims of a valid token or raise TokenError.
+
+        :param token: The encoded JWT.
+        :param token_use: The accepted token types ("access", "id").
+        """
+        if not token:
+            raise TokenError("A bearer token is required.")
+        try:
+            key_id = jwt.get_unverified_header(token).get("kid")
+        except jwt.InvalidTokenError:
+            raise TokenError("The token is malformed.")
+
+        key = self.signing_key(key_id)
+        try:
+            claims = jwt.decode(
+                token, key.key, algorithms=[key.algorithm_name], issuer=self.issuer, leeway=TOKEN_LEEWAY_SECONDS,
+                options={"verify_aud": False, "require": ["exp", "iss", "token_use"]},
+            )
+        except jwt.ExpiredSignatureError:
+            raise TokenError("The token has expired.")
+        except jwt.InvalidTokenError as e:
+            raise TokenError(f"The token is invalid: {e}.")
+
+        use = claims.get("token_use")
+        if use not in token_use:
+            raise TokenError(f"{use} tokens are not accepted here.")
+        audience = claims.get("aud") if use == "id" else claims.get("client_id")
+        if audience != self.client_id:
+            raise TokenError("The token was issued to another client.")
+        return claims
+
+    def signing_key(self, key_id):
+        now = self.clock()
+        stale = self.loaded_at is None or now - self.loaded_at >= self.ttl
+        unknown = key_id not in self.keys
+        due = self.attempted_at is None or now - self.attempted_at >= self.min_refresh_interval
+        if (stale or unknown) and due:
+            self.refresh(now)
+        record_cache_lookup('jwks', not (stale or unknown))
+        if not self.keys:
+            raise TokenError("The signing keys are unavailable. Please try again later.")
+        key = self.keys.get(key_id)
+        if key is None:
+            raise TokenError("The token was signed with an unknown key.")
+        return key
+
+    def refresh(self, now):
+        with self._lock:
+            # Another thread may have tried while this one waited.
+            if self.attempted_at is not None and self.attempted_at >= now:
+                return
+            try:
+                jwks = self.fetch_jwks(self.user_pool_id)
+                self.keys = {jwk["kid"]: jwt.PyJWK(jwk) for jwk in jwks.get("keys", []) if jwk.get("kid")}
+                self.loaded_at = self.clock()
+            except Exception as e:
+                if not self.keys:
+                    logger.error("Could not load the JWKS of %s: %s", self.user_pool_id, e)
+                else:
+                    logger.warning("JWKS refresh of %s failed; keeping the cached keys: %s", self.user_pool_id, e)
+            finally:
+                self.attempted_at = self.clock()
+
+
+# (User pool ID, client ID) -> CognitoTokenVerifier
+token_verifiers = {}
+
+
+def get_token_verifier():
+    """Return the token verifier of the configured user pool and app client."""
+    key = (get_user_pool_id(), get_user_pool_client_id())
+    verifier = token_verifiers.get(key)
+    if verifier is None:
+        verifier = token_verifiers.setdefault(key, CognitoTokenVerifier(*key, fetch_jwks=jwks_fetcher))
+    return verifier
+
+
+def bearer_token(request):
+    """Return the token of an "Authorization: Bearer <token>" header, or None."""
+    scheme, _, token = (request.header('Authorization') or "").partition(" ")
+    return token.strip() if scheme.lower() == "bearer" else None
+
+
+def authorize_user(request, email):
+    """
+    Check that the request carries a valid Cognito token of the user it acts on.
+
+    Ownership is decided by immutable identities only. The "email" claim is never trusted: it
+    follows the user-editable email attribute. If the email is not the token's username (the
+    user changed their email, or the pool signs in with an email alias), the user it resolves
+    to is looked up through the user cache and their sub must be the token's sub.
+
+    :param request: The Request being handled.
+    :param email: The email address the request reads or changes.
+    :return: None if the request may proceed; otherwise a 401, 403 or 503 CORS response.
+    """
+    if not USER_ROUTES_REQUIRE_AUTH:
+        return None
+    try:
+        claims = get_token_verifier().verify(bearer_token(request))
+    except TokenError as e:
+        return cors_response(401, {"message": str(e)})
+
+    # A missing email is left to the handler, which answers 400.
+    username = claims.get("cognito:username") if claims.get("token_use") == "id" else claims.get("username")
+    if not email or email.strip().lower() == (username or "").lower():
+        return None
+    try:
+        attributes = user_cache.get(user_cache_key(email), lambda: fetch_user_attributes(email.strip()))
+    except Exception as e:
+        if type(e).__name__ != "UserNotFoundException":
+            logger.error("Could not resolve the owner of %s: %s", email, e)
+            return cors_response(503, {"message": "The user could not be verified. Please try again later."})
+        attributes = {}
+    if not claims.get("sub") or attributes.get("sub") != claims.get("sub"):
+        return cors_response(403, {"message": "The token does not belong to this user."})
+    return None
+
+
+# User Cache
+# GET /user answers from a short-lived per-container cache of user attributes, so the profile
+# and sign-in pages do not each cost an admin_get_user call. Writes drop the user's entry.
+USER_CACHE_TTL_SECONDS = float(os.getenv('USER_CACHE_TTL_SECONDS', '30'))
+USER_CACHE_MAX_ENTRIES = int(os.getenv('USER_CACHE_MAX_ENTRIES', '1000'))
+USER_CACHE_DB = os.getenv('USER_CACHE_DB')
+
+
+class SqliteUserCacheStore:
+    """
+    Shared store for cached user attributes backed by a SQLite file.
+
+    Lets Lambda containers mounting the same path (e.g. on EFS), or local worker processes,
+    reuse each other's lookups and see each other's invalidations. Expired rows are ignored
+    and pruned on write.
+
+    :param path: Path of the SQLite database file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS user_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT value FROM user_cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, value, expires_at):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM user_cache WHERE expires_at <= ?", (time.time(),))
+            connection.execute(
+                "INSERT OR REPLACE INTO user_cache (key, value, expires_at) VALUES (?, ?, ?)", (key, value, expires_at)
+            )
+
+    def delete(self, key):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM user_cache WHERE key = ?", (key,))
+
+
+class UserCache:
     """
-    Confirm the password reset by verifying the confirmation code and setting a new password.
+    Read-through cache of user attributes keyed by environment and username.
 
-    :param email: The user's email address.
-    :param confirmation_code: The confirmation code received by the user.
-    :param new_password: The new password to be set.
-    :return: A CORS response indicating the result of the password reset confirmation.
+    Entries live for `ttl` seconds; past `max_entries` the least recently used are dropped.
+    Misses fall through to the optional shared store, then to the loader. Errors are never
+    cached. An invalidation during a load keeps that load's (possibly stale) result out of
+    the cache. A failing store is logged and bypassed.
+
+    :param store: Optional shared store with get, put(key, value, expires_at) and delete methods.
+    :param ttl: Seconds an entry is served for; 0 turns the cache off.
+    :param max_entries: Entries kept in memory.
+    :param clock: Wall clock (store expiries are Unix times), injectable for tests.
+    """
+
+    def __init__(self, store=None, ttl=USER_CACHE_TTL_SECONDS, max_entries=USER_CACHE_MAX_ENTRIES, clock=time.time):
+        self.store = store
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        # Key -> (attributes, expiry as a Unix time), least recently used first.
+        self._memory = {}
+        self._invalidations = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, load):
+        """
+        Return the cached attributes for key, or call load() and cache its result.
+
+        :param key: The cache key, see user_cache_key.
+        :param load: Callable returning the attributes dictionary on a miss.
+        """
+        if self.ttl <= 0:
+            return load()
+        now = self.clock()
+        with self._lock:
+            entry = self._memory.pop(key, None)
+            if entry is not None and entry[1] > now:
+                self._memory[key] = entry
+            invalidations = self._invalidations
+        if entry is None or entry[1] <= now:
+            entry = self._lookup_store(key, now)
+        record_cache_lookup('user', entry is not None)
+        if entry is not None:
+            return entry[0]
+
+        attributes = load()
+        entry = (attributes, now + self.ttl)
+        with self._lock:
+            if invalidations != self._invalidations:
+                return attributes
+            self._remember(key, entry)
+        if self.store is not None:
+            try:
+                self.store.put(key, json.dumps(attributes), entry[1])
+            except Exception as e:
+                logger.warning("User cache store write failed for %s: %s", key, e)
+        return attributes
+
+    def invalidate(self, key):
+        """Drop key from memory and from the shared store."""
+        with self._lock:
+            self._memory.pop(key, None)
+            self._invalidations += 1
+        if self.store is not None:
+            try:
+                self.store.delete(key)
+            except Exception as e:
+                logger.warning("User cache store delete failed for %s: %s", key, e)
+
+    def clear(self):
+        """Drop the in-memory layer (the shared store is left untouched)."""
+        with self._lock:
+            self._memory.clear()
+            self._invalidations += 1
+
+    def _lookup_store(self, key, now):
+        if self.store is None:
+            return None
+        try:
+            value = self.store.get(key)
+        except Exception as e:
+            logger.warning("User cache store lookup failed for %s: %s", key, e)
+            return None
+        if value is None:
+            return None
+        # The store's copy may have been written long ago; keep it in memory for at most one ttl.
+        entry = (json.loads(value), now + self.ttl)
+        with self._lock:
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key, entry):
+        self._memory.pop(key, None)
+        self._memory[key] = entry
+        while len(self._memory) > self.max_entries:
+            self._memory.pop(next(iter(self._memory)))
+
+
+with startup_profile.step('open user cache store'):
+    user_cache = UserCache(SqliteUserCacheStore(USER_CACHE_DB) if USER_CACHE_DB else None)
+
+
+def set_user_cache_store(store):
+    """
+    Replace the shared store behind the user cache, e.g. with a Redis or DynamoDB adapter.
+
+    :param store: Object with get(key), put(key, value, expires_at) and delete(key), or None.
+    :return: The previous store, so callers can restore it.
     """
+    previous, user_cache.store = user_cache.store, store
+    user_cache.clear()
+    return previous
+
+
+def user_cache_key(username):
+    """Return the cache key of a user: usernames (emails) are case-insensitive in the pool."""
+    return f"{get_environment()}:{username.strip().lower()}"
+
+
+def invalidate_cached_user(username):
+    """Drop a user's cached attributes after a write; never fails the write that called it."""
+    if not username:
+        return
     try:
-        client.confirm_forgot_password(
-            ClientId=get_user_pool_client_id(),
-            Username=email,
-            ConfirmationCode=confirmation_code,
-            Password=new_password
-        )
-        return cors_response(200, {"message": "Password reset successfully."})
-    
+        user_cache.invalidate(user_cache_key(username))
     except Exception as e:
-        # Define a mapping of exceptions to their respective HTTP status codes and messages.
-        error_map = {
-            client.exceptions.CodeMismatchException: (
-                400, "The confirmation code you entered is incorrect. Please check the code and try again."
-            ),
-            client.exceptions.ExpiredCodeException: (
-                400, "The confirmation code has expired. Please request a new code and try again."
-            ),
-            client.exceptions.InvalidPasswordException: (
-                400, None  # Use dynamic error message from Cognito for invalid password.
-            ),
-            client.exceptions.UserNotFoundException: (
-                404, "We could not find an account associated with this email address. Please check your details."
-            ),
-            client.exceptions.LimitExceededException: (
-                429, "You have made too many attempts. Please wait a while before trying again."
-            )
-        }
-        
-        for exc_type, (status, message) in error_map.items():
-            if isinstance(e, exc_type):
-                if message is None:
-                    # Construct dynamic message for InvalidPasswordException.
-                    message = e.response['Error']['Message']
-                    message = f"Your new password is invalid: {message}. Please ensure it meets the required criteria."
-                return cors_response(status, {"message": message})
-        
-        logger.error(f"Error in confirm_forgot_password: {str(e)}", exc_info=True)
-        return cors_response(500, {"message": "An unexpected error occurred while resetting your password. Please try again later."})
+        logger.warning("Could not invalidate the cached attributes of %s: %s", username, e)
+
+
+def access_token_username(access_token):
+    """Return the username of an access token Cognito has just accepted, without verifying it again."""
+    try:
+        return jwt.decode(access_token, options={"verify_signature": False}).get("username")
+    except jwt.InvalidTokenError:
+        return None
+
+
+def fetch_user_attributes(username):
+    """Return a user's attributes from Cognito as a dictionary."""
+    response = get_cognito_client().admin_get_user(
+        UserPoolId=get_user_pool_id(),
+        Username=username
+    )
+    # Convert the list of attributes to a dictionary.
+    return {attr['Name']: attr['Value'] for attr in response['UserAttributes']}
 
 
 # Get User Data
@@ -472,12 +2057,7 @@ def get_user(email):
         return cors_response(400, {"message": "Missing required 'email' query parameter"})
     
     try:
-        response = client.admin_get_user(
-            UserPoolId=get_user_pool_id(),
-            Username=email
-        )
-        # Convert the list of attributes to a dictionary.
-        user_attributes = {attr['Name']: attr['Value'] for attr in response['UserAttributes']}
+        user_attributes = user_cache.get(user_cache_key(email), lambda: fetch_user_attributes(email))
         # Determine the email verification status.
         email_verified = user_attributes.get("email_verified", "false").lower() == "true"
 
@@ -488,29 +2068,45 @@ def get_user(email):
         })
     
     except Exception as e:
-        # Map specific exceptions to HTTP statuses and messages.
-        error_map = {
-            client.exceptions.UserNotFoundException: (
-                404, "The requested user could not be found. Please check the provided details and try again."
-            ),
-            client.exceptions.InvalidParameterException: (
-                400, "The input parameters are invalid. Please verify the information and try again."
-            ),
-            client.exceptions.TooManyRequestsException: (
-                429, "Too many requests have been made in a short period. Please wait a while before retrying."
-            )
-        }
-        
-        for exc_type, (status, message) in error_map.items():
-            if isinstance(e, exc_type):
-                return cors_response(status, {"message": message})
+        matched = GET_USER_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            return cors_response(status, {"message": message})
         
-        logger.error(f"Unexpected error in get_user: {str(e)}", exc_info=True)
+        logger.error("Unexpected error in get_user: %s", e, exc_info=True)
         return cors_response(500, {
             "message": "An unexpected error occurred while retrieving the user. Please try again later."
         })
 
 
+# Map specific exceptions to their HTTP statuses and messages.
+UPDATE_USER_ERRORS = ErrorMap({
+    "UserNotFoundException": (
+        404, "No user was found with the provided email address."
+    ),
+    "InvalidParameterException": (
+        400, "Invalid parameter: {error}. Please verify your input and try again."
+    ),
+    "InvalidPasswordException": (
+        400, "Invalid password: {error}. Please verify your input and try again."
+    ),
+    "NotAuthorizedException": (
+        403, "You are not authorized to update this user's attributes. Please check your permissions."
+    )
+})
+
+
+# Attributes only Cognito (or an administrator in the console) may set. Verification flags
+# are set by confirming a code; letting users write them would skip that step.
+PROTECTED_USER_ATTRIBUTES = frozenset({"sub", "email_verified", "phone_number_verified"})
+
+
+def is_protected_attribute(name):
+    """Return True if users may not set the attribute through PATCH /user."""
+    name = str(name).strip().lower()
+    return name in PROTECTED_USER_ATTRIBUTES or name.startswith("cognito:")
+
+
 # Update User Attributes
 def update_user(email, attribute_updates):
     """
@@ -528,12 +2124,15 @@ def update_user(email, attribute_updates):
         return cors_response(400, {"message": "Email is required"})
     if not attribute_updates:
         return cors_response(400, {"message": "Attribute updates are required"})
+    protected = sorted(name for name in attribute_updates if is_protected_attribute(name))
+    if protected:
+        return cors_response(400, {"message": f"These attributes cannot be updated: {', '.join(protected)}"})
     
     try:
         # Handle password update separately, if provided.
         if 'password' in attribute_updates:
             new_password = attribute_updates.pop('password')
-            client.admin_set_user_password(
+            get_cognito_client().admin_set_user_password(
                 UserPoolId=get_user_pool_id(),
                 Username=email,
                 Password=new_password,
@@ -543,50 +2142,37 @@ def update_user(email, attribute_updates):
         # Update any remaining attributes.
         if attribute_updates:
             attributes = [{'Name': key, 'Value': value} for key, value in attribute_updates.items()]
-            client.admin_update_user_attributes(
+            get_cognito_client().admin_update_user_attributes(
                 UserPoolId=get_user_pool_id(),
                 Username=email,
                 UserAttributes=attributes
             )
         
+        invalidate_cached_user(email)
         return cors_response(200, {"message": "User attributes updated successfully"})
     
     except Exception as e:
-        # Map specific exceptions to their HTTP statuses and messages.
-        error_map = {
-            client.exceptions.UserNotFoundException: (
-                404, "No user was found with the provided email address."
-            ),
-            client.exceptions.InvalidParameterException: (
-                400, None  # Use dynamic error message from Cognito.
-            ),
-            client.exceptions.InvalidPasswordException: (
-                400, None  # Use dynamic error message from Cognito.
-            ),
-            client.exceptions.NotAuthorizedException: (
-                403, "You are not authorized to update this user's attributes. Please check your permissions."
-            )
-        }
-        
-        for exc_type, (status, static_message) in error_map.items():
-            if isinstance(e, exc_type):
-                if static_message is None:
-                    # For dynamic messages, use a custom prefix based on exception type.
-                    if isinstance(e, client.exceptions.InvalidParameterException):
-                        message = f"Invalid parameter: {e.response['Error']['Message']}. Please verify your input and try again."
-                    elif isinstance(e, client.exceptions.InvalidPasswordException):
-                        message = f"Invalid password: {e.response['Error']['Message']}. Please verify your input and try again."
-                    else:
-                        message = e.response['Error']['Message']
-                else:
-                    message = static_message
-                return cors_response(status, {"message": message})
+        matched = UPDATE_USER_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            return cors_response(status, {"message": message})
         
         # Log unexpected exceptions and return a generic error response.
-        logger.error(f"Unexpected error in update_user: {str(e)}", exc_info=True)
+        logger.error("Unexpected error in update_user: %s", e, exc_info=True)
         return cors_response(500, {"message": "An unexpected error occurred while updating the user attributes. Please try again later."})
 
 
+# Map specific exceptions to HTTP statuses and messages.
+DELETE_USER_ERRORS = ErrorMap({
+    "UserNotFoundException": (
+        404, "No user was found with the provided email address. Please check and try again."
+    ),
+    "NotAuthorizedException": (
+        403, "You are not authorized to delete this user. Please check your permissions."
+    )
+})
+
+
 # Delete User
 def delete_user(email):
     """
@@ -599,35 +2185,209 @@ def delete_user(email):
         return cors_response(400, {"message": "Email is required"})
     
     try:
-        client.admin_delete_user(
+        get_cognito_client().admin_delete_user(
             UserPoolId=get_user_pool_id(),
             Username=email
         )
+        invalidate_cached_user(email)
         return cors_response(200, {"message": "User deleted successfully"})
     
     except Exception as e:
-        # Map specific exceptions to HTTP statuses and messages.
-        error_map = {
-            client.exceptions.UserNotFoundException: (
-                404, "No user was found with the provided email address. Please check and try again."
-            ),
-            client.exceptions.NotAuthorizedException: (
-                403, "You are not authorized to delete this user. Please check your permissions."
-            )
-        }
-        
-        # Iterate over the error map to return a corresponding response if the exception matches.
-        for exc_type, (status, message) in error_map.items():
-            if isinstance(e, exc_type):
-                return cors_response(status, {"message": message})
+        matched = DELETE_USER_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            return cors_response(status, {"message": message})
         
         # Log unexpected exceptions and return a generic error response.
-        logger.error(f"Unexpected error in delete_user: {str(e)}", exc_info=True)
+        logger.error("Unexpected error in delete_user: %s", e, exc_info=True)
         return cors_response(500, {
             "message": "An unexpected error occurred while attempting to delete the user. Please try again later."
         })
 
 
+# Bulk User Administration
+# POST /admin/users/batch runs many get/update/delete/confirm operations in one invocation, on a
+# bounded thread pool. Token buckets keep the fan-out under Cognito's per-account request quotas
+# (by default 120/s for user reads and 25/s for user updates), which live traffic shares.
+ADMIN_GROUP = os.getenv('ADMIN_GROUP', 'admin')
+BULK_MAX_OPERATIONS = int(os.getenv('BULK_MAX_OPERATIONS', '100'))
+BULK_MAX_WORKERS = int(os.getenv('BULK_MAX_WORKERS', '8'))
+BULK_READS_PER_SECOND = float(os.getenv('BULK_READS_PER_SECOND', '60'))
+BULK_WRITES_PER_SECOND = float(os.getenv('BULK_WRITES_PER_SECOND', '12'))
+
+
+class TokenBucket:
+    """
+    Blocking rate limiter: acquire() waits until enough tokens have accumulated.
+
+    Tokens are added at `rate` per second up to `burst`, so short bursts pass at once and
+    longer runs settle at `rate`. Callers reserve their tokens up front (the balance may go
+    negative) and then sleep off the deficit, so waiters are served in arrival order.
+
+    :param rate: Tokens added per second; 0 or less means unlimited.
+    :param burst: Bucket size (defaults to one second's worth).
+    :param clock: Monotonic clock, injectable for tests.
+    :param sleep: Sleep function, injectable for tests.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.burst
+        self.updated_at = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate) - tokens
+            self.updated_at = now
+            wait = -self.tokens / self.rate
+        if wait > 0:
+            self.sleep(wait)
+
+
+# Cognito quota category -> limiter shared by every bulk request in this container.
+bulk_rate_limits = {
+    "read": TokenBucket(BULK_READS_PER_SECOND),
+    "write": TokenBucket(BULK_WRITES_PER_SECOND),
+}
+
+
+def update_user_calls(attribute_updates):
+    """Number of Cognito writes update_user makes: one for a password, one for the other attributes."""
+    return int('password' in attribute_updates) + int(any(name != 'password' for name in attribute_updates))
+
+
+# Bulk action -> (quota category, Cognito calls it makes, handler); the callables take the operation.
+BULK_ACTIONS = {
+    "get": ("read", lambda operation: 1, lambda operation: get_user(operation['email'])),
+    "update": (
+        "write",
+        lambda operation: update_user_calls(operation.get('attribute_updates') or {}),
+        # update_user pops the password, so it gets a copy of the request's dictionary.
+        lambda operation: update_user(operation['email'], dict(operation.get('attribute_updates') or {})),
+    ),
+    "delete": ("write", lambda operation: 1, lambda operation: delete_user(operation['email'])),
+    "confirm": ("write", lambda operation: 1, lambda operation: confirm_user(operation['email'])),
+}
+
+
+def run_bulk_operation(index, operation):
+    """
+    Run one bulk operation and return its result.
+
+    :param index: Position of the operation in the request.
+    :param operation: {"action": ..., "email": ..., "attribute_updates": {...}}.
+    :return: {"index", "action", "email", "status"} plus the body of the single-user response.
+    """
+    if not isinstance(operation, dict):
+        return {"index": index, "status": 400, "message": "Each operation must be an object."}
+    action, email = operation.get('action'), operation.get('email')
+    result = {"index": index, "action": action, "email": email}
+    if action not in BULK_ACTIONS:
+        return dict(result, status=400, message=f"Unknown action. Use one of: {', '.join(BULK_ACTIONS)}.")
+    if not email or not isinstance(email, str):
+        return dict(result, status=400, message="Email is required")
+    if action == "update" and not isinstance(operation.get('attribute_updates'), dict):
+        return dict(result, status=400, message="Attribute updates are required")
+
+    category, calls, handler = BULK_ACTIONS[action]
+    bulk_rate_limits[category].acquire(max(1, calls(operation)))
+    try:
+        response = handler(operation)
+    except Exception as e:
+        logger.error("Unexpected error in bulk %s of %s: %s", action, email, e, exc_info=True)
+        return dict(result, status=500, message="An unexpected error occurred. Please try again later.")
+    return dict(result, status=response['statusCode'], **json.loads(response['body']))
+
+
+def run_bulk_operations(operations, max_workers=BULK_MAX_WORKERS):
+    """
+    Run bulk operations concurrently and return their results in request order.
+
+    Worker threads record their Cognito calls on the invocation's metrics and log with its
+    request ID and route.
+
+    :param operations: The operations, see run_bulk_operation.
+    :param max_workers: Maximum concurrent operations.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    metrics = current_metrics()
+    request_id, route = getattr(log_context, 'request_id', None), getattr(log_context, 'route', None)
+
+    def run(item):
+        metrics_state.current = metrics
+        log_context.request_id, log_context.route = request_id, route
+        try:
+            return run_bulk_operation(*item)
+        finally:
+            metrics_state.current = None
+            log_context.request_id = log_context.route = None
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(operations)))) as pool:
+        return list(pool.map(run, enumerate(operations)))
+
+
+def authorize_admin(request):
+    """
+    Check that the request carries a valid Cognito token of a member of ADMIN_GROUP.
+
+    Always enforced: USER_ROUTES_REQUIRE_AUTH only relaxes the per-user /user routes.
+
+    :return: None if the request may proceed; otherwise a 401 or 403 CORS response.
+    """
+    try:
+        claims = get_token_verifier().verify(bearer_token(request))
+    except TokenError as e:
+        return cors_response(401, {"message": str(e)})
+    if ADMIN_GROUP not in (claims.get("cognito:groups") or []):
+        return cors_response(403, {"message": "Only administrators can manage users in bulk."})
+    return None
+
+
+# Bulk User Administration Route
+def bulk_users(operations):
+    """
+    Run a batch of user administration operations and report each one's outcome.
+
+    :param operations: A list of at most BULK_MAX_OPERATIONS operations.
+    :return: A CORS response with per-operation results and success/failure counts.
+    """
+    if not isinstance(operations, list) or not operations:
+        return cors_response(400, {"message": "A non-empty list of operations is required"})
+    if len(operations) > BULK_MAX_OPERATIONS:
+        return cors_response(400, {"message": f"At most {BULK_MAX_OPERATIONS} operations are allowed per request"})
+
+    results = run_bulk_operations(operations)
+    succeeded = sum(1 for result in results if 200 <= result["status"] < 300)
+    return cors_response(200, {
+        "message": "Bulk operations completed",
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    })
+
+
+# Map specific SES exceptions to HTTP statuses and messages.
+CONTACT_US_ERRORS = ErrorMap({
+    "MessageRejected": (
+        400, "The email message was rejected. Please ensure the provided email address is valid."
+    ),
+    "MailFromDomainNotVerifiedException": (
+        400, "The sender's email address has not been verified. Please contact support for assistance."
+    ),
+    "ConfigurationSetDoesNotExistException": (
+        500, "There was a configuration issue with the email service. Please try again later."
+    )
+})
+
+
 # Contact Us
 def contact_us(first_name, email, message):
     """
@@ -642,7 +2402,7 @@ def contact_us(first_name, email, message):
         return cors_response(400, {"message": "All fields are required: name, email, and message."})
     
     try:
-        ses.send_email(
+        get_ses_client().send_email(
             Source=get_sender_email(),
             Destination={'ToAddresses': [get_recipient_email()]},
             Message={
@@ -655,35 +2415,166 @@ def contact_us(first_name, email, message):
         return cors_response(200, {"message": "Message sent successfully."})
     
     except Exception as e:
-        # Map specific SES exceptions to HTTP statuses and messages.
-        error_map = {
-            ses.exceptions.MessageRejected: (
-                400, "The email message was rejected. Please ensure the provided email address is valid."
-            ),
-            ses.exceptions.MailFromDomainNotVerifiedException: (
-                400, "The sender's email address has not been verified. Please contact support for assistance."
-            ),
-            ses.exceptions.ConfigurationSetDoesNotExistException: (
-                500, "There was a configuration issue with the email service. Please try again later."
-            )
-        }
+        matched = CONTACT_US_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            logger.error("%s error in contact_us: %s", type(e).__name__, e, exc_info=True)
+            return cors_response(status, {"message": message})
         
-        for exc_type, (status, msg) in error_map.items():
-            if isinstance(e, exc_type):
-                logger.error(f"{exc_type.__name__} error in contact_us: {str(e)}", exc_info=True)
-                return cors_response(status, {"message": msg})
-        
-        logger.error(f"Unhandled error in contact_us: {str(e)}", exc_info=True)
+        logger.error("Unhandled error in contact_us: %s", e, exc_info=True)
         return cors_response(500, {
             "message": "An unexpected error occurred while sending your message. Please try again later."
         })
 
 
+# PayPal HTTP Session
+PAYPAL_HTTP_POOL_SIZE = int(os.getenv('PAYPAL_HTTP_POOL_SIZE', '10'))
+PAYPAL_HTTP_RETRIES = int(os.getenv('PAYPAL_HTTP_RETRIES', '2'))
+PAYPAL_HTTP_BACKOFF_SECONDS = float(os.getenv('PAYPAL_HTTP_BACKOFF_SECONDS', '0.2'))
+
+
+def create_paypal_session(pool_size=PAYPAL_HTTP_POOL_SIZE, retries=PAYPAL_HTTP_RETRIES,
+                          backoff=PAYPAL_HTTP_BACKOFF_SECONDS):
+    """
+    Build the keep-alive HTTP session shared by every PayPal call.
+
+    The session pools connections per host, so warm containers reuse the TCP/TLS
+    connection instead of handshaking on every PayPal hop. Retries are limited to
+    failures where PayPal never processed the request: connection errors and 429s.
+    Read errors and 5xx responses are not retried because the POST may have gone through.
+
+    :param pool_size: Maximum number of pooled connections per host.
+    :param retries: Number of retries for connection errors and 429 responses.
+    :param backoff: Backoff factor in seconds between retries.
+    :return: A configured requests.Session.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=0,
+        status=retries,
+        status_forcelist=(429,),
+        allowed_methods=frozenset({"POST"}),
+        backoff_factor=backoff,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+with startup_profile.step('create paypal session'):
+    paypal_session = create_paypal_session()
+
+
+# PayPal Access Token Cache
+PAYPAL_TOKEN_EXPIRY_MARGIN_SECONDS = float(os.getenv('PAYPAL_TOKEN_EXPIRY_MARGIN_SECONDS', '300'))
+
+# Environment -> (access token, monotonic expiry time)
+paypal_token_cache = {}
+paypal_token_lock = threading.Lock()
+
+
 # Get Paypal Access Token
 def get_paypal_access_token():
     """
-    Retrieve an access token from PayPal using client credentials.
-    
+    Return a PayPal access token, reusing the cached one until shortly before it expires.
+
+    Tokens are cached per environment using the expires_in PayPal returns, minus a safety
+    margin. When the token is missing or expired only one caller performs the exchange;
+    concurrent callers wait for it and then read the refreshed token.
+
+    :return: The PayPal access token if successful; otherwise, a CORS response with error details.
+    """
+    environment = get_environment()
+    cached = paypal_token_cache.get(environment)
+    if cached and time.monotonic() < cached[1]:
+        record_cache_lookup('paypal_token', True)
+        return cached[0]
+
+    record_cache_lookup('paypal_token', False)
+    with paypal_token_lock:
+        cached = paypal_token_cache.get(environment)
+        if cached and time.monotonic() < cached[1]:
+            return cached[0]
+        return request_paypal_access_token(environment)
+
+
+def invalidate_paypal_access_token(access_token=None):
+    """
+    Drop the cached PayPal token for the current environment.
+
+    :param access_token: If given, only drop the cached token when it is this one, so a
+                         token another caller already refreshed is not thrown away.
+    """
+    environment = get_environment()
+    with paypal_token_lock:
+        cached = paypal_token_cache.get(environment)
+        if cached and (access_token is None or cached[0] == access_token):
+            del paypal_token_cache[environment]
+
+
+# PayPal API path -> dependency name used in metrics.
+PAYPAL_DEPENDENCY_NAMES = {
+    "/v1/oauth2/token": "paypal.GetAccessToken",
+    "/v2/checkout/orders": "paypal.CreateOrder",
+    "/v1/catalogs/products": "paypal.CreateProduct",
+    "/v1/billing/plans": "paypal.CreatePlan",
+    "/v1/billing/subscriptions": "paypal.CreateSubscription",
+}
+
+
+def paypal_dependency_name(url):
+    """Return the metric name of a PayPal endpoint, e.g. "paypal.CreateOrder"."""
+    path = urlsplit(url or "").path.rstrip("/")
+    return PAYPAL_DEPENDENCY_NAMES.get(path, f"paypal.{path or 'unknown'}")
+
+
+def paypal_request_headers(paypal_request_id):
+    """Return the extra headers for an idempotent PayPal POST (None without a request ID)."""
+    return {"PayPal-Request-Id": paypal_request_id} if paypal_request_id else None
+
+
+def post_to_paypal(url, payload, access_token, headers=None):
+    """
+    POST a JSON payload to PayPal with a bearer token.
+
+    If PayPal answers 401 the token was revoked or expired early: the cached token is
+    invalidated, a new one is fetched and the request is retried once.
+
+    :param url: The PayPal endpoint.
+    :param payload: The JSON body to send.
+    :param access_token: The bearer token to authorize with.
+    :param headers: Optional extra headers to send with the request.
+    :return: The requests response of the last attempt.
+    """
+    def send(token):
+        request_headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {token}"
+        }
+        if headers:
+            request_headers.update(headers)
+        with DependencyTimer(paypal_dependency_name(url)):
+            return paypal_session.post(url, headers=request_headers, json=payload, timeout=10)
+
+    response = send(access_token)
+    if response.status_code == 401:
+        logger.warning("PayPal rejected the access token; refreshing it and retrying once.")
+        invalidate_paypal_access_token(access_token)
+        new_token = get_paypal_access_token()
+        if isinstance(new_token, str) and new_token:
+            response = send(new_token)
+    return response
+
+
+def request_paypal_access_token(environment):
+    """
+    Exchange the client credentials for a new PayPal access token and cache it.
+
+    :param environment: The environment the token is cached under.
     :return: The PayPal access token if successful; otherwise, a CORS response with error details.
     """
     paypal_auth_token_link = os.getenv('PAYPAL_AUTH_TOKEN_LINK')
@@ -699,47 +2590,38 @@ def get_paypal_access_token():
     auth = (get_paypal_client_id(), get_paypal_secret())
 
     try:
-        response = requests.post(url, headers=headers, data=data, auth=auth, timeout=10)
-        
+        with DependencyTimer(paypal_dependency_name(url)):
+            response = paypal_session.post(url, headers=headers, data=data, auth=auth, timeout=10)
+
         if response.status_code == 200:
             token_data = response.json()
-            return token_data["access_token"]
+            access_token = token_data["access_token"]
+            lifetime = float(token_data.get("expires_in", 0)) - PAYPAL_TOKEN_EXPIRY_MARGIN_SECONDS
+            if lifetime > 0:
+                paypal_token_cache[environment] = (access_token, time.monotonic() + lifetime)
+            return access_token
         else:
             error_details = response.json()
-            logger.error(f"PayPal token error: {error_details}")
+            logger.error("PayPal token error: %s", error_details)
             return cors_response(response.status_code, {
                 "message": "Failed to retrieve PayPal access token."
             })
     
     except Exception as e:
-        # Map specific requests exceptions to HTTP status codes, messages, and error types.
-        error_map = {
-            requests.exceptions.Timeout: (
-                504, "The request to the PayPal API timed out. Please try again later."
-            ),
-            requests.exceptions.ConnectionError: (
-                503, "Unable to connect to the PayPal API. Please check your network and try again."
-            ),
-            requests.exceptions.RequestException: (
-                500, "An unexpected error occurred while connecting to the PayPal API."
-            )
-        }
-        
-        for exc_type, (status, msg) in error_map.items():
-            if isinstance(e, exc_type):
-                logger.error(f"{exc_type.__name__} in get_paypal_access_token: {e}")
-                return cors_response(status, {
-                    "message": msg,
-                })
+        matched = PAYPAL_REQUEST_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            logger.error("%s in request_paypal_access_token: %s", type(e).__name__, e)
+            return cors_response(status, {"message": message})
         
-        logger.error(f"Unexpected error in get_paypal_access_token: {e}", exc_info=True)
+        logger.error("Unexpected error in request_paypal_access_token: %s", e, exc_info=True)
         return cors_response(500, {
             "message": "An unexpected error occurred while retrieving the PayPal access token."
         })
 
 
 # Create Paypal Order
-def create_paypal_order(amount, custom_id, currency="USD"):
+def create_paypal_order(amount, custom_id, currency="USD", paypal_request_id=None):
     """
     Create a PayPal order with the specified amount, custom ID, and currency.
 
@@ -749,6 +2631,7 @@ def create_paypal_order(amount, custom_id, currency="USD"):
     :param amount: The order amount.
     :param custom_id: A custom identifier for the order.
     :param currency: The currency code (default is "USD").
+    :param paypal_request_id: Optional PayPal-Request-Id, so PayPal returns the same order for retries.
     :return: A CORS response containing the order details or an error message.
     """
     try:
@@ -762,12 +2645,8 @@ def create_paypal_order(amount, custom_id, currency="USD"):
         
         paypal_checkout_order_link = os.getenv('PAYPAL_CHECKOUT_ORDER_LINK')
 
-        # Define the PayPal order creation endpoint and headers.
+        # Define the PayPal order creation endpoint.
         url = paypal_checkout_order_link
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}"
-        }
 
         # Prepare the payload for creating the order.
         payload = {
@@ -784,52 +2663,53 @@ def create_paypal_order(amount, custom_id, currency="USD"):
         }
 
         # Attempt to create the order.
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
+        response = post_to_paypal(url, payload, access_token, paypal_request_headers(paypal_request_id))
 
-        if response.status_code == 201:
+        # PayPal answers 200 instead of 201 when a PayPal-Request-Id it has seen is replayed.
+        if response.status_code in (200, 201):
             return cors_response(201, {"order": response.json()})
         else:
             error_details = response.json()
-            logger.error(f"PayPal order error: {error_details}")
+            logger.error("PayPal order error: %s", error_details)
             return cors_response(response.status_code, {
                 "message": f"Failed to create PayPal order: {error_details.get('name', 'Unknown error')} - {error_details.get('message', 'No description')}."
             })
 
     except Exception as e:
-        # Map specific request exceptions to HTTP statuses, messages, and error types.
-        error_map = {
-            requests.exceptions.Timeout: (
-                504, "The request to the PayPal API timed out. Please try again later."
-            ),
-            requests.exceptions.ConnectionError: (
-                503, "Unable to connect to the PayPal API. Please check your network and try again."
-            ),
-            requests.exceptions.RequestException: (
-                500, "An unexpected error occurred while connecting to the PayPal API."
-            )
-        }
+        matched = PAYPAL_REQUEST_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            logger.error("%s in create_paypal_order: %s", type(e).__name__, e)
+            return cors_response(status, {"message": message})
 
-        for exc_type, (status, msg) in error_map.items():
-            if isinstance(e, exc_type):
-                logger.error(f"{exc_type.__name__} in create_paypal_order: {e}")
-                return cors_response(status, {
-                    "message": msg
-                })
-
-        logger.error(f"Unexpected error in create_paypal_order: {e}", exc_info=True)
+        logger.error("Unexpected error in create_paypal_order: %s", e, exc_info=True)
         return cors_response(500, {
             "message": "An unexpected error occurred while creating the PayPal order. Please try again later."
         })
 
 
+# Map specific exceptions to HTTP statuses and messages.
+CREATE_PAYPAL_ORDER_ROUTE_ERRORS = ErrorMap({
+    ValueError: (400, None),  # Use dynamic message (str(e)) for ValueError.
+    # Subclasses both RequestException and ValueError, and the MRO would pick the former;
+    # an unreadable PayPal response has always been reported as a ValueError.
+    requests.exceptions.JSONDecodeError: (400, None),
+    requests.exceptions.RequestException: (
+        503,
+        "A network error occurred while connecting to PayPal. Please try again later."
+    )
+})
+
+
 # Create Paypal Order Route
-def create_paypal_order_route(amount, custom_id, currency="USD"):
+def create_paypal_order_route(amount, custom_id, currency="USD", paypal_request_id=None):
     """
     Create a PayPal order route that validates input, creates an order, and returns the order ID.
 
     :param amount: The monetary amount for the order.
     :param custom_id: A custom identifier for the order.
     :param currency: The currency code (default is "USD").
+    :param paypal_request_id: Optional PayPal-Request-Id forwarded to PayPal.
     :return: A CORS response with the order ID on success or an error message on failure.
     """
     try:
@@ -840,7 +2720,7 @@ def create_paypal_order_route(amount, custom_id, currency="USD"):
             raise ValueError("The Custom ID must be a non-empty string.")
 
         # Attempt to create the PayPal order.
-        order_response = create_paypal_order(amount, custom_id, currency)
+        order_response = create_paypal_order(amount, custom_id, currency, paypal_request_id)
         
         # Check if the response contains a "body" and parse it.
         if "body" in order_response:
@@ -864,24 +2744,14 @@ def create_paypal_order_route(amount, custom_id, currency="USD"):
         })
 
     except Exception as e:
-        # Map specific exceptions to HTTP statuses, messages, and error types.
-        error_map = {
-            ValueError: (400, None, "ValidationError"),  # Use dynamic message (str(e)) for ValueError.
-            requests.exceptions.RequestException: (
-                503,
-                "A network error occurred while connecting to PayPal. Please try again later."
-            )
-        }
-        
-        # Check if the caught exception matches any mapped type.
-        for exc_type, (status, msg) in error_map.items():
-            if isinstance(e, exc_type):
-                logger.error(f"{exc_type.__name__} in create_paypal_order_route: {e}")
-                final_msg = msg if msg is not None else str(e)
-                return cors_response(status, {"message": final_msg})
+        matched = CREATE_PAYPAL_ORDER_ROUTE_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            logger.error("%s in create_paypal_order_route: %s", type(e).__name__, e)
+            return cors_response(status, {"message": message})
         
         # Fallback for unexpected exceptions.
-        logger.error(f"Unexpected error creating PayPal order: {e}", exc_info=True)
+        logger.error("Unexpected error creating PayPal order: %s", e, exc_info=True)
         return cors_response(500, {
             "message": "An unexpected error occurred while processing your request. Please try again later."
         })
@@ -909,10 +2779,6 @@ def create_paypal_product():
         paypal_catalogue_product_link = os.getenv('PAYPAL_CATALOGUE_PRODUCT_LINK')
 
         url = paypal_catalogue_product_link
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}"
-        }
         payload = {
             "name": "Donation Product",
             "description": "A product for donation subscriptions.",
@@ -920,7 +2786,7 @@ def create_paypal_product():
             "category": "CHARITY"
         }
 
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
+        response = post_to_paypal(url, payload, access_token)
 
         if response.status_code == 201:
             product_id = response.json().get("id")
@@ -932,48 +2798,45 @@ def create_paypal_product():
             return product_id
         else:
             error_details = response.json()
-            logger.error(f"PayPal product creation failed: {error_details}")
+            logger.error("PayPal product creation failed: %s", error_details)
             return cors_response(response.status_code, {
                 "message": f"Failed to create PayPal product: {error_details.get('name', 'Unknown error')} - {error_details.get('message', 'No description')}."
             })
 
     except Exception as e:
-        # Define an error map for requests exceptions.
-        error_map = {
-            requests.exceptions.Timeout: (
-                504,
-                "The request to the PayPal API timed out. Please try again later."
-            ),
-            requests.exceptions.ConnectionError: (
-                503,
-                "Unable to connect to the PayPal API. Please check your network and try again."
-            ),
-            requests.exceptions.RequestException: (
-                500,
-                "An unexpected error occurred while connecting to the PayPal API."
-            )
-        }
-        for exc_type, (status, msg) in error_map.items():
-            if isinstance(e, exc_type):
-                logger.error(f"{exc_type.__name__} in create_paypal_product: {e}")
-                return cors_response(status, {"message": msg})
+        matched = PAYPAL_REQUEST_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            logger.error("%s in create_paypal_product: %s", type(e).__name__, e)
+            return cors_response(status, {"message": message})
 
-        logger.error(f"Unexpected error in create_paypal_product: {e}", exc_info=True)
+        logger.error("Unexpected error in create_paypal_product: %s", e, exc_info=True)
         return cors_response(500, {
             "message": "An unexpected error occurred while creating the PayPal product. Please try again later."
         })
 
 
+# Billing interval -> adjective used in PayPal plan names.
+PLAN_INTERVAL_NAMES = {
+    "DAY": "Daily",
+    "WEEK": "Weekly",
+    "MONTH": "Monthly",
+    "YEAR": "Yearly",
+}
+
+
 # Create Paypal Plan
-def create_paypal_plan(product_id, amount):
+def create_paypal_plan(product_id, amount, currency="USD", interval_unit="WEEK"):
     """
-    Create a PayPal billing plan for weekly donations.
+    Create a PayPal billing plan for recurring (by default weekly) donations.
 
     Validates input parameters, retrieves an access token, and sends a request to create a billing plan.
     Returns the plan ID on success, or a CORS response with error details on failure.
     
     :param product_id: The PayPal product ID to associate with the plan.
     :param amount: The monetary amount for the plan.
+    :param currency: The currency code (default is "USD").
+    :param interval_unit: The billing interval: DAY, WEEK, MONTH or YEAR (default is "WEEK").
     :return: The plan ID if successful, or a CORS response containing error details.
     """
     # Validate input parameters.
@@ -987,6 +2850,11 @@ def create_paypal_plan(product_id, amount):
         return cors_response(400, {
             "message": "Amount must be greater than zero."
         })
+    if interval_unit not in PLAN_INTERVAL_NAMES:
+        logger.error("Unsupported billing interval: %s", interval_unit)
+        return cors_response(400, {
+            "message": "Interval unit must be one of DAY, WEEK, MONTH or YEAR."
+        })
     
     try:
         # Retrieve the PayPal access token.
@@ -999,21 +2867,17 @@ def create_paypal_plan(product_id, amount):
         
         paypal_billing_plans_link = os.getenv('PAYPAL_BILLING_PLANS_LINK')
         
-        # Set up the API endpoint, headers, and payload for plan creation.
+        # Set up the API endpoint and payload for plan creation.
         url = paypal_billing_plans_link
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}"
-        }
         payload = {
             "product_id": product_id,
-            "name": "Weekly Donation Plan",
-            "description": "A plan for weekly donations.",
+            "name": f"{PLAN_INTERVAL_NAMES[interval_unit]} Donation Plan ({amount:.2f} {currency})",
+            "description": f"A plan for {PLAN_INTERVAL_NAMES[interval_unit].lower()} donations.",
             "status": "ACTIVE",
             "billing_cycles": [
                 {
                     "frequency": {
-                        "interval_unit": "WEEK",
+                        "interval_unit": interval_unit,
                         "interval_count": 1
                     },
                     "tenure_type": "REGULAR",
@@ -1022,7 +2886,7 @@ def create_paypal_plan(product_id, amount):
                     "pricing_scheme": {
                         "fixed_price": {
                             "value": f"{amount:.2f}",
-                            "currency_code": "USD"
+                            "currency_code": currency
                         }
                     }
                 }
@@ -1031,7 +2895,7 @@ def create_paypal_plan(product_id, amount):
                 "auto_bill_outstanding": True,
                 "setup_fee": {
                     "value": "0.00",
-                    "currency_code": "USD"
+                    "currency_code": currency
                 },
                 "setup_fee_failure_action": "CONTINUE",
                 "payment_failure_threshold": 3
@@ -1039,7 +2903,7 @@ def create_paypal_plan(product_id, amount):
         }
         
         # Send the POST request to create the billing plan.
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
+        response = post_to_paypal(url, payload, access_token)
         
         if response.status_code == 201:
             plan_id = response.json().get("id")
@@ -1051,41 +2915,27 @@ def create_paypal_plan(product_id, amount):
             return plan_id
         else:
             error_details = response.json()
-            logger.error(f"PayPal Plan Creation Failed: {error_details}")
+            logger.error("PayPal Plan Creation Failed: %s", error_details)
             return cors_response(response.status_code, {
                 "message": f"Failed to create PayPal plan: {error_details.get('name', 'Unknown error')} - {error_details.get('message', 'No description')}."
             })
     
     except Exception as e:
-        # Define an error map for specific requests exceptions.
-        error_map = {
-            requests.exceptions.Timeout: (
-                504,
-                "The request to the PayPal API timed out. Please try again later."
-            ),
-            requests.exceptions.ConnectionError: (
-                503,
-                "Unable to connect to the PayPal API. Please check your network and try again."
-            ),
-            requests.exceptions.RequestException: (
-                500,
-                "An unexpected error occurred while connecting to the PayPal API."
-            )
-        }
-        for exc_type, (status, msg, error_type) in error_map.items():
-            if isinstance(e, exc_type):
-                logger.error(f"{exc_type.__name__} in create_paypal_plan: {e}")
-                return cors_response(status, {"message": msg})
+        matched = PAYPAL_REQUEST_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            logger.error("%s in create_paypal_plan: %s", type(e).__name__, e)
+            return cors_response(status, {"message": message})
         
         # Fallback for unexpected exceptions.
-        logger.error(f"Unexpected error in create_paypal_plan: {e}", exc_info=True)
+        logger.error("Unexpected error in create_paypal_plan: %s", e, exc_info=True)
         return cors_response(500, {
             "message": "An unexpected error occurred while creating the PayPal plan. Please try again later."
         })
 
 
 # Create Paypal Subscription
-def create_paypal_subscription(plan_id, custom_id):
+def create_paypal_subscription(plan_id, custom_id, paypal_request_id=None):
     """
     Create a PayPal subscription using a given plan ID and custom ID.
 
@@ -1094,6 +2944,7 @@ def create_paypal_subscription(plan_id, custom_id):
 
     :param plan_id: The PayPal plan ID to subscribe to.
     :param custom_id: A custom identifier for the subscription.
+    :param paypal_request_id: Optional PayPal-Request-Id, so PayPal returns the same subscription for retries.
     :return: A CORS response with subscription data or error details.
     """
     # Validate required inputs.
@@ -1119,66 +2970,188 @@ def create_paypal_subscription(plan_id, custom_id):
         
         paypal_billing_subscription_link = os.getenv('PAYPAL_BILLING_SUBSCRIPTION_LINK')
 
-        # Set up the endpoint, headers, and payload for subscription creation.
+        # Set up the endpoint and payload for subscription creation.
         url = paypal_billing_subscription_link
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {access_token}"
-        }
         payload = {
             "plan_id": plan_id,
             "custom_id": custom_id
         }
 
         # Send the POST request to create the subscription.
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
-        if response.status_code == 201:
+        response = post_to_paypal(url, payload, access_token, paypal_request_headers(paypal_request_id))
+        # PayPal answers 200 instead of 201 when a PayPal-Request-Id it has seen is replayed.
+        if response.status_code in (200, 201):
             subscription = response.json()
             return cors_response(201, {"subscription": subscription})
         else:
             error_details = response.json()
-            logger.error(f"PayPal subscription creation failed: {error_details}")
+            logger.error("PayPal subscription creation failed: %s", error_details)
             return cors_response(response.status_code, {
                 "message": f"Failed to create PayPal subscription: {error_details.get('name', 'Unknown error')} - {error_details.get('message', 'No description')}."
             })
 
     except Exception as e:
-        # Define an error map for specific requests exceptions.
-        error_map = {
-            requests.exceptions.Timeout: (
-                504,
-                "The request to the PayPal API timed out. Please try again later."
-            ),
-            requests.exceptions.ConnectionError: (
-                503,
-                "Unable to connect to the PayPal API. Please check your network and try again."
-            ),
-            requests.exceptions.RequestException: (
-                500,
-                "An unexpected error occurred while connecting to the PayPal API."
-            )
-        }
-        # Iterate over the error map and return a matching response if found.
-        for exc_type, (status, msg, error_type) in error_map.items():
-            if isinstance(e, exc_type):
-                logger.error(f"{exc_type.__name__} in create_paypal_subscription: {e}")
-                return cors_response(status, {"message": msg})
+        matched = PAYPAL_REQUEST_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            logger.error("%s in create_paypal_subscription: %s", type(e).__name__, e)
+            return cors_response(status, {"message": message})
         
         # Log and return a generic error response for any unexpected exceptions.
-        logger.error(f"Unexpected error in create_paypal_subscription: {e}", exc_info=True)
+        logger.error("Unexpected error in create_paypal_subscription: %s", e, exc_info=True)
         return cors_response(500, {
             "message": "An unexpected error occurred while creating the PayPal subscription. Please try again later."
         })
 
 
+# PayPal Catalog
+PAYPAL_CATALOG_DB = os.getenv('PAYPAL_CATALOG_DB')
+
+
+class SqliteCatalogStore:
+    """
+    Persistent key/value store for PayPal catalog IDs backed by a SQLite file.
+
+    Lets product and plan IDs outlive a single Lambda container (e.g. on a mounted EFS
+    path) or be shared between local worker processes.
+
+    :param path: Path of the SQLite database file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS paypal_catalog (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        with self._connect() as connection:
+            row = connection.execute("SELECT value FROM paypal_catalog WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, value):
+        with self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO paypal_catalog (key, value) VALUES (?, ?)", (key, value))
+
+    def delete(self, key):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM paypal_catalog WHERE key = ?", (key,))
+
+
+class PayPalCatalog:
+    """
+    Reuses one PayPal donation product and one billing plan per (amount, currency, interval).
+
+    Lookups go to memory first, then to the optional persistent store, and only create
+    the product or plan in PayPal on a miss. Creation is serialized so concurrent donors
+    with the same amount do not create duplicate plans. Only successful IDs are cached.
+
+    :param store: Optional persistent store with get, put and delete methods.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self._memory = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def product_key():
+        return f"{get_environment()}:product"
+
+    @staticmethod
+    def plan_key(product_id, amount, currency, interval_unit):
+        return f"{get_environment()}:plan:{product_id}:{float(amount):.2f}:{currency}:{interval_unit}"
+
+    def get_product_id(self):
+        """Return the donation product ID, creating the product in PayPal on first use."""
+        return self._get_or_create(self.product_key(), create_paypal_product)
+
+    def get_plan_id(self, product_id, amount, currency="USD", interval_unit="WEEK"):
+        """Return the plan ID for this price point, creating the plan in PayPal on first use."""
+        key = self.plan_key(product_id, amount, currency, interval_unit)
+        return self._get_or_create(key, lambda: create_paypal_plan(product_id, amount, currency, interval_unit))
+
+    def is_cached_plan(self, product_id, amount, currency="USD", interval_unit="WEEK"):
+        """Return True if this price point's plan ID came from the catalog rather than PayPal."""
+        return self._lookup(self.plan_key(product_id, amount, currency, interval_unit)) is not None
+
+    def evict_plan(self, product_id, amount, currency="USD", interval_unit="WEEK"):
+        """Forget a plan ID, e.g. after PayPal reports the plan no longer exists."""
+        self._evict(self.plan_key(product_id, amount, currency, interval_unit))
+
+    def evict_product(self):
+        """Forget the product ID, e.g. after PayPal reports the product no longer exists."""
+        self._evict(self.product_key())
+
+    def clear(self):
+        """Drop the in-memory layer (the persistent store is left untouched)."""
+        self._memory.clear()
+
+    def _lookup(self, key):
+        value = self._memory.get(key)
+        if value is None and self.store is not None:
+            try:
+                value = self.store.get(key)
+            except Exception as e:
+                logger.warning("PayPal catalog store lookup failed for %s: %s", key, e)
+                value = None
+            if value is not None:
+                self._memory[key] = value
+        return value
+
+    def _get_or_create(self, key, create):
+        value = self._lookup(key)
+        record_cache_lookup('paypal_catalog', value is not None)
+        if value is not None:
+            return value
+
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value
+
+            value = create()
+            # Errors come back as CORS response dicts; only real IDs are cached.
+            if isinstance(value, str) and value:
+                self._memory[key] = value
+                if self.store is not None:
+                    try:
+                        self.store.put(key, value)
+                    except Exception as e:
+                        logger.warning("PayPal catalog store write failed for %s: %s", key, e)
+            return value
+
+    def _evict(self, key):
+        self._memory.pop(key, None)
+        if self.store is not None:
+            try:
+                self.store.delete(key)
+            except Exception as e:
+                logger.warning("PayPal catalog store delete failed for %s: %s", key, e)
+
+
+with startup_profile.step('open paypal catalog'):
+    paypal_catalog = PayPalCatalog(SqliteCatalogStore(PAYPAL_CATALOG_DB) if PAYPAL_CATALOG_DB else None)
+
+
+# Map specific exceptions to their corresponding HTTP status and message.
+CREATE_PAYPAL_SUBSCRIPTION_ROUTE_ERRORS = ErrorMap({
+    ValueError: (400, None)  # Use dynamic message for ValueError.
+})
+
+
 # Create Paypal Subscription route
-def create_paypal_subscription_route(amount, custom_id):
+def create_paypal_subscription_route(amount, custom_id, paypal_request_id=None):
     """
-    Create a PayPal subscription route by validating inputs, creating a product, a plan,
-    and finally a subscription. Returns a CORS response with the subscription ID and approval URL.
+    Create a PayPal subscription route by validating inputs, looking up (or creating on first use)
+    the donation product and the plan for this amount, and finally creating a subscription.
+    Returns a CORS response with the subscription ID and approval URL.
 
     :param amount: The subscription amount (must be greater than zero).
     :param custom_id: A non-empty string used as a custom identifier for the subscription.
+    :param paypal_request_id: Optional PayPal-Request-Id forwarded to PayPal.
     :return: A CORS response with subscription details on success or error details on failure.
     """
     try:
@@ -1195,24 +3168,40 @@ def create_paypal_subscription_route(amount, custom_id):
                 "message": "Custom ID must be a non-empty string."
             })
 
-        # Create PayPal product.
-        product_id = create_paypal_product()
+        # Reuse the donation product, creating it on first use.
+        product_id = paypal_catalog.get_product_id()
         if not product_id:
             logger.error("Failed to create PayPal product.")
             return cors_response(500, {
                 "message": "Failed to create PayPal product."
             })
+        if isinstance(product_id, dict):
+            return product_id
 
-        # Create PayPal plan.
-        plan_id = create_paypal_plan(product_id, amount)
+        # Reuse the plan for this amount, creating it on first use.
+        plan_was_cached = paypal_catalog.is_cached_plan(product_id, amount)
+        plan_id = paypal_catalog.get_plan_id(product_id, amount)
         if not plan_id:
             logger.error("Failed to create PayPal plan.")
             return cors_response(500, {
                 "message": "Failed to create PayPal plan."
             })
+        if isinstance(plan_id, dict):
+            # The cached product may have been removed in PayPal; recreate it on the next request.
+            if plan_id.get("statusCode") in (404, 422):
+                paypal_catalog.evict_product()
+            return plan_id
 
         # Create PayPal subscription.
-        subscription_response = create_paypal_subscription(plan_id, custom_id)
+        subscription_response = create_paypal_subscription(plan_id, custom_id, paypal_request_id)
+
+        # A cached plan may have been deactivated in PayPal; forget it and retry once with a new plan.
+        if plan_was_cached and subscription_response.get("statusCode") in (404, 422):
+            logger.warning("Cached PayPal plan %s was rejected; recreating it.", plan_id)
+            paypal_catalog.evict_plan(product_id, amount)
+            # PayPal may have stored the rejection under this request ID, so the retry gets its own.
+            retry_request_id = f"{paypal_request_id}-retry" if paypal_request_id else None
+            return create_paypal_subscription_route(amount, custom_id, retry_request_id)
         
         if "body" in subscription_response:
             subscription_body = json.loads(subscription_response["body"])
@@ -1246,18 +3235,274 @@ def create_paypal_subscription_route(amount, custom_id):
         })
 
     except Exception as e:
-        # Map specific exceptions to their corresponding HTTP status, message, and error type.
-        error_map = {
-            ValueError: (400, None, "ValidationError")  # Use dynamic message for ValueError.
-        }
+        matched = CREATE_PAYPAL_SUBSCRIPTION_ROUTE_ERRORS.resolve(e)
+        if matched:
+            status, message = matched
+            logger.error("%s in create_paypal_subscription_route: %s", type(e).__name__, e)
+            return cors_response(status, {"message": message})
 
-        for exc_type, (status, static_msg) in error_map.items():
-            if isinstance(e, exc_type):
-                logger.error(f"{exc_type.__name__} in create_paypal_subscription_route: {e}")
-                final_msg = static_msg if static_msg is not None else str(e)
-                return cors_response(status, {"message": final_msg})
-
-        logger.error(f"Unexpected error creating PayPal subscription: {e}", exc_info=True)
+        logger.error("Unexpected error creating PayPal subscription: %s", e, exc_info=True)
         return cors_response(500, {
             "message": "An unexpected error occurred while processing your request. Please try again later."
         })
+
+
+# Idempotency
+# Clients send an Idempotency-Key header with POST /create-paypal-order and /create-paypal-subscription.
+# The first successful response for a key is stored and replayed for retries with the same key.
+IDEMPOTENCY_DB = os.getenv('IDEMPOTENCY_DB')
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv('IDEMPOTENCY_TTL_SECONDS', str(24 * 3600)))
+IDEMPOTENCY_MEMORY_ENTRIES = 1000
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class SqliteIdempotencyStore:
+    """
+    Persistent store for idempotent responses backed by a SQLite file.
+
+    Lets retries that land on another Lambda container (or local worker process) still be
+    answered from the first response. Expired rows are ignored and pruned on write.
+
+    :param path: Path of the SQLite database file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS idempotency_keys "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT value FROM idempotency_keys WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def put(self, key, value, expires_at):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (time.time(),))
+            connection.execute(
+                "INSERT OR REPLACE INTO idempotency_keys (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, expires_at),
+            )
+
+    def delete(self, key):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM idempotency_keys WHERE key = ?", (key,))
+
+
+class IdempotencyCache:
+    """
+    Remembers the first successful response per idempotency key.
+
+    Lookups go to memory first, then to the optional persistent store. Requests with the
+    same key are serialized, so a double click waits for the first request and then gets
+    its response instead of creating a second order. Only 2xx responses are stored: a
+    retry after a failure runs again. Reusing a key with a different body is rejected.
+
+    :param store: Optional persistent store with get, put(key, value, expires_at) and delete methods.
+    :param ttl: Seconds a response is replayed for.
+    :param max_entries: Responses kept in memory; the oldest are dropped first.
+    """
+
+    def __init__(self, store=None, ttl=IDEMPOTENCY_TTL_SECONDS, max_entries=IDEMPOTENCY_MEMORY_ENTRIES):
+        self.store = store
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Key -> (fingerprint, status code, body, expiry as a Unix time)
+        self._memory = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, fingerprint, handler):
+        """
+        Return the stored response for key, or call handler() and store its response.
+
+        :param key: The namespaced idempotency key.
+        :param fingerprint: Digest of the request body the key was first used with.
+        :param handler: Callable producing the response on a miss.
+        """
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            key_lock[1] += 1
+        try:
+            with key_lock[0]:
+                entry = self._lookup(key)
+                record_cache_lookup('idempotency', entry is not None)
+                if entry is not None:
+                    return self._replay(entry, fingerprint)
+
+                response = handler()
+                if 200 <= response.get('statusCode', 500) < 300:
+                    self._remember(key, (fingerprint, response['statusCode'], response['body'], time.time() + self.ttl))
+                return response
+        finally:
+            with self._lock:
+                key_lock[1] -= 1
+                if not key_lock[1]:
+                    self._key_locks.pop(key, None)
+
+    def clear(self):
+        """Drop the in-memory layer (the persistent store is left untouched)."""
+        with self._lock:
+            self._memory.clear()
+
+    @staticmethod
+    def _replay(entry, fingerprint):
+        stored_fingerprint, status_code, body, _ = entry
+        if stored_fingerprint != fingerprint:
+            return cors_response(422, {"message": "This Idempotency-Key was already used with a different request."})
+        response = cors_response(status_code, json.loads(body))
+        response['headers'] = dict(response['headers'], **{"Idempotent-Replayed": "true"})
+        return response
+
+    def _lookup(self, key):
+        entry = self._memory.get(key)
+        if entry is None and self.store is not None:
+            try:
+                value = self.store.get(key)
+            except Exception as e:
+                logger.warning("Idempotency store lookup failed for %s: %s", key, e)
+                value = None
+            if value is not None:
+                entry = tuple(json.loads(value))
+                if entry[3] > time.time():
+                    # Later retries of this key in this container skip the store.
+                    self._keep_in_memory(key, entry)
+        if entry is None or entry[3] <= time.time():
+            return None
+        return entry
+
+    def _keep_in_memory(self, key, entry):
+        with self._lock:
+            self._memory[key] = entry
+            while len(self._memory) > self.max_entries:
+                self._memory.pop(next(iter(self._memory)))
+
+    def _remember(self, key, entry):
+        self._keep_in_memory(key, entry)
+        if self.store is not None:
+            try:
+                self.store.put(key, json.dumps(entry), entry[3])
+            except Exception as e:
+                logger.warning("Idempotency store write failed for %s: %s", key, e)
+
+
+with startup_profile.step('open idempotency store'):
+    idempotency_cache = IdempotencyCache(SqliteIdempotencyStore(IDEMPOTENCY_DB) if IDEMPOTENCY_DB else None)
+
+
+def idempotent(request, handler):
+    """
+    Run a payment handler once per Idempotency-Key.
+
+    Without the header the handler simply runs. With it, the handler is passed a
+    PayPal-Request-Id derived from the key, so PayPal also deduplicates retries that
+    reach another container, and the response is stored for replay.
+
+    :param request: The Request being handled.
+    :param handler: Callable taking the PayPal-Request-Id (or None) and returning a response.
+    """
+    key = request.header('Idempotency-Key')
+    if not key:
+        return handler(None)
+    if len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return cors_response(400, {
+            "message": f"The Idempotency-Key header must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters."
+        })
+
+    import hashlib
+    scoped_key = f"{get_environment()}:{request.path}:{key}"
+    fingerprint = hashlib.sha256(json.dumps(request.body, sort_keys=True).encode()).hexdigest()
+    paypal_request_id = hashlib.sha256(scoped_key.encode()).hexdigest()
+    return idempotency_cache.run(scoped_key, fingerprint, lambda: handler(paypal_request_id))
+
+
+# Routes
+@route("/signup", "POST")
+def handle_sign_up(request):
+    return sign_up(request.get('password'), request.get('email'), request.get('first_name'), request.get('last_name'))
+
+
+@route("/confirm", "POST")
+def handle_confirm_user(request):
+    return confirm_user(request.get('email'))
+
+
+@route("/confirm-email", "POST")
+def handle_confirm_email(request):
+    return confirm_email(request.get('access_token'), request.get('confirmation_code'))
+
+
+@route("/confirm-email-resend", "POST")
+def handle_confirm_email_resend(request):
+    return confirm_email_resend(request.get('access_token'))
+
+
+@route("/login", "POST")
+def handle_log_in(request):
+    return log_in(request.get('email'), request.get('password'))
+
+
+@route("/token/refresh", "POST")
+def handle_refresh_tokens(request):
+    return refresh_tokens(request.get('refresh_token'))
+
+
+@route("/forgot-password", "POST")
+def handle_forgot_password(request):
+    return forgot_password(request.get('email'))
+
+
+@route("/confirm-forgot-password", "POST")
+def handle_confirm_forgot_password(request):
+    return confirm_forgot_password(request.get('email'), request.get('confirmation_code'), request.get('new_password'))
+
+
+@route("/user", "GET")
+def handle_get_user(request):
+    email = request.query('email')
+    return authorize_user(request, email) or get_user(email)
+
+
+@route("/user", "PATCH")
+def handle_update_user(request):
+    email = request.get('email')
+    return authorize_user(request, email) or update_user(email, request.get('attribute_updates', {}))
+
+
+@route("/user", "DELETE")
+def handle_delete_user(request):
+    email = request.query('email')
+    return authorize_user(request, email) or delete_user(email)
+
+
+@route("/admin/users/batch", "POST")
+def handle_bulk_users(request):
+    return authorize_admin(request) or bulk_users(request.get('operations'))
+
+
+@route("/contact-us", "POST")
+def handle_contact_us(request):
+    return contact_us(request.get('first_name'), request.get('email'), request.get('message'))
+
+
+@route("/create-paypal-order", "POST")
+def handle_create_paypal_order(request):
+    return idempotent(request, lambda paypal_request_id: create_paypal_order_route(
+        request.get('amount'), request.get('custom_id'), request.get('currency', "USD"), paypal_request_id))
+
+
+@route("/create-paypal-subscription", "POST")
+def handle_create_paypal_subscription(request):
+    return idempotent(request, lambda paypal_request_id: create_paypal_subscription_route(
+        request.get('amount'), request.get('custom_id'), paypal_request_id))
+
+
+startup_profile.finish_init()
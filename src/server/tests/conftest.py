@@ -0,0 +1,118 @@
+import os
+import sys
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+class FakeClock:
+    """
+    A manually advanced clock for the `clock=` / `sleep=` hooks in index.
+
+    Tests move it by setting or adding to `now`; `sleep` advances it instead of
+    blocking and records each (rounded) duration in `slept`.
+
+    :param now: The starting time in seconds.
+    """
+
+    def __init__(self, now=0.0):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(round(seconds, 6))
+        self.now += seconds
+
+
+@pytest.fixture(autouse=True)
+def reset_index_caches():
+    """
+    Clear the process-wide caches in index.py around every test so that values
+    cached by one test (with its own mocks) never leak into the next.
+    """
+    import index
+
+    index.clear_caches()
+    yield
+    index.clear_caches()
+
+
+@pytest.fixture(autouse=True)
+def metrics_records():
+    """Capture the EMF records lambda_handler emits instead of printing them."""
+    import index
+
+    sink = index.MemoryMetricsSink()
+    previous = index.set_metrics_sink(sink)
+    yield sink.records
+    index.set_metrics_sink(previous)
+
+
+@pytest.fixture
+def downstream_calls():
+    """
+    Count the downstream calls a route makes, per operation.
+
+    Yields a function that takes a route name such as "POST /create-paypal-order",
+    invokes it once with empty caches and once more warm, and returns the two
+    Counters of calls (keys like "ssm.GetParametersByPath" or
+    "paypal.POST /v2/checkout/orders"). AWS calls go to botocore Stubbers and PayPal
+    calls to the fake PayPal server, the same stand-ins as tools/benchmark.py.
+    """
+    from unittest.mock import patch
+
+    import index
+    from tools import benchmark
+    from tools.fake_paypal import FakePayPalServer
+
+    scenarios = {scenario.name: scenario for scenario in benchmark.SCENARIOS}
+
+    with patch.dict(os.environ), FakePayPalServer() as paypal:
+        benchmark.configure_environment(paypal)
+        clients = {"cognito-idp": index.get_cognito_client(), "ses": index.get_ses_client()}
+        ssm_client = index.get_ssm_client()
+        counter = benchmark.DownstreamCounter(dict(clients, ssm=ssm_client), paypal)
+        previous_fetcher = index.set_jwks_fetcher(counter.serve_jwks)
+
+        def measure(route):
+            scenario = scenarios[route]
+            calls = []
+            index.clear_caches()
+            for _ in ("cold", "warm"):
+                counter.reset()
+                _, status = benchmark.invoke(scenario, 0, clients, ssm_client)
+                assert status == 200, f"{route} answered {status}"
+                calls.append(counter.snapshot())
+            return tuple(calls)
+
+        try:
+            yield measure
+        finally:
+            index.set_jwks_fetcher(previous_fetcher)
+            counter.close()
+
+
+@pytest.fixture
+def cognito_tokens():
+    """
+    Verify bearer tokens against a local JWKS instead of the user pool's.
+
+    Yields a FakeCognito: its tokens (FakeCognito.token(email, ...) or a fake login) are
+    accepted by index, whose user pool and client IDs are patched to the fake's. No network.
+    """
+    from unittest.mock import patch
+
+    import index
+    from tools.fake_aws import FakeCognito
+
+    cognito = FakeCognito()
+    previous_fetcher = index.set_jwks_fetcher(cognito.jwks)
+    try:
+        with patch("index.get_user_pool_id", return_value=cognito.user_pool_id), \
+                patch("index.get_user_pool_client_id", return_value=cognito.client_id):
+            yield cognito
+    finally:
+        index.set_jwks_fetcher(previous_fetcher)
@@ -0,0 +1,64 @@
+import os
+import sys
+import json
+import subprocess
+import pytest
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def run_cold(code):
+    """Run code in a fresh interpreter (a cold start) and return its JSON output."""
+    env = dict(os.environ, AWS_LAMBDA_FUNCTION_NAME="test-function", AWS_DEFAULT_REGION="us-west-1")
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=SERVER_DIR, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_preflight_cold_start_builds_no_clients():
+    state = run_cold(
+        "import json, sys, index\n"
+        "index.lambda_handler({'httpMethod': 'OPTIONS', 'path': '/login'}, None)\n"
+        "print(json.dumps({\n"
+        "    'clients': [name for name in ('client', 'ses', 'ssm') if name in vars(index)],\n"
+        "    'boto3': 'boto3' in sys.modules,\n"
+        "    'dotenv': 'dotenv' in sys.modules,\n"
+        "}))"
+    )
+    assert state == {"clients": [], "boto3": False, "dotenv": False}
+
+
+def test_clients_are_created_on_first_use_and_memoized():
+    state = run_cold(
+        "import json, index\n"
+        "first = index.get_ssm_client()\n"
+        "print(json.dumps({\n"
+        "    'same': first is index.get_ssm_client() is index.ssm,\n"
+        "    'clients': [name for name in ('client', 'ses', 'ssm') if name in vars(index)],\n"
+        "    'connect_timeout': first.meta.config.connect_timeout,\n"
+        "    'max_pool_connections': first.meta.config.max_pool_connections,\n"
+        "    'tcp_keepalive': first.meta.config.tcp_keepalive,\n"
+        "    'cognito_region': index.get_cognito_client().meta.region_name,\n"
+        "}))"
+    )
+    assert state == {
+        "same": True,
+        "clients": ["ssm"],
+        "connect_timeout": 2.0,
+        "max_pool_connections": 10,
+        "tcp_keepalive": True,
+        "cognito_region": "us-west-1",
+    }
+
+
+def test_patched_client_is_returned_by_accessor():
+    import index
+
+    with patch("index.client") as mock_client:
+        assert index.get_cognito_client() is mock_client
+    assert index.get_cognito_client() is not mock_client
@@ -0,0 +1,51 @@
+import os
+import sys
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools import benchmark
+from tools.fake_paypal import PAYPAL_ENDPOINTS
+
+
+@pytest.fixture
+def results(monkeypatch):
+    # Cold call plus two warm-ups cover all three donation amounts, so no plan is created while measuring.
+    # run_benchmark points the process at its local stand-ins; put the environment back afterwards.
+    for name in ["ENVIRONMENT", *PAYPAL_ENDPOINTS.values()]:
+        monkeypatch.setenv(name, os.environ.get(name, ""))
+    return benchmark.run_benchmark(iterations=3, warmup=2)
+
+
+def test_every_route_runs_without_errors(results):
+    assert len(results["routes"]) == len(benchmark.SCENARIOS)
+    for name, route in results["routes"].items():
+        assert route["errors"] == 0, name
+        assert route["cold_status"] == 200, name
+        assert route["p50_ms"] <= route["p95_ms"] <= route["p99_ms"]
+
+
+@pytest.mark.parametrize("route, expected", [
+    ("POST /login", {"cognito-idp.InitiateAuth": 1}),
+    ("POST /contact-us", {"ses.SendEmail": 1}),
+    ("POST /create-paypal-order", {"paypal.POST /v2/checkout/orders": 1}),
+    ("POST /create-paypal-subscription", {"paypal.POST /v1/billing/subscriptions": 1}),
+])
+def test_warm_requests_only_call_what_they_need(results, route, expected):
+    # SSM, the PayPal token and the PayPal catalog are all served from cache once warm.
+    assert results["routes"][route]["downstream_calls_per_request"] == expected
+
+
+def test_cold_call_loads_the_parameter_namespace_once(results):
+    cold_calls = results["routes"]["POST /login"]["cold_downstream_calls"]
+    assert cold_calls == {"cognito-idp.InitiateAuth": 1, "cognito-idp.GetJWKS": 1, "ssm.GetParametersByPath": 1}
+
+
+@pytest.mark.parametrize("values, fraction, expected", [
+    ([1, 2, 3, 4], 0.5, 2),
+    ([1, 2, 3, 4], 0.99, 4),
+    ([7], 0.95, 7),
+    ([], 0.5, None),
+])
+def test_percentile(values, fraction, expected):
+    assert benchmark.percentile(values, fraction) == expected
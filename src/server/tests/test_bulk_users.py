@@ -0,0 +1,180 @@
+import os
+import sys
+import json
+import time
+import threading
+import pytest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import index
+from conftest import FakeClock
+from index import TokenBucket, bulk_users, run_bulk_operation, run_bulk_operations
+from tools.fake_aws import installed
+
+PASSWORD = "Str0ng!Passw0rd"
+
+
+@pytest.fixture
+def pool(cognito_tokens):
+    """The fake user pool from cognito_tokens, installed as index's Cognito client, with three members."""
+    for name in ("ana", "bo", "cy"):
+        cognito_tokens.add_user(f"{name}@example.com", PASSWORD, confirmed=name != "cy", **{"custom:firstName": name})
+    with installed(index, cognito=cognito_tokens):
+        yield cognito_tokens
+
+
+def batch_event(operations, token=None):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    return {"httpMethod": "POST", "path": "/admin/users/batch", "headers": headers,
+            "body": json.dumps({"operations": operations})}
+
+
+def test_token_bucket_lets_a_burst_through_then_paces():
+    clock = FakeClock(100.0)
+    bucket = TokenBucket(rate=10, burst=2, clock=clock, sleep=clock.sleep)
+
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.slept == []
+    bucket.acquire()
+    bucket.acquire(2)
+    assert clock.slept == [0.1, 0.2]
+
+
+def test_token_bucket_refills_over_time():
+    clock = FakeClock(100.0)
+    bucket = TokenBucket(rate=10, burst=5, clock=clock, sleep=clock.sleep)
+    for _ in range(5):
+        bucket.acquire()
+
+    clock.now += 60  # Refills to the burst size, not beyond.
+    for _ in range(5):
+        bucket.acquire()
+    assert clock.slept == []
+    bucket.acquire()
+    assert clock.slept == [0.1]
+
+
+def test_token_bucket_with_no_rate_is_unlimited():
+    sleep = MagicMock()
+    bucket = TokenBucket(rate=0, sleep=sleep)
+    for _ in range(1000):
+        bucket.acquire()
+    sleep.assert_not_called()
+
+
+@pytest.mark.parametrize("operations", [None, [], {"action": "get"}, "get"])
+def test_bulk_users_requires_a_list_of_operations(operations):
+    assert bulk_users(operations)["statusCode"] == 400
+
+
+def test_bulk_users_caps_the_batch_size():
+    with patch("index.BULK_MAX_OPERATIONS", 2):
+        response = bulk_users([{"action": "get", "email": "a@b.c"}] * 3)
+
+    assert response["statusCode"] == 400
+    assert "At most 2 operations" in json.loads(response["body"])["message"]
+
+
+@pytest.mark.parametrize("operation, message", [
+    ("get", "Each operation must be an object."),
+    ({"action": "rename", "email": "a@b.c"}, "Unknown action"),
+    ({"action": "get"}, "Email is required"),
+    ({"action": "update", "email": "a@b.c"}, "Attribute updates are required"),
+])
+def test_invalid_operations_fail_alone_without_calling_cognito(operation, message):
+    with patch("index.get_cognito_client") as mock_client:
+        result = run_bulk_operation(3, operation)
+
+    assert result["index"] == 3 and result["status"] == 400
+    assert result["message"].startswith(message)
+    mock_client.assert_not_called()
+
+
+def test_every_cognito_call_takes_a_token_from_its_quota():
+    limits = {"read": MagicMock(), "write": MagicMock()}
+    ok = index.cors_response(200, {"message": "ok"})
+    with patch.dict("index.bulk_rate_limits", limits), patch("index.get_user", return_value=ok), \
+            patch("index.update_user", return_value=ok), patch("index.delete_user", return_value=ok):
+        run_bulk_operations([
+            {"action": "get", "email": "a@b.c"},
+            {"action": "update", "email": "a@b.c", "attribute_updates": {"password": "x", "custom:firstName": "A"}},
+            {"action": "delete", "email": "a@b.c"},
+        ])
+
+    limits["read"].acquire.assert_called_once_with(1)
+    assert sorted(call.args for call in limits["write"].acquire.call_args_list) == [(1,), (2,)]
+
+
+def test_operations_run_concurrently_up_to_the_worker_limit():
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def slow_get_user(email):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return index.cors_response(200, {"message": email})
+
+    with patch("index.get_user", side_effect=slow_get_user):
+        results = run_bulk_operations([{"action": "get", "email": f"u{n}@b.c"} for n in range(12)], max_workers=3)
+
+    assert peak[0] == 3
+    assert [result["message"] for result in results] == [f"u{n}@b.c" for n in range(12)]
+
+
+def test_workers_share_the_invocation_metrics():
+    metrics = index.InvocationMetrics("POST /admin/users/batch")
+
+    def get_user(email):
+        index.record_cache_lookup("user", False)
+        return index.cors_response(200, {})
+
+    index.metrics_state.current = metrics
+    try:
+        with patch("index.get_user", side_effect=get_user):
+            run_bulk_operations([{"action": "get", "email": "a@b.c"}] * 2, max_workers=2)
+    finally:
+        index.metrics_state.current = None
+
+    assert metrics.caches == {"user": False}
+
+
+def test_admins_run_a_mixed_batch(pool):
+    admin = pool.token("admin@example.com", **{"cognito:groups": ["admin"]})
+    operations = [
+        {"action": "get", "email": "ana@example.com"},
+        {"action": "update", "email": "bo@example.com", "attribute_updates": {"custom:firstName": "Bob"}},
+        {"action": "confirm", "email": "cy@example.com"},
+        {"action": "delete", "email": "ana@example.com"},
+        {"action": "get", "email": "nobody@example.com"},
+    ]
+
+    response = index.lambda_handler(batch_event(operations, admin), None)
+
+    body = json.loads(response["body"])
+    assert response["statusCode"] == 200
+    assert (body["succeeded"], body["failed"]) == (4, 1)
+    assert [(result["index"], result["action"], result["status"]) for result in body["results"]] == [
+        (0, "get", 200), (1, "update", 200), (2, "confirm", 200), (3, "delete", 200), (4, "get", 404),
+    ]
+    assert pool.users["bo@example.com"].attributes["custom:firstName"] == "Bob"
+    assert pool.users["cy@example.com"].status == "CONFIRMED"
+    assert "ana@example.com" not in pool.users
+
+
+@pytest.mark.parametrize("user_routes_require_auth", [True, False])
+@pytest.mark.parametrize("claims, expected_status", [(None, 401), ({}, 403), ({"cognito:groups": ["members"]}, 403)])
+def test_only_admins_may_run_batches(pool, claims, expected_status, user_routes_require_auth):
+    token = pool.token("ana@example.com", **claims) if claims is not None else None
+
+    # Relaxing the per-user routes never opens the admin route.
+    with patch("index.USER_ROUTES_REQUIRE_AUTH", user_routes_require_auth):
+        response = index.lambda_handler(batch_event([{"action": "delete", "email": "bo@example.com"}], token), None)
+
+    assert response["statusCode"] == expected_status
+    assert "bo@example.com" in pool.users
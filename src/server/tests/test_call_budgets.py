@@ -0,0 +1,99 @@
+import os
+import sys
+import pytest
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import index
+
+SSM_LOAD = {"ssm.GetParametersByPath": 1}
+PAYPAL_TOKEN = {"paypal.POST /v1/oauth2/token": 1}
+# Bearer tokens are verified locally; only a cold call downloads the user pool's signing keys.
+JWKS_LOAD = {"cognito-idp.GetJWKS": 1}
+
+# The most downstream calls each route may make: (cold, warm). A cold call starts with every
+# cache empty; a warm call repeats the same request. Raising a budget should be a deliberate,
+# reviewed change, not a side effect.
+BUDGETS = {
+    "POST /signup": ({**SSM_LOAD, "cognito-idp.SignUp": 1}, {"cognito-idp.SignUp": 1}),
+    "POST /confirm": ({**SSM_LOAD, "cognito-idp.AdminConfirmSignUp": 1}, {"cognito-idp.AdminConfirmSignUp": 1}),
+    # The access-token routes need no configuration values, so not even a cold call reads SSM.
+    "POST /confirm-email": ({"cognito-idp.VerifyUserAttribute": 1}, {"cognito-idp.VerifyUserAttribute": 1}),
+    "POST /confirm-email-resend": (
+        {"cognito-idp.GetUserAttributeVerificationCode": 1}, {"cognito-idp.GetUserAttributeVerificationCode": 1}),
+    # The ID token's claims are verified against the JWKS before they become the profile.
+    "POST /login": ({**SSM_LOAD, **JWKS_LOAD, "cognito-idp.InitiateAuth": 1}, {"cognito-idp.InitiateAuth": 1}),
+    "POST /token/refresh": ({**SSM_LOAD, **JWKS_LOAD, "cognito-idp.InitiateAuth": 1}, {"cognito-idp.InitiateAuth": 1}),
+    "POST /forgot-password": ({**SSM_LOAD, "cognito-idp.ForgotPassword": 1}, {"cognito-idp.ForgotPassword": 1}),
+    "POST /confirm-forgot-password": (
+        {**SSM_LOAD, "cognito-idp.ConfirmForgotPassword": 1}, {"cognito-idp.ConfirmForgotPassword": 1}),
+    # A repeated profile read is answered from the user cache.
+    "GET /user": ({**SSM_LOAD, **JWKS_LOAD, "cognito-idp.AdminGetUser": 1}, {}),
+    "PATCH /user": (
+        {**SSM_LOAD, **JWKS_LOAD, "cognito-idp.AdminUpdateUserAttributes": 1},
+        {"cognito-idp.AdminUpdateUserAttributes": 1},
+    ),
+    "DELETE /user": ({**SSM_LOAD, **JWKS_LOAD, "cognito-idp.AdminDeleteUser": 1}, {"cognito-idp.AdminDeleteUser": 1}),
+    # One Cognito call per operation, run concurrently under the bulk rate limits.
+    "POST /admin/users/batch": (
+        {**SSM_LOAD, **JWKS_LOAD, "cognito-idp.AdminUpdateUserAttributes": 4},
+        {"cognito-idp.AdminUpdateUserAttributes": 4},
+    ),
+    "POST /contact-us": ({**SSM_LOAD, "ses.SendEmail": 1}, {"ses.SendEmail": 1}),
+    "POST /create-paypal-order": (
+        {**SSM_LOAD, **PAYPAL_TOKEN, "paypal.POST /v2/checkout/orders": 1},
+        {"paypal.POST /v2/checkout/orders": 1},
+    ),
+    "POST /create-paypal-subscription": (
+        {
+            **SSM_LOAD, **PAYPAL_TOKEN,
+            "paypal.POST /v1/catalogs/products": 1,
+            "paypal.POST /v1/billing/plans": 1,
+            "paypal.POST /v1/billing/subscriptions": 1,
+        },
+        {"paypal.POST /v1/billing/subscriptions": 1},
+    ),
+}
+
+
+def over_budget(calls, budget):
+    """Return {operation: (calls, allowed)} for every operation called more often than allowed."""
+    return {
+        operation: (count, budget.get(operation, 0))
+        for operation, count in sorted(calls.items()) if count > budget.get(operation, 0)
+    }
+
+
+def test_every_route_declares_a_budget():
+    assert {f"{method} {path}" for path, method in index.ROUTES} == set(BUDGETS)
+
+
+@pytest.mark.parametrize("route", sorted(BUDGETS))
+def test_route_stays_within_its_call_budget(downstream_calls, route):
+    cold_budget, warm_budget = BUDGETS[route]
+
+    cold_calls, warm_calls = downstream_calls(route)
+
+    assert over_budget(cold_calls, cold_budget) == {}, f"cold {route}"
+    assert over_budget(warm_calls, warm_budget) == {}, f"warm {route}"
+
+
+def test_an_extra_round_trip_breaks_the_budget(downstream_calls):
+    # With a margin longer than the token lifetime the PayPal token is never cached.
+    with patch("index.PAYPAL_TOKEN_EXPIRY_MARGIN_SECONDS", 10 ** 9):
+        _, warm_calls = downstream_calls("POST /create-paypal-order")
+
+    assert over_budget(warm_calls, BUDGETS["POST /create-paypal-order"][1]) == {
+        "paypal.POST /v1/oauth2/token": (1, 0),
+    }
+
+
+@pytest.mark.parametrize("calls, budget, expected", [
+    ({"ses.SendEmail": 1}, {"ses.SendEmail": 1}, {}),
+    ({}, {"ses.SendEmail": 1}, {}),
+    ({"ses.SendEmail": 2}, {"ses.SendEmail": 1}, {"ses.SendEmail": (2, 1)}),
+    ({"ssm.GetParameter": 1}, {"ses.SendEmail": 1}, {"ssm.GetParameter": (1, 0)}),
+])
+def test_over_budget(calls, budget, expected):
+    assert over_budget(calls, budget) == expected
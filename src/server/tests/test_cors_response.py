@@ -0,0 +1,128 @@
+import os
+import sys
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import index
+from index import CORS_HEADERS, cors_response, dumps_json, lambda_handler
+
+
+def test_cors_response_shape():
+    response = cors_response(201, {"order": {"id": "ORDER-1"}})
+
+    assert response["statusCode"] == 201
+    assert response["headers"]["Access-Control-Allow-Origin"] == "*"
+    assert json.loads(response["body"]) == {"order": {"id": "ORDER-1"}}
+
+
+@pytest.mark.parametrize("respond", [
+    lambda: cors_response(200, {}),
+    index.preflight_response,
+    index.not_found_response,
+])
+def test_added_headers_do_not_leak_into_later_responses(respond):
+    first = respond()
+    first["headers"]["Idempotent-Replayed"] = "true"
+
+    second = respond()
+
+    assert "Idempotent-Replayed" not in second["headers"]
+    assert "Idempotent-Replayed" not in CORS_HEADERS
+    assert second["headers"] == CORS_HEADERS
+
+
+@pytest.mark.parametrize(
+    "method, path, expected_status, expected_body",
+    [
+        ("OPTIONS", "/login", 200, {"message": "CORS preflight successful"}),
+        ("GET", "/does-not-exist", 404, {"message": "Resource not found"}),
+    ]
+)
+def test_static_responses_are_serialized_once(method, path, expected_status, expected_body):
+    event = {"httpMethod": method, "path": path}
+
+    with patch("index.dumps_json") as mock_dumps:
+        first = lambda_handler(event, None)
+        second = lambda_handler(event, None)
+
+    mock_dumps.assert_not_called()
+    assert first["statusCode"] == expected_status
+    assert json.loads(first["body"]) == expected_body
+    assert first["body"] is second["body"]
+    # Each call still gets its own response dict.
+    assert first is not second
+
+
+def test_dumps_json_uses_orjson_when_available():
+    fake_orjson = MagicMock()
+    fake_orjson.dumps.return_value = b'{"message":"ok"}'
+
+    with patch("index.orjson", fake_orjson):
+        assert dumps_json({"message": "ok"}) == '{"message":"ok"}'
+
+
+def test_dumps_json_falls_back_to_stdlib():
+    fake_orjson = MagicMock()
+    fake_orjson.dumps.side_effect = TypeError("Dict key must be str")
+
+    with patch("index.orjson", fake_orjson):
+        assert json.loads(dumps_json({1: "one"})) == {"1": "one"}
+    with patch("index.orjson", None):
+        assert json.loads(dumps_json({"message": "ok"})) == {"message": "ok"}
+
+
+def test_server_timing_is_off_by_default():
+    index.metrics_state.current = index.InvocationMetrics("POST /login")
+    try:
+        response = cors_response(200, {"message": "ok"})
+    finally:
+        index.metrics_state.current = None
+
+    assert "Server-Timing" not in response["headers"]
+
+
+def test_server_timing_lists_downstream_calls_and_cache_flags():
+    metrics = index.InvocationMetrics("POST /create-paypal-subscription")
+    metrics.record("paypal.CreatePlan", 30.04)
+    metrics.record("paypal.CreatePlan", 12.5)
+    metrics.record("paypal./v1/custom path", 1.0)
+    metrics.record_cache("paypal_token", True)
+    metrics.record_cache("paypal_catalog", False)
+
+    with patch("index.SERVER_TIMING_ENABLED", True):
+        index.metrics_state.current = metrics
+        try:
+            response = cors_response(200, {"message": "ok"})
+        finally:
+            index.metrics_state.current = None
+
+    entries = response["headers"]["Server-Timing"].split(", ")
+    assert entries[:5] == [
+        "paypal.CreatePlan;dur=30.0",
+        "paypal.CreatePlan;dur=12.5",
+        "paypal.-v1-custom-path;dur=1.0",
+        "cache-paypal_token;desc=hit",
+        "cache-paypal_catalog;desc=miss",
+    ]
+    assert entries[5].startswith("total;dur=")
+    assert response["headers"]["Timing-Allow-Origin"] == "*"
+    # The shared headers are copied, never mutated.
+    assert "Server-Timing" not in index.CORS_HEADERS
+
+
+def test_server_timing_without_emf_metrics(metrics_records):
+    mock_ssm = MagicMock()
+    mock_ssm.get_parameter.return_value = {"Parameter": {"Value": "value"}}
+    mock_client = MagicMock()
+    mock_client.admin_get_user.return_value = {"Username": "a@b.c", "UserAttributes": []}
+    event = {"httpMethod": "GET", "path": "/user", "queryStringParameters": {"email": "a@b.c"}}
+
+    with patch("index.SERVER_TIMING_ENABLED", True), patch("index.METRICS_ENABLED", False), \
+            patch("index.USER_ROUTES_REQUIRE_AUTH", False), patch("index.ssm", mock_ssm), patch("index.client", mock_client):
+        response = lambda_handler(event, None)
+
+    assert "cache-ssm;desc=miss" in response["headers"]["Server-Timing"]
+    assert metrics_records == []
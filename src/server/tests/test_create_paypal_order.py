@@ -84,7 +84,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
     ]
 )
 @patch("index.get_paypal_access_token")
-@patch("index.requests.post")  # Adjust "index" to your actual module name
+@patch("index.paypal_session.post")  # Adjust "index" to your actual module name
 def test_create_paypal_order(
     mock_post,
     mock_get_token,
@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from index import create_paypal_session
+
+
+class CountingHandler(BaseHTTPRequestHandler):
+    """Answers every POST with 201 and records the client port of each connection."""
+    protocol_version = "HTTP/1.1"
+    status_codes = []
+
+    def do_POST(self):
+        self.server.connections.add(self.client_address)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        status = self.status_codes.pop(0) if self.status_codes else 201
+        body = json.dumps({"id": "OK"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def paypal_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CountingHandler)
+    server.connections = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    CountingHandler.status_codes = []
+
+
+def test_paypal_session_reuses_connection(paypal_server):
+    session = create_paypal_session(pool_size=2, retries=0)
+    url = f"http://127.0.0.1:{paypal_server.server_address[1]}/v1/catalogs/products"
+
+    for _ in range(3):
+        assert session.post(url, json={"name": "Donation Product"}, timeout=5).status_code == 201
+
+    # Three PayPal hops, one TCP connection.
+    assert len(paypal_server.connections) == 1
+
+
+def test_paypal_session_retries_429(paypal_server):
+    CountingHandler.status_codes = [429, 201]
+    session = create_paypal_session(retries=2, backoff=0)
+    url = f"http://127.0.0.1:{paypal_server.server_address[1]}/v2/checkout/orders"
+
+    assert session.post(url, json={}, timeout=5).status_code == 201
+
+
+def test_paypal_session_does_not_retry_server_errors(paypal_server):
+    CountingHandler.status_codes = [500, 201]
+    session = create_paypal_session(retries=2, backoff=0)
+    url = f"http://127.0.0.1:{paypal_server.server_address[1]}/v2/checkout/orders"
+
+    # A 5xx may mean the order was created; it is surfaced instead of replayed.
+    assert session.post(url, json={}, timeout=5).status_code == 500
+
+
+def test_paypal_session_pool_size():
+    session = create_paypal_session(pool_size=7)
+    adapter = session.get_adapter("https://api-m.paypal.com")
+
+    assert adapter._pool_connections == 7
+    assert adapter._pool_maxsize == 7
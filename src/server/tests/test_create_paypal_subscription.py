@@ -122,7 +122,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
     ]
 )
 @patch("index.get_paypal_access_token", autospec=True)
-@patch("index.requests.post", autospec=True)
+@patch("index.paypal_session.post", autospec=True)
 def test_create_paypal_subscription(
     mock_post,
     mock_get_token,
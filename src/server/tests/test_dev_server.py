@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import threading
+import http.client
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools.dev_server import ContainerPool, DevServer
+
+
+def request(server, method, path, body=None):
+    host, port = server.httpd.server_address[:2]
+    connection = http.client.HTTPConnection(host, port, timeout=30)
+    try:
+        connection.request(method, path, body=json.dumps(body) if body is not None else None)
+        response = connection.getresponse()
+        return response.status, dict(response.getheaders()), json.loads(response.read())
+    finally:
+        connection.close()
+
+
+class FakeContainer:
+    def __init__(self):
+        self.invocations = 0
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+
+@pytest.mark.parametrize("mode", ["thread", "process"])
+def test_requests_become_lambda_events(mode):
+    with DevServer(port=0, workers=1, mode=mode) as server:
+        cold_status, cold_headers, cold_body = request(server, "OPTIONS", "/login")
+        warm_status, warm_headers, warm_body = request(server, "GET", "/does-not-exist?x=1")
+
+    assert cold_status == 200
+    assert cold_body == {"message": "CORS preflight successful"}
+    assert cold_headers["Access-Control-Allow-Origin"] == "*"
+    assert cold_headers["X-Cold-Start"] == "true"
+    assert float(cold_headers["X-Init-Duration-Ms"]) >= 0
+
+    assert warm_status == 404
+    assert warm_body == {"message": "Resource not found"}
+    assert warm_headers["X-Cold-Start"] == "false"
+    assert warm_headers["X-Container-Id"] == cold_headers["X-Container-Id"]
+
+
+def test_pool_reuses_the_most_recently_used_container():
+    pool = ContainerPool(FakeContainer, max_containers=2)
+    first, first_cold = pool.acquire()
+    second, second_cold = pool.acquire()
+    pool.release(first)
+    pool.release(second)
+
+    again, cold = pool.acquire()
+
+    assert first_cold and second_cold and not cold
+    assert again is second
+    assert pool.cold_starts == 2
+
+
+def test_pool_blocks_when_every_container_is_busy():
+    pool = ContainerPool(FakeContainer, max_containers=1)
+    container, _ = pool.acquire()
+    acquired = []
+
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    waiter.join(timeout=0.2)
+    assert waiter.is_alive()
+
+    pool.release(container)
+    waiter.join(timeout=5)
+    assert acquired == [(container, False)]
+
+
+def test_pool_recycles_after_max_invocations_and_idle_timeout():
+    pool = ContainerPool(FakeContainer, max_containers=1, idle_timeout=0.0, max_invocations=2)
+    container, _ = pool.acquire()
+    pool.release(container)
+    replacement, cold = pool.acquire()
+    assert cold and replacement is not container  # idle_timeout=0 recycles it at once
+    assert container.stopped
+
+    pool.idle_timeout = 300.0
+    pool.release(replacement)
+    same, cold = pool.acquire()
+    assert same is replacement and not cold
+    pool.release(same)
+    assert replacement.stopped and pool.idle == []  # retired after its second invocation
+
+
+def test_a_dead_container_gets_a_502_and_is_retired():
+    with DevServer(port=0, workers=1, mode="process") as server:
+        status, headers, _ = request(server, "OPTIONS", "/login")
+        dead = server.pool.idle[-1]
+        dead.process.kill()
+        dead.process.join(timeout=5)
+
+        failed_status, failed_headers, failed_body = request(server, "OPTIONS", "/login")
+        next_status, next_headers, _ = request(server, "OPTIONS", "/login")
+
+    assert failed_status == 502 and failed_headers["X-Container-Id"] == str(dead.id)
+    assert "Container failed" in failed_body["message"]
+    assert next_status == 200
+    assert next_headers["X-Cold-Start"] == "true" and next_headers["X-Container-Id"] != str(dead.id)
+
+
+def test_pool_discard_frees_the_slot_without_reusing_the_container():
+    pool = ContainerPool(FakeContainer, max_containers=1)
+    container, _ = pool.acquire()
+    pool.discard(container)
+
+    replacement, cold = pool.acquire()
+    assert container.stopped and cold and replacement is not container
@@ -0,0 +1,77 @@
+import os
+import sys
+import pytest
+import requests
+from unittest.mock import patch
+from botocore.exceptions import ClientError
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from index import CREATE_PAYPAL_ORDER_ROUTE_ERRORS, ErrorMap, PAYPAL_REQUEST_ERRORS, UPDATE_USER_ERRORS
+
+
+def modeled_error(name, message="Service message"):
+    """Build an exception shaped like a botocore modeled exception (a ClientError subclass)."""
+    error_class = type(name, (ClientError,), {})
+    return error_class({"Error": {"Code": name, "Message": message}}, "Operation")
+
+
+@pytest.mark.parametrize(
+    "error, expected",
+    [
+        (modeled_error("UserNotFoundException"), (404, "No user was found with the provided email address.")),
+        (modeled_error("InvalidPasswordException", "Too short"),
+         (400, "Invalid password: Too short. Please verify your input and try again.")),
+        (modeled_error("InternalErrorException"), None),
+        (ValueError("boom"), None),
+    ]
+)
+def test_cognito_errors_resolve_by_name(error, expected):
+    assert UPDATE_USER_ERRORS.resolve(error) == expected
+
+
+@pytest.mark.parametrize(
+    "error, expected_status",
+    [
+        (requests.exceptions.ReadTimeout(), 504),
+        (requests.exceptions.ConnectTimeout(), 504),
+        (requests.exceptions.ConnectionError(), 503),
+        (requests.exceptions.HTTPError(), 500),
+        (ValueError(), None),
+    ]
+)
+def test_paypal_request_errors_resolve_most_specific_class(error, expected_status):
+    matched = PAYPAL_REQUEST_ERRORS.resolve(error)
+    assert (matched[0] if matched else None) == expected_status
+
+
+@pytest.mark.parametrize(
+    "error, expected_status",
+    [
+        (requests.exceptions.JSONDecodeError("Expecting value", "<html>", 0), 400),
+        (ValueError("The amount must be greater than zero."), 400),
+        (requests.exceptions.ConnectionError(), 503),
+    ]
+)
+def test_create_paypal_order_route_errors(error, expected_status):
+    # JSONDecodeError is both a RequestException and a ValueError; it keeps its ValueError status.
+    assert CREATE_PAYPAL_ORDER_ROUTE_ERRORS.resolve(error)[0] == expected_status
+
+
+def test_dynamic_message_uses_service_message_or_exception_text():
+    errors = ErrorMap({"NotAuthorizedException": (403, None), ValueError: (400, None)})
+
+    assert errors.resolve(modeled_error("NotAuthorizedException", "User is disabled.")) == (403, "User is disabled.")
+    assert errors.resolve(ValueError("Amount must be positive")) == (400, "Amount must be positive")
+
+
+def test_resolution_walks_the_mro_once_per_exception_type():
+    errors = ErrorMap({"TooManyRequestsException": (429, "Slow down")})
+    error_class = type("TooManyRequestsException", (ClientError,), {})
+
+    with patch.object(ErrorMap, "_lookup", wraps=errors._lookup) as mock_lookup:
+        for _ in range(100):
+            error = error_class({"Error": {"Code": "TooManyRequestsException", "Message": ""}}, "InitiateAuth")
+            assert errors.resolve(error) == (429, "Slow down")
+
+    assert mock_lookup.call_count == 1
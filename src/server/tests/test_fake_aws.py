@@ -0,0 +1,150 @@
+import os
+import sys
+import json
+import jwt
+import pytest
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import index
+from tools.auth_load import LOAD_ENVIRONMENT, run_load, seed_parameters
+from tools.fake_aws import FakeCognito, FakeSES, installed
+
+PASSWORD = "Str0ng!Passw0rd"
+
+
+@pytest.fixture
+def fakes():
+    cognito, ses = FakeCognito(), FakeSES()
+    with patch.dict(os.environ, {"ENVIRONMENT": LOAD_ENVIRONMENT}), installed(index, cognito=cognito, ses=ses):
+        seed_parameters(cognito)
+        yield cognito, ses
+
+
+def body(response):
+    return json.loads(response["body"])
+
+
+def test_fake_raises_the_real_modeled_exception_types():
+    cognito = FakeCognito()
+    with pytest.raises(cognito.exceptions.UserNotFoundException) as raised:
+        cognito.admin_get_user(UserPoolId=cognito.user_pool_id, Username="nobody@example.com")
+
+    assert type(raised.value).__name__ == "UserNotFoundException"
+    assert raised.value.response["Error"] == {"Code": "UserNotFoundException", "Message": "User does not exist."}
+
+
+def test_sign_up_confirm_and_log_in(fakes):
+    cognito, _ = fakes
+
+    assert index.sign_up(PASSWORD, "ana@example.com", "Ana", "Lopez")["statusCode"] == 200
+    assert index.sign_up(PASSWORD, "ana@example.com", "Ana", "Lopez")["statusCode"] == 409
+    assert index.log_in("ana@example.com", PASSWORD)["statusCode"] == 500  # UserNotConfirmedException is unmapped
+    assert index.confirm_user("ana@example.com")["statusCode"] == 200
+
+    response = index.log_in("ana@example.com", PASSWORD)
+    claims = jwt.decode(body(response)["id_token"], options={"verify_signature": False})
+
+    assert response["statusCode"] == 200
+    assert body(response)["user_id"] == claims["sub"] == cognito.users["ana@example.com"].sub
+    assert claims["token_use"] == "id" and claims["custom:firstName"] == "Ana"
+    assert index.log_in("ana@example.com", "Wrong!Passw0rd")["statusCode"] == 401
+    assert index.log_in("bob@example.com", PASSWORD)["statusCode"] == 404
+
+
+def test_sign_up_enforces_the_password_policy(fakes):
+    response = index.sign_up("short", "ana@example.com", "Ana", "Lopez")
+
+    assert response["statusCode"] == 400
+    assert "Password did not conform with policy" in body(response)["message"]
+
+
+def test_email_verification_with_access_token(fakes):
+    cognito, _ = fakes
+    cognito.add_user("ana@example.com", PASSWORD, confirmed=True)
+    access_token = body(index.log_in("ana@example.com", PASSWORD))["access_token"]
+
+    assert index.confirm_email_resend(access_token)["statusCode"] == 200
+    assert index.confirm_email(access_token, "000000x")["statusCode"] == 400
+    code = cognito.last_code("ana@example.com", "verify_email")
+    assert index.confirm_email(access_token, code)["statusCode"] == 200
+    assert index.confirm_email("not-a-token", code)["statusCode"] == 403
+
+
+def test_password_reset_and_profile_updates(fakes):
+    cognito, _ = fakes
+    cognito.add_user("ana@example.com", PASSWORD, **{"custom:firstName": "Ana"})
+
+    assert index.forgot_password("ana@example.com")["statusCode"] == 200
+    assert index.confirm_forgot_password("ana@example.com", "999999x", "N3w!Passw0rd")["statusCode"] == 400
+    code = cognito.last_code("ana@example.com", "forgot_password")
+    assert index.confirm_forgot_password("ana@example.com", code, "N3w!Passw0rd")["statusCode"] == 200
+    assert index.log_in("ana@example.com", "N3w!Passw0rd")["statusCode"] == 200
+
+    assert index.update_user("ana@example.com", {"custom:firstName": "Anna"})["statusCode"] == 200
+    assert index.update_user("ana@example.com", {"custom:shoeSize": "9"})["statusCode"] == 400
+    assert body(index.get_user("ana@example.com"))["user_attributes"]["custom:firstName"] == "Anna"
+    assert index.delete_user("ana@example.com")["statusCode"] == 200
+    assert index.get_user("ana@example.com")["statusCode"] == 404
+
+
+def test_contact_us_requires_verified_identities(fakes):
+    _, ses = fakes
+
+    assert index.contact_us("Ana", "ana@example.com", "Hello")["statusCode"] == 200
+    assert ses.sent[0]["Destination"] == {"ToAddresses": ["office@example.com"]}
+
+    ses.verified_identities = {"office@example.com"}
+    assert index.contact_us("Ana", "ana@example.com", "Hello")["statusCode"] == 400
+
+
+def test_throttling_raises_too_many_requests(fakes):
+    cognito, _ = fakes
+    cognito.throttle_rate = 1.0
+
+    assert index.sign_up(PASSWORD, "ana@example.com", "Ana", "Lopez")["statusCode"] == 429
+    assert cognito.throttled["SignUp"] == 1
+
+
+def test_rate_limit_uses_a_token_bucket():
+    cognito = FakeCognito(max_rps=2)
+    cognito.add_user("ana@example.com", PASSWORD)
+    get = lambda: cognito.admin_get_user(UserPoolId=cognito.user_pool_id, Username="ana@example.com")
+
+    get()
+    get()
+    with pytest.raises(cognito.exceptions.TooManyRequestsException):
+        get()
+
+
+def test_refresh_token_flow():
+    cognito = FakeCognito()
+    cognito.add_user("ana@example.com", PASSWORD)
+    tokens = cognito.initiate_auth(ClientId=cognito.client_id, AuthFlow="USER_PASSWORD_AUTH",
+                                   AuthParameters={"USERNAME": "ana@example.com", "PASSWORD": PASSWORD})
+    refreshed = cognito.initiate_auth(ClientId=cognito.client_id, AuthFlow="REFRESH_TOKEN_AUTH",
+                                      AuthParameters={"REFRESH_TOKEN": tokens["AuthenticationResult"]["RefreshToken"]})
+
+    assert "RefreshToken" not in refreshed["AuthenticationResult"]
+    assert cognito.get_user(AccessToken=refreshed["AuthenticationResult"]["AccessToken"])["Username"] == "ana@example.com"
+    with pytest.raises(cognito.exceptions.NotAuthorizedException):
+        cognito.initiate_auth(ClientId=cognito.client_id, AuthFlow="REFRESH_TOKEN_AUTH",
+                              AuthParameters={"REFRESH_TOKEN": "bogus"})
+
+
+def test_installed_restores_the_real_clients():
+    sentinel = object()
+    with patch("index.client", sentinel):
+        with installed(index, cognito=FakeCognito()):
+            assert isinstance(index.get_cognito_client(), FakeCognito)
+        assert index.client is sentinel
+
+
+def test_load_run_completes_every_journey():
+    results = run_load(users=20, threads=4)
+
+    assert results["requests"] == 20 * 12
+    for route, stats in results["routes"].items():
+        assert stats["status_codes"] == {"200": stats["requests"]}, route
+    assert results["emails_sent"] == 20
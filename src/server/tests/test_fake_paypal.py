@@ -0,0 +1,116 @@
+import os
+import sys
+import random
+import pytest
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tools.fake_paypal import Faults, FakePayPalServer, Latency
+
+
+def get_token(server):
+    response = requests.post(server.env()["PAYPAL_AUTH_TOKEN_LINK"], auth=("id", "secret"),
+                             data={"grant_type": "client_credentials"}, timeout=5)
+    return response
+
+
+def create_order(server, token):
+    return requests.post(server.env()["PAYPAL_CHECKOUT_ORDER_LINK"], json={"intent": "CAPTURE"},
+                         headers={"Authorization": f"Bearer {token}"}, timeout=5)
+
+
+@pytest.mark.parametrize(
+    "spec, expected",
+    [
+        ("50", "constant:50"),
+        (0.02, "constant:20"),
+        ("uniform:20:80", "uniform:20:80"),
+        ("lognormal:40:0.5", "lognormal:40:0.5"),
+        (None, "constant:0"),
+    ]
+)
+def test_latency_parse(spec, expected):
+    assert repr(Latency.parse(spec)) == expected
+
+
+@pytest.mark.parametrize("spec", ["uniform:20", "gamma:1:2", "constant:1:2"])
+def test_latency_parse_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        Latency.parse(spec)
+
+
+def test_latency_samples_stay_in_range_and_are_seconds():
+    rng = random.Random(1)
+    samples = [Latency.parse("uniform:20:80").sample(rng) for _ in range(200)]
+    assert all(0.020 <= sample <= 0.080 for sample in samples)
+    assert Latency.parse("normal:1:50").sample(rng) >= 0
+
+
+def test_fault_rates_are_honoured():
+    rng = random.Random(3)
+    faults = Faults(error_rate=0.1, throttle_rate=0.2, timeout_rate=0.05)
+    picks = [faults.pick(rng) for _ in range(10000)]
+    assert picks.count("error") == pytest.approx(1000, rel=0.15)
+    assert picks.count("throttle") == pytest.approx(2000, rel=0.15)
+    assert picks.count("timeout") == pytest.approx(500, rel=0.2)
+
+
+def test_fault_rates_must_not_exceed_one():
+    with pytest.raises(ValueError):
+        Faults(error_rate=0.6, throttle_rate=0.5)
+
+
+def test_faults_parse():
+    faults = Faults.parse("error_rate=0.2,retry_after=1")
+    assert (faults.error_rate, faults.throttle_rate, faults.retry_after) == (0.2, 0.0, 1.0)
+
+
+def test_healthy_responses_have_paypal_shapes():
+    with FakePayPalServer() as server:
+        token = get_token(server).json()["access_token"]
+        order = create_order(server, token)
+
+    assert order.status_code == 201
+    assert order.json()["id"]
+    assert any(link["rel"] == "approve" for link in order.json()["links"])
+    assert server.calls["POST /v2/checkout/orders"] == 1
+
+
+def test_injected_throttling_and_errors():
+    with FakePayPalServer(faults=Faults(throttle_rate=1.0, retry_after=2)) as server:
+        throttled = get_token(server)
+        server.faults = Faults(error_rate=1.0)
+        failed = get_token(server)
+
+    assert throttled.status_code == 429
+    assert throttled.json()["name"] == "RATE_LIMIT_REACHED"
+    assert throttled.headers["Retry-After"] == "2"
+    assert failed.status_code == 500
+    assert failed.json()["name"] == "INTERNAL_SERVER_ERROR"
+    assert server.calls["POST /v1/oauth2/token 429"] == 1
+    assert server.calls["POST /v1/oauth2/token 500"] == 1
+
+
+def test_injected_timeout_exceeds_the_client_timeout():
+    endpoint_faults = {"/v2/checkout/orders": Faults(timeout_rate=1.0, hang_seconds=1.0)}
+    with FakePayPalServer(endpoint_faults=endpoint_faults) as server:
+        token = get_token(server).json()["access_token"]
+        with pytest.raises(requests.exceptions.Timeout):
+            requests.post(server.env()["PAYPAL_CHECKOUT_ORDER_LINK"], json={},
+                          headers={"Authorization": f"Bearer {token}"}, timeout=0.2)
+
+    assert server.calls["POST /v2/checkout/orders timeout"] == 1
+
+
+def test_repeated_paypal_request_id_gets_the_first_order_back():
+    with FakePayPalServer() as server:
+        token = get_token(server).json()["access_token"]
+        url, auth = server.env()["PAYPAL_CHECKOUT_ORDER_LINK"], {"Authorization": f"Bearer {token}"}
+
+        first = requests.post(url, json={"intent": "CAPTURE"}, headers=dict(auth, **{"PayPal-Request-Id": "r-1"}), timeout=5)
+        again = requests.post(url, json={"intent": "CAPTURE"}, headers=dict(auth, **{"PayPal-Request-Id": "r-1"}), timeout=5)
+        other = requests.post(url, json={"intent": "CAPTURE"}, headers=dict(auth, **{"PayPal-Request-Id": "r-2"}), timeout=5)
+
+    assert (first.status_code, again.status_code, other.status_code) == (201, 200, 201)
+    assert first.json()["id"] == again.json()["id"] != other.json()["id"]
@@ -69,9 +69,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 )
 @patch("index.get_paypal_client_id", return_value="test-client-id")
 @patch("index.get_paypal_secret", return_value="test-secret")
-@patch("index.requests.post")  # Adjust "index" to the actual module where your function is defined
+@patch("index.paypal_session.post")  # Adjust "index" to the actual module where your function is defined
 def test_get_paypal_access_token(
-    mock_post,       # the requests.post patch
+    mock_post,       # the paypal_session.post patch
     mock_secret,     # the get_paypal_secret patch
     mock_client_id,  # the get_paypal_client_id patch
     status_code,
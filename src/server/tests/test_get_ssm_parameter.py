@@ -0,0 +1,245 @@
+import os
+import sys
+import time
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+from botocore.exceptions import ClientError
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from conftest import FakeClock
+from index import ParameterCache, get_ssm_parameter
+
+
+def throttling_error():
+    return ClientError({"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}}, "GetParameter")
+
+
+@patch("index.ssm")
+def test_get_ssm_parameter_warm_reads_skip_ssm(mock_ssm):
+    mock_ssm.get_parameter.return_value = {"Parameter": {"Value": "fake_user_pool_id"}}
+
+    assert get_ssm_parameter("/rcw-client-backend-dev/COGNITO_USER_POOL_ID") == "fake_user_pool_id"
+    assert get_ssm_parameter("/rcw-client-backend-dev/COGNITO_USER_POOL_ID") == "fake_user_pool_id"
+
+    mock_ssm.get_parameter.assert_called_once_with(
+        Name="/rcw-client-backend-dev/COGNITO_USER_POOL_ID", WithDecryption=True
+    )
+
+
+@pytest.mark.parametrize(
+    "elapsed, expected_value, expected_loads",
+    [
+        (10, "v1", 1),    # fresh => served from memory
+        (100, "v2", 2),   # expired => synchronous reload
+    ]
+)
+def test_parameter_cache_expiry(elapsed, expected_value, expected_loads):
+    clock = FakeClock(1000.0)
+    loader = MagicMock(side_effect=["v1", "v2"])
+    cache = ParameterCache(loader, ttl=60, refresh_ahead=0, clock=clock)
+
+    assert cache.get("name") == "v1"
+    clock.now += elapsed
+
+    assert cache.get("name") == expected_value
+    assert loader.call_count == expected_loads
+
+
+def test_parameter_cache_per_key_ttl():
+    clock = FakeClock(1000.0)
+    loader = MagicMock(side_effect=["short-1", "long-1", "short-2"])
+    cache = ParameterCache(loader, ttl=600, refresh_ahead=0, clock=clock)
+    cache.set_ttl("short", 5)
+
+    cache.get("short")
+    cache.get("long")
+    clock.now += 10
+
+    assert cache.get("short") == "short-2"
+    assert cache.get("long") == "long-1"
+
+
+def test_parameter_cache_refreshes_in_background_before_expiry():
+    clock = FakeClock(1000.0)
+    refreshed = threading.Event()
+
+    def loader(name):
+        if loader.calls:
+            refreshed.set()
+            return "v2"
+        loader.calls += 1
+        return "v1"
+    loader.calls = 0
+
+    cache = ParameterCache(loader, ttl=60, refresh_ahead=10, clock=clock)
+    assert cache.get("name") == "v1"
+
+    # Inside the refresh-ahead window the old value is returned immediately.
+    clock.now += 55
+    assert cache.get("name") == "v1"
+    assert refreshed.wait(timeout=2)
+
+    for _ in range(100):
+        if cache.get("name") == "v2":
+            break
+        refreshed.wait(timeout=0.01)
+    assert cache.get("name") == "v2"
+
+
+def test_parameter_cache_serves_stale_value_when_throttled():
+    clock = FakeClock(1000.0)
+    loader = MagicMock(side_effect=["v1", throttling_error(), "v2"])
+    cache = ParameterCache(loader, ttl=60, refresh_ahead=0, stale_retry=5, clock=clock)
+
+    cache.get("name")
+    clock.now += 61
+    assert cache.get("name") == "v1"
+
+    # The stale value is held for stale_retry seconds before SSM is tried again.
+    clock.now += 1
+    assert cache.get("name") == "v1"
+    assert loader.call_count == 2
+
+    clock.now += 5
+    assert cache.get("name") == "v2"
+
+
+def test_parameter_cache_backs_off_while_throttled():
+    clock = FakeClock(1000.0)
+    calls = []
+
+    def loader(name):
+        calls.append(clock.now)
+        if calls[1:]:
+            raise throttling_error()
+        return "v1"
+
+    # stale_retry is shorter than refresh_ahead, the default configuration.
+    cache = ParameterCache(loader, ttl=300, refresh_ahead=60, stale_retry=5, clock=clock)
+
+    def read_for_20_seconds():
+        for _ in range(200):
+            assert cache.get("name") == "v1"
+            # Let any background refresh finish before the next read.
+            for _ in range(1000):
+                if not cache._refreshing:
+                    break
+                time.sleep(0.001)
+            clock.now += 0.1
+
+    cache.get("name")
+    clock.now += 240  # Inside the refresh-ahead window.
+    read_for_20_seconds()
+    clock.now += 60  # Past expiry, served stale.
+    read_for_20_seconds()
+
+    # One attempt per stale_retry window at most, never one per read.
+    assert len(calls) <= 1 + 20 // 5 + 1 + 20 // 5 + 1
+
+
+def test_parameter_cache_raises_non_throttling_errors():
+    clock = FakeClock(1000.0)
+    loader = MagicMock(side_effect=["v1", ValueError("boom")])
+    cache = ParameterCache(loader, ttl=60, refresh_ahead=0, clock=clock)
+
+    cache.get("name")
+    clock.now += 61
+    with pytest.raises(ValueError):
+        cache.get("name")
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_parameter_cache_loads_once_for_concurrent_callers(warm):
+    clock = FakeClock(1000.0)
+    release = threading.Event()
+    calls = []
+
+    def loader(name):
+        calls.append(name)
+        if len(calls) > int(warm):
+            release.wait(timeout=5)
+        return f"v{len(calls)}"
+
+    cache = ParameterCache(loader, ttl=60, refresh_ahead=0, clock=clock)
+    if warm:
+        cache.get("name")
+        clock.now += 61  # Hard-expired: every caller needs a reload.
+
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(cache.get("name"))) for _ in range(8)]
+    for caller in callers:
+        caller.start()
+    time.sleep(0.1)  # Let every caller reach the cache while the first load is still running.
+    release.set()
+    for caller in callers:
+        caller.join(timeout=5)
+
+    expected = "v2" if warm else "v1"
+    assert results == [expected] * 8
+    assert len(calls) == 1 + int(warm)
+
+
+def namespace_pages(env):
+    prefix = f"/rcw-client-backend-{env}/"
+    return [
+        {"Parameters": [
+            {"Name": prefix + "COGNITO_USER_POOL_ID", "Value": "pool-id"},
+            {"Name": prefix + "COGNITO_CLIENT_ID", "Value": "client-id"},
+        ]},
+        {"Parameters": [
+            {"Name": prefix + "PAYPAL_CLIENT_ID", "Value": "paypal-id"},
+            {"Name": prefix + "PAYPAL_SECRET", "Value": "paypal-secret"},
+        ]},
+    ]
+
+
+@patch.dict(os.environ, {"ENVIRONMENT": "test"})
+@patch("index.ssm")
+def test_getters_share_one_namespace_load(mock_ssm):
+    mock_ssm.get_paginator.return_value.paginate.return_value = namespace_pages("test")
+
+    from index import get_user_pool_id, get_user_pool_client_id, get_paypal_client_id, get_paypal_secret
+
+    assert get_user_pool_id() == "pool-id"
+    assert get_user_pool_client_id() == "client-id"
+    assert get_paypal_client_id() == "paypal-id"
+    assert get_paypal_secret() == "paypal-secret"
+
+    mock_ssm.get_paginator.assert_called_once_with("get_parameters_by_path")
+    mock_ssm.get_paginator.return_value.paginate.assert_called_once_with(
+        Path="/rcw-client-backend-test/", Recursive=True, WithDecryption=True
+    )
+    mock_ssm.get_parameter.assert_not_called()
+
+
+@patch.dict(os.environ, {"ENVIRONMENT": "test"})
+@patch("index.ssm")
+def test_parameter_missing_from_namespace_falls_back_to_get_parameter(mock_ssm):
+    mock_ssm.get_paginator.return_value.paginate.return_value = namespace_pages("test")
+    mock_ssm.get_parameter.return_value = {"Parameter": {"Value": "sender@example.com"}}
+
+    from index import get_sender_email, get_user_pool_id
+
+    assert get_sender_email() == "sender@example.com"
+    # The namespace was loaded while resolving the sender email.
+    assert get_user_pool_id() == "pool-id"
+    mock_ssm.get_parameter.assert_called_once_with(
+        Name="/rcw-client-backend-test/SESIdentitySenderParameter", WithDecryption=True
+    )
+
+
+@patch.dict(os.environ, {"ENVIRONMENT": "test"})
+@patch("index.ssm")
+def test_failed_namespace_load_falls_back_to_get_parameter(mock_ssm):
+    mock_ssm.get_paginator.return_value.paginate.side_effect = ClientError(
+        {"Error": {"Code": "AccessDeniedException", "Message": "Not allowed"}}, "GetParametersByPath"
+    )
+    mock_ssm.get_parameter.return_value = {"Parameter": {"Value": "pool-id"}}
+
+    from index import get_user_pool_id
+
+    assert get_user_pool_id() == "pool-id"
+    assert get_user_pool_id() == "pool-id"
+    mock_ssm.get_parameter.assert_called_once()
@@ -0,0 +1,224 @@
+import os
+import sys
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import index
+from index import IdempotencyCache, SqliteIdempotencyStore, cors_response, lambda_handler
+
+
+def payment_event(path, body, key=None, header_name="Idempotency-Key"):
+    return {
+        "httpMethod": "POST",
+        "path": path,
+        "headers": {header_name: key} if key else {"Content-Type": "application/json"},
+        "body": json.dumps(body),
+    }
+
+
+ORDER = {"amount": 25, "custom_id": "donation-1"}
+SUBSCRIPTION = {"amount": 10, "custom_id": "weekly-1"}
+
+
+@pytest.fixture
+def order_route():
+    with patch("index.create_paypal_order_route") as mock_route:
+        mock_route.side_effect = lambda *args: cors_response(200, {"id": f"ORDER-{mock_route.call_count}"})
+        yield mock_route
+
+
+def test_without_a_key_every_request_reaches_paypal(order_route):
+    first = lambda_handler(payment_event("/create-paypal-order", ORDER), None)
+    second = lambda_handler(payment_event("/create-paypal-order", ORDER), None)
+
+    assert order_route.call_count == 2
+    assert order_route.call_args.args[-1] is None
+    assert json.loads(first["body"]) != json.loads(second["body"])
+
+
+def test_retry_with_the_same_key_replays_the_first_response(order_route):
+    first = lambda_handler(payment_event("/create-paypal-order", ORDER, "key-1"), None)
+    retry = lambda_handler(payment_event("/create-paypal-order", ORDER, "key-1"), None)
+
+    assert order_route.call_count == 1
+    assert retry["statusCode"] == first["statusCode"] == 200
+    assert json.loads(retry["body"]) == json.loads(first["body"]) == {"id": "ORDER-1"}
+    assert retry["headers"]["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first["headers"]
+
+
+def test_header_name_is_case_insensitive(order_route):
+    lambda_handler(payment_event("/create-paypal-order", ORDER, "key-1", "idempotency-key"), None)
+    lambda_handler(payment_event("/create-paypal-order", ORDER, "key-1", "IDEMPOTENCY-KEY"), None)
+
+    assert order_route.call_count == 1
+
+
+def test_paypal_request_id_is_derived_from_the_key(order_route):
+    lambda_handler(payment_event("/create-paypal-order", ORDER, "key-1"), None)
+    lambda_handler(payment_event("/create-paypal-order", ORDER, "key-2"), None)
+
+    first_id, second_id = (call.args[-1] for call in order_route.call_args_list)
+    assert first_id and second_id and first_id != second_id
+    assert len(first_id) <= 108  # PayPal's limit for PayPal-Request-Id
+
+
+def test_reusing_a_key_with_a_different_body_is_rejected(order_route):
+    lambda_handler(payment_event("/create-paypal-order", ORDER, "key-1"), None)
+    response = lambda_handler(payment_event("/create-paypal-order", dict(ORDER, amount=50), "key-1"), None)
+
+    assert response["statusCode"] == 422
+    assert order_route.call_count == 1
+
+
+def test_failed_responses_are_not_stored(order_route):
+    order_route.side_effect = [cors_response(503, {"message": "PayPal unavailable"}), cors_response(200, {"id": "ORDER-1"})]
+
+    first = lambda_handler(payment_event("/create-paypal-order", ORDER, "key-1"), None)
+    retry = lambda_handler(payment_event("/create-paypal-order", ORDER, "key-1"), None)
+
+    assert (first["statusCode"], retry["statusCode"]) == (503, 200)
+    assert order_route.call_count == 2
+
+
+def test_keys_are_scoped_per_route(order_route):
+    with patch("index.create_paypal_subscription_route", return_value=cors_response(200, {"subscription_id": "I-1"})) as sub:
+        lambda_handler(payment_event("/create-paypal-order", ORDER, "key-1"), None)
+        response = lambda_handler(payment_event("/create-paypal-subscription", SUBSCRIPTION, "key-1"), None)
+
+    assert order_route.call_count == sub.call_count == 1
+    assert json.loads(response["body"]) == {"subscription_id": "I-1"}
+
+
+def test_overlong_keys_are_rejected(order_route):
+    response = lambda_handler(payment_event("/create-paypal-order", ORDER, "k" * 256), None)
+
+    assert response["statusCode"] == 400
+    order_route.assert_not_called()
+
+
+def test_replay_is_recorded_as_a_cache_hit(order_route, metrics_records):
+    lambda_handler(payment_event("/create-paypal-order", ORDER, "key-1"), None)
+    lambda_handler(payment_event("/create-paypal-order", ORDER, "key-1"), None)
+
+    assert [record["cache"]["idempotency"] for record in metrics_records] == [False, True]
+
+
+def test_expired_responses_are_not_replayed():
+    cache = IdempotencyCache(ttl=0)
+    handler = MagicMock(return_value=cors_response(200, {"id": "ORDER-1"}))
+
+    cache.run("key", "fingerprint", handler)
+    cache.run("key", "fingerprint", handler)
+
+    assert handler.call_count == 2
+
+
+def test_memory_keeps_only_the_newest_entries():
+    cache = IdempotencyCache(max_entries=2)
+    handler = MagicMock(return_value=cors_response(200, {"id": "ORDER-1"}))
+
+    for key in ("a", "b", "c", "a"):
+        cache.run(key, "fingerprint", handler)
+
+    assert handler.call_count == 4
+    assert list(cache._memory) == ["c", "a"]
+
+
+def test_persistent_store_is_shared_between_containers(tmp_path):
+    path = str(tmp_path / "idempotency.sqlite3")
+    first_container = IdempotencyCache(SqliteIdempotencyStore(path))
+    second_container = IdempotencyCache(SqliteIdempotencyStore(path))
+    handler = MagicMock(return_value=cors_response(200, {"id": "ORDER-1"}))
+
+    first_container.run("key", "fingerprint", handler)
+    replayed = second_container.run("key", "fingerprint", handler)
+
+    handler.assert_called_once()
+    assert json.loads(replayed["body"]) == {"id": "ORDER-1"}
+
+
+def test_store_hits_are_kept_in_memory(tmp_path):
+    store = SqliteIdempotencyStore(str(tmp_path / "idempotency.sqlite3"))
+    IdempotencyCache(store).run("key", "fingerprint", MagicMock(return_value=cors_response(200, {"id": "ORDER-1"})))
+    reader = MagicMock(wraps=store)
+    cache = IdempotencyCache(reader)
+
+    for _ in range(3):
+        assert cache.run("key", "fingerprint", MagicMock())["headers"]["Idempotent-Replayed"] == "true"
+
+    reader.get.assert_called_once_with("key")
+
+
+def test_store_failures_fall_back_to_calling_the_handler():
+    store = MagicMock()
+    store.get.side_effect = OSError("disk full")
+    store.put.side_effect = OSError("disk full")
+    cache = IdempotencyCache(store)
+    handler = MagicMock(return_value=cors_response(200, {"id": "ORDER-1"}))
+
+    assert cache.run("key", "fingerprint", handler)["statusCode"] == 200
+    # The response is still remembered in memory.
+    cache.run("key", "fingerprint", handler)
+    handler.assert_called_once()
+
+
+@pytest.mark.parametrize("status_code", [200, 201])
+@patch("index.paypal_session.post")
+@patch("index.get_paypal_access_token", return_value="token")
+def test_create_paypal_order_forwards_the_paypal_request_id(mock_token, mock_post, status_code):
+    mock_post.return_value = MagicMock(status_code=status_code, json=MagicMock(return_value={"id": "ORDER-1"}))
+
+    response = index.create_paypal_order(25, "donation-1", paypal_request_id="request-1")
+
+    assert mock_post.call_args.kwargs["headers"]["PayPal-Request-Id"] == "request-1"
+    assert response["statusCode"] == 201
+
+
+@patch("index.paypal_session.post")
+@patch("index.get_paypal_access_token", return_value="token")
+def test_create_paypal_subscription_forwards_the_paypal_request_id(mock_token, mock_post):
+    mock_post.return_value = MagicMock(status_code=200, json=MagicMock(return_value={"id": "I-1"}))
+
+    response = index.create_paypal_subscription("P-1", "weekly-1", paypal_request_id="request-1")
+
+    assert mock_post.call_args.kwargs["headers"]["PayPal-Request-Id"] == "request-1"
+    assert response["statusCode"] == 201
+
+
+@patch("index.paypal_session.post")
+@patch("index.get_paypal_access_token", return_value="token")
+def test_no_paypal_request_id_without_a_key(mock_token, mock_post):
+    mock_post.return_value = MagicMock(status_code=201, json=MagicMock(return_value={"id": "ORDER-1"}))
+
+    index.create_paypal_order(25, "donation-1")
+
+    assert "PayPal-Request-Id" not in mock_post.call_args.kwargs["headers"]
+
+
+def test_concurrent_requests_with_one_key_create_one_order():
+    import threading
+    import time
+
+    cache = IdempotencyCache()
+    calls = []
+
+    def slow_handler():
+        calls.append(1)
+        time.sleep(0.05)
+        return cors_response(200, {"id": "ORDER-1"})
+
+    responses = []
+    threads = [threading.Thread(target=lambda: responses.append(cache.run("key", "fingerprint", slow_handler)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert [json.loads(response["body"]) for response in responses] == [{"id": "ORDER-1"}] * 5
+    assert cache._key_locks == {}
@@ -0,0 +1,155 @@
+import os
+import sys
+import pytest
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import index
+from conftest import FakeClock
+from index import InvocationMetrics, lambda_handler
+
+
+def make_event(method, path, body=None):
+    return {"httpMethod": method, "path": path, "body": body, "queryStringParameters": None}
+
+
+def test_emf_record_shape():
+    clock = FakeClock()
+    metrics = InvocationMetrics("POST /login", "req-1", clock=clock)
+    clock.now = 0.010
+    metrics.record("cognito-idp.InitiateAuth", 8.0)
+    metrics.record_cache("ssm", True)
+    metrics.record_cache("ssm", False)
+    clock.now = 0.012
+
+    record = metrics.to_emf(200, timestamp_ms=1700000000000)
+
+    assert record["_aws"] == {
+        "Timestamp": 1700000000000,
+        "CloudWatchMetrics": [{
+            "Namespace": index.METRICS_NAMESPACE,
+            "Dimensions": [["Route"]],
+            "Metrics": [
+                {"Name": "Duration", "Unit": "Milliseconds"},
+                {"Name": "cognito-idp.InitiateAuth", "Unit": "Milliseconds"},
+            ],
+        }],
+    }
+    assert record["Route"] == "POST /login"
+    assert record["StatusCode"] == 200
+    assert record["Duration"] == 12.0
+    assert record["cognito-idp.InitiateAuth"] == 8.0
+    assert record["cache"] == {"ssm": False}
+    assert record["requestId"] == "req-1"
+
+
+def test_repeated_dependency_emits_one_value_per_call():
+    metrics = InvocationMetrics("POST /create-paypal-subscription")
+    metrics.record("paypal.CreatePlan", 30.0)
+    metrics.record("paypal.CreatePlan", 25.0, error=True)
+
+    record = metrics.to_emf(200)
+
+    assert record["paypal.CreatePlan"] == [30.0, 25.0]
+    assert record["errors"] == {"paypal.CreatePlan": 1}
+
+
+def test_unfinished_calls_are_recorded_as_errors():
+    clock = FakeClock()
+    metrics = InvocationMetrics("GET /user", clock=clock)
+    metrics.start_call(1, "cognito-idp.AdminGetUser")
+    clock.now = 2.0
+
+    record = metrics.to_emf(500)
+
+    assert record["cognito-idp.AdminGetUser"] == 2000.0
+    assert record["errors"] == {"cognito-idp.AdminGetUser": 1}
+
+
+@pytest.mark.parametrize(
+    "method, path, expected_route, expected_status",
+    [
+        ("OPTIONS", "/login", "OPTIONS", 200),
+        ("GET", "/nope/12345", "UNMATCHED", 404),
+        ("POST", "/login", "POST /login", 400),
+    ]
+)
+def test_every_invocation_emits_one_record(metrics_records, method, path, expected_route, expected_status):
+    lambda_handler(make_event(method, path, "{}"), None)
+
+    assert len(metrics_records) == 1
+    assert metrics_records[0]["Route"] == expected_route
+    assert metrics_records[0]["StatusCode"] == expected_status
+
+
+def test_ssm_cache_flag_flips_to_hit_once_warm(metrics_records):
+    mock_client = MagicMock()
+    mock_client.initiate_auth.return_value = {"AuthenticationResult": {"IdToken": "x", "AccessToken": "y"}}
+    mock_ssm = MagicMock()
+    mock_ssm.get_parameter.return_value = {"Parameter": {"Value": "value"}}
+    event = make_event("POST", "/login", '{"email": "a@b.c", "password": "pw"}')
+
+    with patch("index.client", mock_client), patch("index.ssm", mock_ssm):
+        lambda_handler(event, None)
+        lambda_handler(event, None)
+
+    cold, warm = metrics_records
+    assert cold["Route"] == warm["Route"] == "POST /login"
+    # The unverifiable ID token also makes /login read the profile through the user cache.
+    assert cold["cache"]["ssm"] is False
+    assert warm["cache"]["ssm"] is True
+
+
+def test_paypal_calls_and_cache_flags_are_recorded(metrics_records):
+    token_response = MagicMock(status_code=200)
+    token_response.json.return_value = {"access_token": "token", "expires_in": 32400}
+    order_response = MagicMock(status_code=201)
+    order_response.json.return_value = {"id": "ORDER-1"}
+
+    with patch.dict(os.environ, {
+        "PAYPAL_AUTH_TOKEN_LINK": "https://api-m.sandbox.paypal.com/v1/oauth2/token",
+        "PAYPAL_CHECKOUT_ORDER_LINK": "https://api-m.sandbox.paypal.com/v2/checkout/orders",
+    }), patch("index.get_ssm_parameter", return_value="value"), \
+            patch("index.paypal_session.post", side_effect=[token_response, order_response, order_response]):
+        event = make_event("POST", "/create-paypal-order", '{"amount": 10, "custom_id": "c1"}')
+        lambda_handler(event, None)
+        lambda_handler(event, None)
+
+    cold, warm = metrics_records
+    assert "paypal.GetAccessToken" in cold and "paypal.CreateOrder" in cold
+    assert cold["cache"] == {"paypal_token": False}
+    assert "paypal.GetAccessToken" not in warm
+    assert warm["cache"] == {"paypal_token": True}
+
+
+def test_aws_client_hooks_record_operations(metrics_records):
+    from botocore.stub import Stubber
+
+    ssm = index.create_aws_client("ssm", "us-west-1")
+    with Stubber(ssm) as stub:
+        stub.add_response("get_parameter", {"Parameter": {"Name": "n", "Value": "v"}})
+        stub.add_client_error("get_parameter", service_error_code="ParameterNotFound", http_status_code=400)
+        index.metrics_state.current = metrics = InvocationMetrics("GET /user")
+        try:
+            ssm.get_parameter(Name="n")
+            with pytest.raises(ssm.exceptions.ParameterNotFound):
+                ssm.get_parameter(Name="n")
+        finally:
+            index.metrics_state.current = None
+
+    assert len(metrics.dependencies["ssm.GetParameter"]) == 2
+    assert metrics.errors == {"ssm.GetParameter": 1}
+
+
+@pytest.mark.parametrize(
+    "url, expected",
+    [
+        ("https://api-m.sandbox.paypal.com/v2/checkout/orders", "paypal.CreateOrder"),
+        ("https://api-m.paypal.com/v1/billing/plans/", "paypal.CreatePlan"),
+        ("https://api-m.paypal.com/v1/other", "paypal./v1/other"),
+        (None, "paypal.unknown"),
+    ]
+)
+def test_paypal_dependency_name(url, expected):
+    assert index.paypal_dependency_name(url) == expected
@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import pytest
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from index import ROUTES, Request, lambda_handler, cors_response
+
+
+def api_event(method, path, body=None, query=None, headers=None):
+    """Build a minimal API Gateway proxy event."""
+    return {
+        "httpMethod": method,
+        "path": path,
+        "body": json.dumps(body) if body is not None else None,
+        "queryStringParameters": query,
+        "headers": headers,
+    }
+
+
+def bearer(cognito, email="a@b.com"):
+    return {"Authorization": f"Bearer {cognito.token(email)}"}
+
+
+@pytest.mark.parametrize(
+    "method, path, body, query, target, expected_args",
+    [
+        ("POST", "/signup", {"email": "a@b.com", "password": "pw", "first_name": "A", "last_name": "B"}, None,
+         "sign_up", ("pw", "a@b.com", "A", "B")),
+        ("POST", "/confirm", {"email": "a@b.com"}, None, "confirm_user", ("a@b.com",)),
+        ("POST", "/confirm-email", {"access_token": "tok", "confirmation_code": "123"}, None,
+         "confirm_email", ("tok", "123")),
+        ("POST", "/confirm-email-resend", {"access_token": "tok"}, None, "confirm_email_resend", ("tok",)),
+        ("POST", "/login", {"email": "a@b.com", "password": "pw"}, None, "log_in", ("a@b.com", "pw")),
+        ("POST", "/token/refresh", {"refresh_token": "rt"}, None, "refresh_tokens", ("rt",)),
+        ("POST", "/forgot-password", {"email": "a@b.com"}, None, "forgot_password", ("a@b.com",)),
+        ("POST", "/confirm-forgot-password", {"email": "a@b.com", "confirmation_code": "123", "new_password": "new"},
+         None, "confirm_forgot_password", ("a@b.com", "123", "new")),
+        ("GET", "/user", None, {"email": "a@b.com"}, "get_user", ("a@b.com",)),
+        ("PATCH", "/user", {"email": "a@b.com", "attribute_updates": {"custom:firstName": "A"}}, None,
+         "update_user", ("a@b.com", {"custom:firstName": "A"})),
+        ("DELETE", "/user", None, {"email": "a@b.com"}, "delete_user", ("a@b.com",)),
+        ("POST", "/contact-us", {"first_name": "A", "email": "a@b.com", "message": "Hi"}, None,
+         "contact_us", ("A", "a@b.com", "Hi")),
+        ("POST", "/create-paypal-order", {"amount": 10, "custom_id": "C1"}, None,
+         "create_paypal_order_route", (10, "C1", "USD", None)),
+        ("POST", "/create-paypal-order", {"amount": 10, "custom_id": "C1", "currency": "EUR"}, None,
+         "create_paypal_order_route", (10, "C1", "EUR", None)),
+        ("POST", "/create-paypal-subscription", {"amount": 10, "custom_id": "C1"}, None,
+         "create_paypal_subscription_route", (10, "C1", None)),
+    ]
+)
+def test_lambda_handler_dispatches_routes(method, path, body, query, target, expected_args, cognito_tokens):
+    event = api_event(method, path, body, query, headers=bearer(cognito_tokens))
+    with patch(f"index.{target}", return_value=cors_response(200, {"message": "ok"})) as mock_target:
+        response = lambda_handler(event, None)
+
+    assert response["statusCode"] == 200
+    mock_target.assert_called_once_with(*expected_args)
+
+
+def test_every_route_is_registered_once_at_import():
+    assert len(ROUTES) == 15
+    assert ("/user", "GET") in ROUTES
+
+
+@pytest.mark.parametrize(
+    "method, path, expected_status",
+    [
+        ("OPTIONS", "/anything", 200),
+        ("GET", "/missing", 404),
+        ("PUT", "/user", 404),
+    ]
+)
+def test_lambda_handler_preflight_and_unknown_routes(method, path, expected_status):
+    response = lambda_handler(api_event(method, path), None)
+    assert response["statusCode"] == expected_status
+
+
+@patch("index.get_user", return_value=cors_response(200, {}))
+def test_get_routes_never_decode_the_body(mock_get_user, cognito_tokens):
+    event = api_event("GET", "/user", query={"email": "a@b.com"}, headers=bearer(cognito_tokens))
+    event["body"] = "not json"
+
+    assert lambda_handler(event, None)["statusCode"] == 200
+
+
+@patch("index.get_user", return_value=cors_response(400, {}))
+def test_missing_query_string_is_tolerated(mock_get_user, cognito_tokens):
+    lambda_handler(api_event("GET", "/user", query=None, headers=bearer(cognito_tokens)), None)
+    mock_get_user.assert_called_once_with(None)
+
+
+def test_malformed_body_returns_500():
+    event = api_event("POST", "/login")
+    event["body"] = "{not json"
+
+    assert lambda_handler(event, None)["statusCode"] == 500
+
+
+def test_request_body_is_decoded_once():
+    request = Request(api_event("POST", "/login", {"email": "a@b.com", "password": "pw"}))
+
+    with patch("index.json.loads", wraps=json.loads) as mock_loads:
+        assert request.get("email") == "a@b.com"
+        assert request.get("password") == "pw"
+        assert request.get("missing", "default") == "default"
+
+    mock_loads.assert_called_once()
@@ -8,10 +8,11 @@ from unittest.mock import patch
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 @pytest.fixture
-def mock_ssm_and_cognito():
+def mock_ssm_and_cognito(cognito_tokens):
     """
     A Pytest fixture that patches out SSM and Cognito for all tests.
-    Sets up 'fake_user_pool_id' and the Cognito exception classes.
+    Sets up 'fake_user_pool_id' and the Cognito exception classes. ID tokens are
+    verified against the JWKS of cognito_tokens.
     """
     with patch('index.ssm') as mock_ssm, patch('index.client') as mock_client:
         # Mock SSM to return a fake user pool ID
@@ -172,4 +173,87 @@ def test_log_in(
             # For example, if your function returns an error message in the body:
             # body = json.loads(response["body"])
             # assert "error" in body
-            pass
\ No newline at end of file
+            pass
+
+def id_token_with(cognito, **claims):
+    return cognito.token(claims.pop("email", "ana@example.com"), **claims)
+
+
+def authentication_result(id_token):
+    return {"AuthenticationResult": {"IdToken": id_token, "AccessToken": "a", "RefreshToken": "r"}}
+
+
+def test_log_in_returns_the_profile_from_the_id_token(mock_ssm_and_cognito, cognito_tokens):
+    _, mock_cognito_client = mock_ssm_and_cognito
+    mock_cognito_client.initiate_auth.return_value = authentication_result(id_token_with(cognito_tokens, **{
+        "sub": "sub-1", "email": "ana@example.com", "email_verified": True,
+        "custom:firstName": "Ana", "custom:lastName": "Li",
+    }))
+    from index import log_in
+
+    body = json.loads(log_in("ana@example.com", "pw")["body"])
+
+    assert body["user_id"] == "sub-1"
+    assert body["profile"] == {
+        "user_id": "sub-1", "email": "ana@example.com", "email_verified": True, "first_name": "Ana", "last_name": "Li",
+    }
+    mock_cognito_client.admin_get_user.assert_not_called()
+
+
+def test_log_in_tops_up_missing_claims(mock_ssm_and_cognito, cognito_tokens):
+    _, mock_cognito_client = mock_ssm_and_cognito
+    mock_cognito_client.initiate_auth.return_value = authentication_result(
+        id_token_with(cognito_tokens, sub="sub-1", email="ana@example.com", email_verified=False))
+    mock_cognito_client.admin_get_user.return_value = {"UserAttributes": [
+        {"Name": "custom:firstName", "Value": "Ana"}, {"Name": "custom:lastName", "Value": "Li"},
+        {"Name": "email_verified", "Value": "true"},
+    ]}
+    from index import log_in
+
+    profile = json.loads(log_in("ana@example.com", "pw")["body"])["profile"]
+
+    # Only the missing claims are taken from Cognito.
+    assert profile == {
+        "user_id": "sub-1", "email": "ana@example.com", "email_verified": False, "first_name": "Ana", "last_name": "Li",
+    }
+    mock_cognito_client.admin_get_user.assert_called_once()
+
+
+def test_log_in_survives_a_failed_top_up(mock_ssm_and_cognito, cognito_tokens):
+    _, mock_cognito_client = mock_ssm_and_cognito
+    mock_cognito_client.initiate_auth.return_value = authentication_result(id_token_with(cognito_tokens, sub="sub-1"))
+    mock_cognito_client.admin_get_user.side_effect = RuntimeError("cognito down")
+    from index import log_in
+
+    response = log_in("ana@example.com", "pw")
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["profile"]["first_name"] is None
+
+
+def test_log_in_top_up_can_be_switched_off(mock_ssm_and_cognito, cognito_tokens):
+    _, mock_cognito_client = mock_ssm_and_cognito
+    mock_cognito_client.initiate_auth.return_value = authentication_result(id_token_with(cognito_tokens, sub="sub-1"))
+    from index import log_in
+
+    with patch("index.LOGIN_PROFILE_TOP_UP", False):
+        assert log_in("ana@example.com", "pw")["statusCode"] == 200
+    mock_cognito_client.admin_get_user.assert_not_called()
+
+
+def test_log_in_ignores_the_claims_of_an_unverified_id_token(mock_ssm_and_cognito):
+    from tools.fake_aws import FakeCognito
+    _, mock_cognito_client = mock_ssm_and_cognito
+    forger = FakeCognito(signing_key="not-the-signing-key-of-this-user-pool")
+    mock_cognito_client.initiate_auth.return_value = authentication_result(
+        forger.token("ana@example.com", sub="forged-sub", **{"custom:firstName": "Mallory"}))
+    mock_cognito_client.admin_get_user.return_value = {"UserAttributes": [
+        {"Name": "sub", "Value": "sub-1"}, {"Name": "email", "Value": "ana@example.com"},
+        {"Name": "custom:firstName", "Value": "Ana"},
+    ]}
+    from index import log_in
+
+    body = json.loads(log_in("ana@example.com", "pw")["body"])
+
+    assert body["user_id"] == "sub-1"
+    assert body["profile"]["first_name"] == "Ana"
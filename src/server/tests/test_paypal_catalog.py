@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import pytest
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from index import PayPalCatalog, SqliteCatalogStore, cors_response
+
+
+def subscription_response(subscription_id="SUB-001"):
+    return cors_response(201, {"subscription": {
+        "id": subscription_id,
+        "links": [{"rel": "approve", "href": "https://paypal.com/approval-link"}]
+    }})
+
+
+@patch.dict(os.environ, {"ENVIRONMENT": "test"})
+@patch("index.create_paypal_subscription", autospec=True)
+@patch("index.create_paypal_plan", autospec=True)
+@patch("index.create_paypal_product", autospec=True)
+def test_repeat_amount_goes_straight_to_subscription(mock_product, mock_plan, mock_sub):
+    mock_product.return_value = "PROD-123"
+    mock_plan.side_effect = ["PLAN-10", "PLAN-25"]
+    mock_sub.return_value = subscription_response()
+
+    from index import create_paypal_subscription_route
+
+    for amount in (10, 10, 10.0, 25):
+        response = create_paypal_subscription_route(amount, "CUSTOM_ID")
+        assert response["statusCode"] == 200
+
+    mock_product.assert_called_once_with()
+    assert [call.args for call in mock_plan.call_args_list] == [
+        ("PROD-123", 10, "USD", "WEEK"),
+        ("PROD-123", 25, "USD", "WEEK"),
+    ]
+    assert [call.args[0] for call in mock_sub.call_args_list] == ["PLAN-10", "PLAN-10", "PLAN-10", "PLAN-25"]
+
+
+@patch.dict(os.environ, {"ENVIRONMENT": "test"})
+@patch("index.create_paypal_product", autospec=True)
+def test_failed_creation_is_not_cached(mock_product):
+    error = cors_response(503, {"message": "Unable to connect to the PayPal API."})
+    mock_product.side_effect = [error, "PROD-123"]
+    catalog = PayPalCatalog()
+
+    assert catalog.get_product_id() == error
+    assert catalog.get_product_id() == "PROD-123"
+    assert catalog.get_product_id() == "PROD-123"
+    assert mock_product.call_count == 2
+
+
+@patch.dict(os.environ, {"ENVIRONMENT": "test"})
+@patch("index.create_paypal_plan", autospec=True)
+@patch("index.create_paypal_product", autospec=True)
+def test_sqlite_store_survives_new_catalog(mock_product, mock_plan, tmp_path):
+    mock_product.return_value = "PROD-123"
+    mock_plan.return_value = "PLAN-10"
+    db_path = str(tmp_path / "catalog.sqlite3")
+
+    first = PayPalCatalog(SqliteCatalogStore(db_path))
+    assert first.get_plan_id(first.get_product_id(), 10) == "PLAN-10"
+
+    # A fresh container (empty memory layer) reads the IDs back from the store.
+    second = PayPalCatalog(SqliteCatalogStore(db_path))
+    assert second.get_product_id() == "PROD-123"
+    assert second.get_plan_id("PROD-123", 10.00) == "PLAN-10"
+    assert mock_product.call_count == 1
+    assert mock_plan.call_count == 1
+
+
+@pytest.mark.parametrize(
+    "plan_kwargs, other_kwargs",
+    [
+        ({"amount": 10, "currency": "USD"}, {"amount": 10, "currency": "EUR"}),
+        ({"amount": 10, "interval_unit": "WEEK"}, {"amount": 10, "interval_unit": "MONTH"}),
+    ]
+)
+@patch.dict(os.environ, {"ENVIRONMENT": "test"})
+@patch("index.create_paypal_plan", autospec=True)
+def test_plans_are_keyed_by_currency_and_interval(mock_plan, plan_kwargs, other_kwargs):
+    mock_plan.side_effect = ["PLAN-A", "PLAN-B"]
+    catalog = PayPalCatalog()
+
+    assert catalog.get_plan_id("PROD-123", **plan_kwargs) == "PLAN-A"
+    assert catalog.get_plan_id("PROD-123", **other_kwargs) == "PLAN-B"
+
+
+@patch.dict(os.environ, {"ENVIRONMENT": "test"})
+@patch("index.create_paypal_subscription", autospec=True)
+@patch("index.create_paypal_plan", autospec=True)
+@patch("index.create_paypal_product", autospec=True)
+def test_rejected_cached_plan_is_recreated(mock_product, mock_plan, mock_sub):
+    mock_product.return_value = "PROD-123"
+    mock_plan.side_effect = ["PLAN-OLD", "PLAN-NEW"]
+    mock_sub.side_effect = [
+        subscription_response("SUB-001"),
+        cors_response(422, {"message": "Failed to create PayPal subscription: PLAN_NOT_ACTIVE"}),
+        subscription_response("SUB-002"),
+    ]
+
+    from index import create_paypal_subscription_route
+
+    assert create_paypal_subscription_route(10, "CUSTOM_ID")["statusCode"] == 200
+    response = create_paypal_subscription_route(10, "CUSTOM_ID")
+
+    assert response["statusCode"] == 200
+    assert json.loads(response["body"])["subscription_id"] == "SUB-002"
+    assert [call.args[0] for call in mock_sub.call_args_list] == ["PLAN-OLD", "PLAN-OLD", "PLAN-NEW"]
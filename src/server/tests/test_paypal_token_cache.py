@@ -0,0 +1,123 @@
+import os
+import sys
+import threading
+import time
+import pytest
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def token_response(token, expires_in=32400, status_code=200):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = {"access_token": token, "expires_in": expires_in}
+    return response
+
+
+@pytest.mark.parametrize(
+    "expires_in, expected_exchanges",
+    [
+        (32400, 1),  # Long-lived token => reused
+        (60, 2),     # Lifetime shorter than the safety margin => never cached
+        (None, 2),   # No expires_in => never cached
+    ]
+)
+@patch.dict(os.environ, {"ENVIRONMENT": "test"})
+@patch("index.get_paypal_client_id", return_value="test-client-id")
+@patch("index.get_paypal_secret", return_value="test-secret")
+@patch("index.paypal_session.post")
+def test_get_paypal_access_token_is_cached(mock_post, mock_secret, mock_client_id, expires_in, expected_exchanges):
+    response = token_response("fake-token-123")
+    if expires_in is None:
+        del response.json.return_value["expires_in"]
+    else:
+        response.json.return_value["expires_in"] = expires_in
+    mock_post.return_value = response
+
+    from index import get_paypal_access_token
+
+    assert get_paypal_access_token() == "fake-token-123"
+    assert get_paypal_access_token() == "fake-token-123"
+    assert mock_post.call_count == expected_exchanges
+
+
+@patch("index.get_paypal_client_id", return_value="test-client-id")
+@patch("index.get_paypal_secret", return_value="test-secret")
+@patch("index.paypal_session.post")
+def test_paypal_access_token_is_cached_per_environment(mock_post, mock_secret, mock_client_id):
+    mock_post.side_effect = [token_response("dev-token"), token_response("prod-token")]
+
+    from index import get_paypal_access_token
+
+    with patch.dict(os.environ, {"ENVIRONMENT": "dev"}):
+        assert get_paypal_access_token() == "dev-token"
+    with patch.dict(os.environ, {"ENVIRONMENT": "prod"}):
+        assert get_paypal_access_token() == "prod-token"
+    with patch.dict(os.environ, {"ENVIRONMENT": "dev"}):
+        assert get_paypal_access_token() == "dev-token"
+    assert mock_post.call_count == 2
+
+
+@patch.dict(os.environ, {"ENVIRONMENT": "test"})
+@patch("index.get_paypal_client_id", return_value="test-client-id")
+@patch("index.get_paypal_secret", return_value="test-secret")
+@patch("index.paypal_session.post")
+def test_concurrent_callers_share_one_token_exchange(mock_post, mock_secret, mock_client_id):
+    def slow_exchange(*args, **kwargs):
+        time.sleep(0.05)
+        return token_response("shared-token")
+    mock_post.side_effect = slow_exchange
+
+    from index import get_paypal_access_token
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(get_paypal_access_token())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["shared-token"] * 8
+    assert mock_post.call_count == 1
+
+
+@patch.dict(os.environ, {"ENVIRONMENT": "test"})
+@patch("index.get_paypal_client_id", return_value="test-client-id")
+@patch("index.get_paypal_secret", return_value="test-secret")
+@patch("index.paypal_session.post")
+def test_post_to_paypal_refreshes_token_and_retries_once_on_401(mock_post, mock_secret, mock_client_id):
+    unauthorized = MagicMock(status_code=401)
+    created = MagicMock(status_code=201)
+    mock_post.side_effect = [
+        token_response("old-token"),   # initial exchange
+        unauthorized,                  # PayPal rejects the cached token
+        token_response("new-token"),   # exchange after invalidation
+        created,                       # retried call succeeds
+    ]
+
+    from index import get_paypal_access_token, post_to_paypal
+
+    token = get_paypal_access_token()
+    response = post_to_paypal("https://paypal.test/v2/checkout/orders", {"intent": "CAPTURE"}, token)
+
+    assert response is created
+    assert mock_post.call_args_list[1].kwargs["headers"]["Authorization"] == "Bearer old-token"
+    assert mock_post.call_args_list[3].kwargs["headers"]["Authorization"] == "Bearer new-token"
+    # The refreshed token is now the cached one.
+    assert get_paypal_access_token() == "new-token"
+    assert mock_post.call_count == 4
+
+
+@patch.dict(os.environ, {"ENVIRONMENT": "test"})
+@patch("index.get_paypal_access_token", return_value="new-token")
+@patch("index.paypal_session.post")
+def test_post_to_paypal_does_not_retry_twice(mock_post, mock_get_token):
+    mock_post.return_value = MagicMock(status_code=401)
+
+    from index import post_to_paypal
+
+    response = post_to_paypal("https://paypal.test/v1/catalogs/products", {}, "old-token")
+
+    assert response.status_code == 401
+    assert mock_post.call_count == 2
@@ -0,0 +1,110 @@
+import os
+import sys
+import json
+import pytest
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import index
+from index import refresh_tokens
+from tools.fake_aws import FakeCognito, installed
+
+
+@pytest.fixture
+def mock_ssm_and_cognito():
+    with patch('index.ssm') as mock_ssm, patch('index.client') as mock_client:
+        mock_ssm.get_parameter.return_value = {"Parameter": {"Value": "fake_client_id"}}
+        mock_client.exceptions.NotAuthorizedException = type("NotAuthorizedException", (Exception,), {})
+        mock_client.exceptions.UserNotFoundException = type("UserNotFoundException", (Exception,), {})
+        yield mock_ssm, mock_client
+
+
+@pytest.fixture
+def cognito():
+    """A fake user pool with one confirmed user, wired into index."""
+    cognito = FakeCognito()
+    cognito.add_user("ana@example.com", "Passw0rd!", **{"custom:firstName": "Ana", "custom:lastName": "Li"})
+    with patch("index.get_user_pool_id", return_value=cognito.user_pool_id), \
+            patch("index.get_user_pool_client_id", return_value=cognito.client_id), installed(index, cognito=cognito):
+        yield cognito
+
+
+@pytest.mark.parametrize(
+    "exception, expected_status",
+    [
+        ("NotAuthorizedException", 401),
+        ("UserNotFoundException", 404),
+        (RuntimeError, 500),
+    ]
+)
+def test_refresh_tokens_errors(mock_ssm_and_cognito, exception, expected_status):
+    _, mock_client = mock_ssm_and_cognito
+    mock_client.initiate_auth.side_effect = getattr(mock_client.exceptions, exception)() \
+        if isinstance(exception, str) else exception("boom")
+
+    response = refresh_tokens("some-refresh-token")
+
+    assert response["statusCode"] == expected_status
+    assert "message" in json.loads(response["body"])
+
+
+def test_refresh_token_is_required(mock_ssm_and_cognito):
+    _, mock_client = mock_ssm_and_cognito
+
+    assert refresh_tokens("")["statusCode"] == 400
+    mock_client.initiate_auth.assert_not_called()
+
+
+def test_refresh_uses_the_refresh_token_flow(mock_ssm_and_cognito, cognito_tokens):
+    _, mock_client = mock_ssm_and_cognito
+    id_token = cognito_tokens.token("ana@example.com", sub="sub-1", email_verified=True,
+                                    **{"custom:firstName": "Ana", "custom:lastName": "Li"})
+    mock_client.initiate_auth.return_value = {
+        "AuthenticationResult": {"IdToken": id_token, "AccessToken": "new-access", "ExpiresIn": 3600},
+    }
+
+    body = json.loads(refresh_tokens("some-refresh-token")["body"])
+
+    mock_client.initiate_auth.assert_called_once_with(
+        ClientId=cognito_tokens.client_id, AuthFlow="REFRESH_TOKEN_AUTH", AuthParameters={"REFRESH_TOKEN": "some-refresh-token"},
+    )
+    assert body["access_token"] == "new-access" and body["id_token"] == id_token
+    assert body["profile"]["first_name"] == "Ana"
+    # Without refresh token rotation the client keeps its refresh token.
+    assert "refresh_token" not in body
+
+
+def test_refresh_leaves_out_a_user_id_it_cannot_verify(mock_ssm_and_cognito, cognito_tokens):
+    _, mock_client = mock_ssm_and_cognito
+    forger = FakeCognito(signing_key="not-the-signing-key-of-this-user-pool")
+    mock_client.initiate_auth.return_value = {
+        "AuthenticationResult": {"IdToken": forger.token("ana@example.com"), "AccessToken": "new-access"},
+    }
+
+    response = refresh_tokens("some-refresh-token")
+
+    body = json.loads(response["body"])
+    assert response["statusCode"] == 200
+    assert "user_id" not in body
+    assert body["profile"]["user_id"] is None
+
+
+def test_refresh_after_login_never_needs_the_password(cognito):
+    login = json.loads(index.log_in("ana@example.com", "Passw0rd!")["body"])
+    cognito.calls.clear()
+
+    response = index.lambda_handler({
+        "httpMethod": "POST", "path": "/token/refresh", "body": json.dumps({"refresh_token": login["refresh_token"]}),
+    }, None)
+
+    body = json.loads(response["body"])
+    assert response["statusCode"] == 200
+    assert body["user_id"] == login["user_id"]
+    assert body["profile"] == login["profile"]
+    assert body["access_token"] != login["access_token"]
+    assert dict(cognito.calls) == {"InitiateAuth": 1}
+
+
+def test_unknown_refresh_tokens_get_401(cognito):
+    assert refresh_tokens("not-a-refresh-token")["statusCode"] == 401
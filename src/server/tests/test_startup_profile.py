@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+import logging
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import index
+from conftest import FakeClock
+from index import StartupProfile, NULL_STEP
+from tools.startup_profile import profile_once, summarize
+
+
+def test_disabled_profile_records_nothing():
+    profile = StartupProfile(False)
+    assert profile.step("import requests") is NULL_STEP
+    assert profile.awaiting_first_invocation is False
+
+
+def test_steps_are_timed_per_phase_and_recorded_once():
+    clock = FakeClock()
+    profile = StartupProfile(True, clock=clock)
+    with profile.step("import requests"):
+        clock.now += 0.120
+    with profile.step("import requests"):
+        clock.now += 0.500
+    profile.finish_init()
+    with profile.step("create ssm client"):
+        clock.now += 0.030
+
+    assert [(step["name"], step["phase"], step["duration_ms"]) for step in profile.steps] == [
+        ("import requests", "init", 120.0),
+        ("create ssm client", "invocation", 30.0),
+    ]
+    assert profile.init_ms == pytest.approx(620.0)
+
+
+def test_report_is_logged_once_on_the_first_invocation(monkeypatch, caplog):
+    monkeypatch.setattr(index, "startup_profile", StartupProfile(True))
+    index.startup_profile.finish_init()
+    event = {"httpMethod": "OPTIONS", "path": "/login"}
+
+    with caplog.at_level(logging.INFO):
+        first = index.lambda_handler(event, None)
+        second = index.lambda_handler(event, None)
+
+    assert first == second == index.preflight_response()
+    reports = [json.loads(record.getMessage()) for record in caplog.records if "startup_profile" in record.getMessage()]
+    assert len(reports) == 1
+    assert reports[0]["route"] == "OPTIONS /login"
+    assert reports[0] == index.startup_profile.report
+    assert index.startup_profile.step("late step") is NULL_STEP
+
+
+def test_cold_start_in_a_fresh_interpreter():
+    report = profile_once()
+    names = [step["name"] for step in report["steps"]]
+    assert names[:2] == ["import stdlib", "import requests"]
+    assert report["init_ms"] > 0
+    assert report["import_ms"] >= report["init_ms"]
+
+
+def test_summarize_takes_medians_per_step():
+    reports = [
+        {"import_ms": ms, "init_ms": ms, "first_invocation_ms": 1.0, "rss_kb": 100,
+         "steps": [{"name": "import jwt", "phase": "init", "duration_ms": ms, "rss_delta_kb": 10}]}
+        for ms in (5.0, 9.0, 7.0)
+    ]
+    summary = summarize(reports)
+    assert summary["runs"] == 3
+    assert summary["init_ms"] == 7.0
+    assert summary["steps"] == [{"name": "import jwt", "phase": "init", "duration_ms": 7.0, "rss_delta_kb": 10}]
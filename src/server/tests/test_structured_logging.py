@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import logging
+import pytest
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import index
+from conftest import FakeClock
+from index import JsonLogFormatter, LogSampler
+
+
+class CountingStr:
+    """A log argument that counts how often it is rendered."""
+
+    def __init__(self):
+        self.renders = 0
+
+    def __str__(self):
+        self.renders += 1
+        return "boom"
+
+
+@pytest.fixture
+def json_lines():
+    """Format every record the root logger handles with JsonLogFormatter and collect the lines."""
+    lines = []
+
+    class ListHandler(logging.Handler):
+        def emit(self, record):
+            lines.append(json.loads(self.format(record)))
+
+    handler = ListHandler()
+    handler.setFormatter(JsonLogFormatter())
+    index.logger.addHandler(handler)
+    yield lines
+    index.logger.removeHandler(handler)
+
+
+def make_record(message="Error in sign_up: %s", args=("boom",), level=logging.ERROR, exc=None):
+    exc_info = (type(exc), exc, None) if exc else None
+    return logging.LogRecord("root", level, __file__, 1, message, args, exc_info)
+
+
+def test_json_record_carries_request_context_and_exception():
+    formatter = JsonLogFormatter()
+    try:
+        raise ValueError("bad input")
+    except ValueError as e:
+        record = logging.LogRecord("root", logging.ERROR, __file__, 1, "Error in log_in: %s", (e,), sys.exc_info())
+
+    index.log_context.request_id, index.log_context.route = "req-1", "POST /login"
+    try:
+        entry = json.loads(formatter.format(record))
+    finally:
+        index.log_context.request_id = index.log_context.route = None
+
+    assert entry["level"] == "ERROR"
+    assert entry["message"] == "Error in log_in: bad input"
+    assert entry["request_id"] == "req-1"
+    assert entry["route"] == "POST /login"
+    assert entry["error"]["type"] == "ValueError"
+    assert "raise ValueError" in entry["error"]["stack"]
+    assert entry["timestamp"].endswith("Z")
+
+
+def test_handler_errors_are_logged_with_the_invocation_context(json_lines):
+    mock_ssm = MagicMock()
+    mock_ssm.get_parameter.return_value = {"Parameter": {"Value": "value"}}
+    mock_client = MagicMock()
+    mock_client.admin_get_user.side_effect = RuntimeError("cognito down")
+    event = {"httpMethod": "GET", "path": "/user", "queryStringParameters": {"email": "a@b.c"}}
+
+    with patch("index.USER_ROUTES_REQUIRE_AUTH", False), patch("index.ssm", mock_ssm), patch("index.client", mock_client):
+        response = index.lambda_handler(event, MagicMock(aws_request_id="req-42"))
+
+    assert response["statusCode"] == 500
+    errors = [line for line in json_lines if line["level"] == "ERROR"]
+    assert errors[0]["message"] == "Unexpected error in get_user: cognito down"
+    assert errors[0]["request_id"] == "req-42"
+    assert errors[0]["route"] == "GET /user"
+    assert errors[0]["error"]["type"] == "RuntimeError"
+    # The context does not outlive the invocation.
+    assert index.log_context.request_id is None and index.log_context.route is None
+
+
+def test_sampler_passes_the_first_records_of_a_signature_then_counts():
+    sampler = LogSampler(limit=3, window_seconds=60, clock=FakeClock())
+
+    allowed = [sampler.filter(make_record()) for _ in range(10)]
+
+    assert allowed == [True] * 3 + [False] * 7
+    assert sampler.windows[(logging.ERROR, "Error in sign_up: %s", None)][1] == 10
+
+
+def test_dropped_records_are_never_formatted():
+    sampler = LogSampler(limit=1, window_seconds=60, clock=FakeClock())
+    argument = CountingStr()
+
+    with patch.object(index, "log_sampler", sampler), patch.object(index.logger, "filters", [sampler]), \
+            patch.object(index.logger, "handlers", [logging.NullHandler()]):
+        for _ in range(50):
+            index.logger.error("Error in sign_up: %s", argument, exc_info=True)
+
+    assert argument.renders == 0
+    assert sampler.windows[(logging.ERROR, "Error in sign_up: %s", None)][1] == 50
+
+
+@pytest.mark.parametrize("first, second", [
+    (make_record("Error in sign_up: %s"), make_record("Error in log_in: %s")),
+    (make_record(level=logging.ERROR), make_record(level=logging.WARNING)),
+    (make_record(exc=ValueError("x")), make_record(exc=KeyError("x"))),
+])
+def test_signatures_are_sampled_separately(first, second):
+    sampler = LogSampler(limit=1, window_seconds=60, clock=FakeClock())
+
+    assert sampler.filter(first) and sampler.filter(second)
+    assert not sampler.filter(first)
+
+
+def test_info_records_are_not_sampled():
+    sampler = LogSampler(limit=1, window_seconds=60, clock=FakeClock())
+
+    assert all(sampler.filter(make_record(level=logging.INFO)) for _ in range(5))
+
+
+def test_closed_window_logs_one_summary_with_the_count(json_lines):
+    clock = FakeClock()
+    sampler = LogSampler(limit=2, window_seconds=60, clock=clock)
+
+    with patch.object(index.logger, "filters", [sampler]):
+        for _ in range(7):
+            index.logger.error("Error in sign_up: %s", "throttled")
+        clock.now = 61
+        index.logger.error("Error in sign_up: %s", "throttled")
+
+    messages = [(line["message"], line.get("suppressed")) for line in json_lines]
+    assert messages == [
+        ("Error in sign_up: throttled", None),
+        ("Error in sign_up: throttled", None),
+        ("Suppressed repeated log records: Error in sign_up: %s", 5),
+        ("Error in sign_up: throttled", None),
+    ]
+
+
+def test_flush_reports_a_burst_followed_by_silence(json_lines):
+    clock = FakeClock()
+    sampler = LogSampler(limit=2, window_seconds=60, clock=clock)
+
+    with patch.object(index.logger, "filters", [sampler]):
+        for _ in range(7):
+            index.logger.error("Error in sign_up: %s", "throttled")
+        sampler.flush()  # The window is still open.
+        clock.now = 61
+        sampler.flush()
+        sampler.flush()
+
+    messages = [(line["message"], line.get("suppressed")) for line in json_lines]
+    assert messages[2:] == [("Suppressed repeated log records: Error in sign_up: %s", 5)]
+    assert sampler.windows == {}
+
+
+def test_forced_flush_closes_open_windows(json_lines):
+    sampler = LogSampler(limit=1, window_seconds=60, clock=FakeClock())
+
+    with patch.object(index.logger, "filters", [sampler]):
+        for _ in range(4):
+            index.logger.warning("Could not emit metrics: %s", "boom")
+        sampler.flush(force=True)
+
+    assert json_lines[-1]["suppressed"] == 3
+
+
+def test_invocations_flush_closed_windows(json_lines):
+    clock = FakeClock()
+    sampler = LogSampler(limit=1, window_seconds=60, clock=clock)
+
+    with patch.object(index, "log_sampler", sampler), patch.object(index.logger, "filters", [sampler]):
+        for _ in range(3):
+            index.logger.error("Error in sign_up: %s", "throttled")
+        clock.now = 61
+        index.lambda_handler({"httpMethod": "OPTIONS", "path": "/login"}, None)
+
+    assert json_lines[-1]["suppressed"] == 2
+    assert json_lines[-1]["request_id"] is None
+
+
+def test_new_signatures_share_a_bucket_once_the_limit_is_reached():
+    sampler = LogSampler(limit=1, window_seconds=60, max_signatures=2, clock=FakeClock())
+
+    for number in range(5):
+        sampler.filter(make_record(f"message {number}", ()))
+
+    assert len(sampler.windows) == 3
+    assert sampler.windows[(logging.ERROR, "(other)", None)][1] == 3
@@ -0,0 +1,287 @@
+import os
+import sys
+import time
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import index
+from conftest import FakeClock
+from index import CognitoTokenVerifier, TokenError, lambda_handler
+from tools.fake_aws import FakeCognito, installed
+
+
+class CountingFetcher:
+    def __init__(self, cognito):
+        self.cognito = cognito
+        self.calls = 0
+        self.error = None
+
+    def __call__(self, user_pool_id):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return self.cognito.jwks(user_pool_id)
+
+
+@pytest.fixture
+def cognito():
+    return FakeCognito()
+
+
+@pytest.fixture
+def fetcher(cognito):
+    return CountingFetcher(cognito)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(1000.0)
+
+
+@pytest.fixture
+def verifier(cognito, fetcher, clock):
+    return CognitoTokenVerifier(cognito.user_pool_id, cognito.client_id, fetch_jwks=fetcher, ttl=3600,
+                                min_refresh_interval=60, clock=clock)
+
+
+@pytest.mark.parametrize("token_use", ["id", "access"])
+def test_valid_tokens_are_accepted(verifier, cognito, token_use):
+    claims = verifier.verify(cognito.token("ana@example.com", token_use=token_use))
+    assert claims["token_use"] == token_use
+
+
+def test_tokens_from_a_fake_login_are_accepted(verifier, cognito):
+    cognito.add_user("ana@example.com", "Passw0rd!")
+    result = cognito.initiate_auth(ClientId=cognito.client_id, AuthFlow="USER_PASSWORD_AUTH",
+                                   AuthParameters={"USERNAME": "ana@example.com", "PASSWORD": "Passw0rd!"})
+
+    assert verifier.verify(result["AuthenticationResult"]["IdToken"])["email"] == "ana@example.com"
+    assert verifier.verify(result["AuthenticationResult"]["AccessToken"])["username"] == "ana@example.com"
+
+
+@pytest.mark.parametrize(
+    "claims, message",
+    [
+        ({"exp": int(time.time()) - 120}, "expired"),
+        ({"aud": "another-client"}, "another client"),
+        ({"iss": "https://cognito-idp.us-west-1.amazonaws.com/us-west-1_OTHER"}, "invalid"),
+        ({"token_use": "refresh"}, "not accepted"),
+    ]
+)
+def test_invalid_tokens_are_rejected(verifier, cognito, claims, message):
+    with pytest.raises(TokenError, match=message):
+        verifier.verify(cognito.token("ana@example.com", **claims))
+
+
+@pytest.mark.parametrize("token", [None, "", "not-a-jwt"])
+def test_missing_or_malformed_tokens_are_rejected(verifier, token):
+    with pytest.raises(TokenError):
+        verifier.verify(token)
+
+
+def test_access_tokens_of_another_client_are_rejected(verifier, cognito):
+    with pytest.raises(TokenError, match="another client"):
+        verifier.verify(cognito.token("ana@example.com", token_use="access", client_id="another-client"))
+
+
+def test_tokens_signed_with_another_secret_are_rejected(verifier, cognito):
+    forger = FakeCognito(signing_key="not-the-signing-key-of-this-user-pool")
+    with pytest.raises(TokenError, match="invalid"):
+        verifier.verify(forger.token("ana@example.com"))
+
+
+def test_keys_are_fetched_once_while_warm(verifier, cognito, fetcher, clock):
+    for _ in range(5):
+        verifier.verify(cognito.token("ana@example.com"))
+        clock.now += 60
+    assert fetcher.calls == 1
+
+    clock.now += 3600
+    verifier.verify(cognito.token("ana@example.com"))
+    assert fetcher.calls == 2
+
+
+def test_unknown_key_ids_refresh_at_most_once_per_interval(verifier, cognito, fetcher, clock):
+    verifier.verify(cognito.token("ana@example.com"))
+    rotated = cognito.token("ana@example.com", key_id="rotated-key")
+
+    for _ in range(3):
+        with pytest.raises(TokenError, match="unknown key"):
+            verifier.verify(rotated)
+    assert fetcher.calls == 1
+
+    clock.now += 60
+    with pytest.raises(TokenError, match="unknown key"):
+        verifier.verify(rotated)
+    assert fetcher.calls == 2
+
+
+def test_failed_refresh_keeps_the_cached_keys(verifier, cognito, fetcher, clock):
+    verifier.verify(cognito.token("ana@example.com"))
+    fetcher.error = ConnectionError("cognito-idp unreachable")
+    clock.now += 3600
+
+    assert verifier.verify(cognito.token("ana@example.com"))["email"] == "ana@example.com"
+    assert fetcher.calls == 2
+
+
+def test_first_fetch_failure_is_a_token_error(verifier, cognito, fetcher):
+    fetcher.error = ConnectionError("cognito-idp unreachable")
+    with pytest.raises(TokenError, match="unavailable"):
+        verifier.verify(cognito.token("ana@example.com"))
+
+
+def test_failed_fetches_are_retried_at_most_once_per_interval(verifier, cognito, fetcher, clock):
+    fetcher.error = ConnectionError("cognito-idp unreachable")
+    for _ in range(3):
+        with pytest.raises(TokenError, match="unavailable"):
+            verifier.verify(cognito.token("ana@example.com"))
+    assert fetcher.calls == 1
+
+    fetcher.error = None
+    clock.now += 60
+    assert verifier.verify(cognito.token("ana@example.com"))["email"] == "ana@example.com"
+    assert fetcher.calls == 2
+
+
+def test_failed_refreshes_are_retried_at_most_once_per_interval(verifier, cognito, fetcher, clock):
+    verifier.verify(cognito.token("ana@example.com"))
+    fetcher.error = ConnectionError("cognito-idp unreachable")
+    clock.now += 3600
+
+    for _ in range(3):
+        verifier.verify(cognito.token("ana@example.com"))
+    assert fetcher.calls == 2
+
+    clock.now += 60
+    verifier.verify(cognito.token("ana@example.com"))
+    assert fetcher.calls == 3
+
+
+def test_rs256_tokens_are_verified():
+    pytest.importorskip("cryptography")
+    import jwt
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update(kid="rsa-key", alg="RS256", use="sig")
+    verifier = CognitoTokenVerifier("us-west-1_RSAPOOL", "rsaclient", fetch_jwks=lambda pool: {"keys": [jwk]})
+    claims = {"iss": verifier.issuer, "aud": "rsaclient", "token_use": "id", "exp": int(time.time()) + 60}
+    token = jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": "rsa-key"})
+
+    assert verifier.verify(token)["aud"] == "rsaclient"
+
+
+def user_event(method, token=None, email="ana@example.com"):
+    headers = {"authorization": f"Bearer {token}"} if token else {}
+    if method == "PATCH":
+        body = json.dumps({"email": email, "attribute_updates": {"custom:firstName": "Ana"}})
+        return {"httpMethod": method, "path": "/user", "headers": headers, "body": body}
+    return {"httpMethod": method, "path": "/user", "headers": headers, "queryStringParameters": {"email": email}}
+
+
+@pytest.mark.parametrize("method, target", [("GET", "get_user"), ("PATCH", "update_user"), ("DELETE", "delete_user")])
+def test_user_routes_require_a_token(cognito_tokens, method, target):
+    with patch(f"index.{target}", return_value=index.cors_response(200, {})) as mock_target:
+        response = lambda_handler(user_event(method), None)
+
+    assert response["statusCode"] == 401
+    mock_target.assert_not_called()
+
+
+@pytest.fixture
+def pool(cognito_tokens):
+    """The fake user pool from cognito_tokens, installed as index's Cognito client, with Ana and Bo."""
+    for email in ("ana@example.com", "bo@example.com"):
+        cognito_tokens.add_user(email, "Passw0rd!")
+    with installed(index, cognito=cognito_tokens):
+        yield cognito_tokens
+
+
+@pytest.mark.parametrize("method, target", [("GET", "get_user"), ("PATCH", "update_user"), ("DELETE", "delete_user")])
+@pytest.mark.parametrize("email", ["ana@example.com", "nobody@example.com"])
+def test_user_routes_reject_tokens_of_another_user(pool, method, target, email):
+    token = pool.token("bo@example.com")
+    with patch(f"index.{target}", return_value=index.cors_response(200, {})) as mock_target:
+        response = lambda_handler(user_event(method, token, email=email), None)
+
+    assert response["statusCode"] == 403
+    mock_target.assert_not_called()
+
+
+@pytest.mark.parametrize("method, target", [("GET", "get_user"), ("PATCH", "update_user"), ("DELETE", "delete_user")])
+def test_a_changed_email_claim_does_not_grant_access_to_its_owner(pool, method, target):
+    # Bo changed his email attribute to Ana's address and refreshed his tokens.
+    token = pool.token("bo@example.com", email="ana@example.com", email_verified=True)
+    with patch(f"index.{target}", return_value=index.cors_response(200, {})) as mock_target:
+        response = lambda_handler(user_event(method, token), None)
+
+    assert response["statusCode"] == 403
+    mock_target.assert_not_called()
+
+
+def test_users_keep_access_after_changing_their_email(pool):
+    def call(method, path, body=None, token=None, query=None):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        response = lambda_handler({"httpMethod": method, "path": path, "headers": headers, "queryStringParameters": query,
+                                   "body": json.dumps(body) if body is not None else None}, None)
+        return response["statusCode"], json.loads(response["body"])
+
+    _, login = call("POST", "/login", {"email": "ana@example.com", "password": "Passw0rd!"})
+    status, _ = call("PATCH", "/user", {"email": "ana@example.com", "attribute_updates": {"email": "ana.new@example.com"}},
+                     token=login["id_token"])
+    assert status == 200
+    status, refreshed = call("POST", "/token/refresh", {"refresh_token": login["refresh_token"]})
+    assert status == 200
+
+    status, body = call("GET", "/user", token=refreshed["id_token"], query={"email": "ana.new@example.com"})
+
+    assert status == 200
+    assert body["user_attributes"]["email"] == "ana.new@example.com"
+
+
+def test_pools_with_email_aliases_match_the_sub(pool):
+    # With email as a sign-in alias, cognito:username is the user's sub rather than the email.
+    ana = pool.users["ana@example.com"]
+    token = pool.token("ana@example.com", **{"cognito:username": ana.sub})
+    with patch("index.get_user", return_value=index.cors_response(200, {})):
+        assert lambda_handler(user_event("GET", token), None)["statusCode"] == 200
+
+
+def test_owner_lookup_failures_get_503(pool):
+    token = pool.token("bo@example.com")
+    with patch("index.fetch_user_attributes", side_effect=RuntimeError("cognito down")):
+        assert lambda_handler(user_event("GET", token), None)["statusCode"] == 503
+
+
+@pytest.mark.parametrize("token_use", ["id", "access"])
+def test_user_routes_accept_tokens_of_the_user(cognito_tokens, token_use):
+    token = cognito_tokens.token("Ana@Example.com", token_use=token_use)
+    with patch("index.get_user", return_value=index.cors_response(200, {})) as mock_get_user:
+        response = lambda_handler(user_event("GET", token, email=" ana@example.com"), None)
+
+    assert response["statusCode"] == 200
+    mock_get_user.assert_called_once_with(" ana@example.com")
+
+
+def test_expired_tokens_get_401(cognito_tokens):
+    token = cognito_tokens.token("ana@example.com", exp=int(time.time()) - 120)
+    response = lambda_handler(user_event("GET", token), None)
+
+    assert response["statusCode"] == 401
+    assert json.loads(response["body"])["message"] == "The token has expired."
+
+
+def test_verification_can_be_switched_off():
+    with patch("index.USER_ROUTES_REQUIRE_AUTH", False), \
+            patch("index.get_user", return_value=index.cors_response(200, {})) as mock_get_user, \
+            patch("index.jwks_fetcher", MagicMock()) as mock_fetcher:
+        response = lambda_handler(user_event("GET"), None)
+
+    assert response["statusCode"] == 200
+    mock_get_user.assert_called_once()
+    mock_fetcher.assert_not_called()
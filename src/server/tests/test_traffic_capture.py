@@ -0,0 +1,127 @@
+import os
+import sys
+import gzip
+import json
+import pytest
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import index
+from index import REDACTED, TrafficRecorder, pseudonymize_email, sanitize
+from tools.replay import ReplayStandIns, parse_speed, read_capture, replay
+
+
+def test_sanitize_redacts_secrets_and_pseudonymizes_emails():
+    body = {
+        "email": "Ana@Example.com",
+        "password": "hunter2",
+        "attribute_updates": {"password": "hunter3", "custom:firstName": "Ana"},
+        "items": [{"access_token": "abc"}],
+        "amount": 10,
+    }
+
+    assert sanitize(body) == {
+        "email": pseudonymize_email("ana@example.com"),
+        "password": REDACTED,
+        "attribute_updates": {"password": REDACTED, "custom:firstName": "Ana"},
+        "items": [{"access_token": REDACTED}],
+        "amount": 10,
+    }
+    assert sanitize({"Authorization": "Bearer x", "Accept": "application/json"}) == {
+        "Authorization": REDACTED, "Accept": "application/json",
+    }
+
+
+def test_pseudonyms_are_stable_and_hide_the_address():
+    pseudonym = pseudonymize_email("ana@example.com")
+    assert pseudonym == pseudonymize_email(" ANA@example.com")
+    assert "ana" not in pseudonym and pseudonym.endswith("@example.invalid")
+
+
+def test_capture_writes_one_sanitized_line_per_invocation(tmp_path):
+    path = str(tmp_path / "capture-{pid}.jsonl.gz")
+    recorder = TrafficRecorder(path)
+    login = {"httpMethod": "POST", "path": "/login", "queryStringParameters": None,
+             "headers": {"Authorization": "Bearer x"}, "body": '{"email": "ana@example.com", "password": "pw"}'}
+    with patch("index.traffic_recorder", recorder), patch("index.log_in", return_value=index.cors_response(200, {})):
+        index.lambda_handler(login, None)
+        index.lambda_handler({"httpMethod": "OPTIONS", "path": "/login", "body": "not json"}, None)
+    recorder.close()
+
+    assert recorder.path == str(tmp_path / f"capture-{os.getpid()}.jsonl.gz")
+    with gzip.open(recorder.path, "rt") as capture:
+        records = [json.loads(line) for line in capture]
+    assert [(record["method"], record["path"], record["status"]) for record in records] == [
+        ("POST", "/login", 200), ("OPTIONS", "/login", 200),
+    ]
+    assert records[0]["body"] == {"email": pseudonymize_email("ana@example.com"), "password": REDACTED}
+    assert records[0]["headers"] == {"Authorization": REDACTED}
+    assert records[1]["body"] == REDACTED
+    assert records[0]["t"] <= records[1]["t"] and records[0]["duration_ms"] >= 0
+
+
+def test_capture_is_off_by_default():
+    assert index.traffic_recorder is None
+
+
+@pytest.mark.parametrize("speed, expected", [("1x", 1.0), ("10x", 10.0), ("2.5", 2.5), ("max", None)])
+def test_parse_speed(speed, expected):
+    assert parse_speed(speed) == expected
+
+
+def test_replay_fills_in_redacted_values(tmp_path):
+    returning = pseudonymize_email("ana@example.com")
+    newcomer = pseudonymize_email("bo@example.com")
+    records = [
+        {"t": 0.00, "method": "POST", "path": "/signup", "query": None, "headers": {}, "status": 200, "duration_ms": 80,
+         "body": {"email": newcomer, "password": REDACTED, "first_name": "Bo", "last_name": "Li"}},
+        {"t": 0.01, "method": "POST", "path": "/login", "query": None, "headers": {}, "status": 200, "duration_ms": 90,
+         "body": {"email": returning, "password": REDACTED}},
+        {"t": 0.02, "method": "GET", "path": "/user", "query": {"email": returning},
+         "headers": {"Authorization": REDACTED}, "body": None, "status": 200, "duration_ms": 40},
+        {"t": 0.025, "method": "POST", "path": "/token/refresh", "query": None, "headers": {}, "status": 200,
+         "duration_ms": 60, "body": {"refresh_token": REDACTED}},
+        {"t": 0.03, "method": "POST", "path": "/confirm-email", "query": None, "headers": {}, "status": 200,
+         "duration_ms": 50, "body": {"access_token": REDACTED, "confirmation_code": REDACTED}},
+        {"t": 0.04, "method": "POST", "path": "/create-paypal-order", "query": None, "headers": {}, "status": 200,
+         "duration_ms": 300, "body": {"amount": 25, "custom_id": "donation-1"}},
+    ]
+    path = tmp_path / "capture.jsonl.gz"
+    with gzip.open(path, "wt") as capture:
+        for record in reversed(records):
+            capture.write(json.dumps(record) + "\n")
+
+    summary = replay(read_capture(str(path)), speed="max", workers=2)
+
+    assert summary["requests"] == 6
+    for route, stats in summary["routes"].items():
+        assert stats["status_codes"] == {"200": 1}, route
+        assert stats["status_mismatches"] == 0
+    assert summary["routes"]["POST /login"]["recorded_p50_ms"] == 90
+
+
+def test_replay_counts_failed_records_and_keeps_going():
+    email = pseudonymize_email("ana@example.com")
+    records = [
+        {"t": n / 100, "method": "POST", "path": "/login", "query": None, "headers": {}, "status": 200,
+         "body": {"email": email, "password": REDACTED}}
+        for n in range(4)
+    ]
+    stand_ins = ReplayStandIns()
+    materialize = stand_ins.materialize
+    calls = []
+
+    def flaky_materialize(record):
+        calls.append(record)
+        if len(calls) == 2:
+            raise RuntimeError("stand-in broke")
+        return materialize(record)
+
+    stand_ins.materialize = flaky_materialize
+    summary = replay(records, speed="max", workers=1, stand_ins=stand_ins)
+
+    stats = summary["routes"]["POST /login"]
+    assert summary["requests"] == 4
+    assert stats["status_codes"] == {"0": 1, "200": 3}
+    assert stats["errors"] == {"RuntimeError: stand-in broke": 1}
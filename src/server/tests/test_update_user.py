@@ -148,3 +148,16 @@ def test_update_user(
     elif expected_status == 200:
         # Success scenario.
         assert body["message"] == "User attributes updated successfully"
+
+
+@pytest.mark.parametrize("attribute", ["email_verified", "phone_number_verified", "sub", "cognito:username"])
+def test_update_user_rejects_protected_attributes(mock_ssm_and_cognito, attribute):
+    _, mock_cognito_client = mock_ssm_and_cognito
+    from index import update_user
+
+    response = update_user("user@example.com", {"custom:firstName": "Jane", attribute: "true"})
+
+    assert response["statusCode"] == 400
+    assert attribute in json.loads(response["body"])["message"]
+    mock_cognito_client.admin_update_user_attributes.assert_not_called()
+    mock_cognito_client.admin_set_user_password.assert_not_called()
@@ -0,0 +1,183 @@
+import os
+import sys
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import index
+from conftest import FakeClock
+from index import SqliteUserCacheStore, UserCache
+
+
+class MemoryStore:
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key, (None, None))[0]
+
+    def put(self, key, value, expires_at):
+        self.values[key] = (value, expires_at)
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(1_700_000_000.0)
+
+
+@pytest.fixture
+def cognito():
+    """Patch SSM and Cognito; admin_get_user answers with the attributes of the requested user."""
+    mock_ssm = MagicMock()
+    mock_ssm.get_parameter.return_value = {"Parameter": {"Value": "fake_user_pool_id"}}
+    mock_client = MagicMock()
+    mock_client.admin_get_user.side_effect = lambda UserPoolId, Username: {
+        "Username": Username,
+        "UserAttributes": [{"Name": "email", "Value": Username}, {"Name": "email_verified", "Value": "false"}],
+    }
+    with patch("index.ssm", mock_ssm), patch("index.client", mock_client):
+        yield mock_client
+
+
+def test_entries_are_served_until_they_expire(clock):
+    cache = UserCache(ttl=30, clock=clock)
+    load = MagicMock(side_effect=[{"v": 1}, {"v": 2}])
+
+    assert cache.get("k", load) == {"v": 1}
+    clock.now += 29
+    assert cache.get("k", load) == {"v": 1}
+    clock.now += 1
+    assert cache.get("k", load) == {"v": 2}
+    assert load.call_count == 2
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = UserCache(ttl=30, max_entries=2, clock=clock)
+    cache.get("a", lambda: "a1")
+    cache.get("b", lambda: "b1")
+    cache.get("a", lambda: "a2")  # a is now the most recently used.
+    cache.get("c", lambda: "c1")
+
+    assert cache.get("a", lambda: "a3") == "a1"
+    assert cache.get("b", lambda: "b2") == "b2"
+
+
+def test_errors_are_not_cached(clock):
+    cache = UserCache(ttl=30, clock=clock)
+    with pytest.raises(RuntimeError):
+        cache.get("k", MagicMock(side_effect=RuntimeError("cognito down")))
+
+    assert cache.get("k", lambda: "loaded") == "loaded"
+
+
+def test_zero_ttl_turns_the_cache_off(clock):
+    cache = UserCache(ttl=0, clock=clock)
+    load = MagicMock(return_value="v")
+    cache.get("k", load)
+    cache.get("k", load)
+
+    assert load.call_count == 2
+
+
+def test_invalidation_during_a_load_keeps_the_stale_result_out(clock):
+    cache = UserCache(ttl=30, clock=clock)
+
+    def load_then_write():
+        cache.invalidate("k")  # An update lands while admin_get_user is in flight.
+        return "stale"
+
+    assert cache.get("k", load_then_write) == "stale"
+    assert cache.get("k", lambda: "fresh") == "fresh"
+
+
+def test_the_shared_store_serves_other_containers(clock):
+    store = MemoryStore()
+    first, second = UserCache(store, ttl=30, clock=clock), UserCache(store, ttl=30, clock=clock)
+    first.get("k", lambda: {"custom:firstName": "Ana"})
+
+    assert second.get("k", MagicMock(side_effect=AssertionError("loaded"))) == {"custom:firstName": "Ana"}
+
+    second.invalidate("k")
+    first.clear()
+    assert first.get("k", lambda: {"custom:firstName": "Bo"}) == {"custom:firstName": "Bo"}
+
+
+def test_a_failing_store_is_bypassed(clock):
+    store = MagicMock()
+    store.get.side_effect = store.put.side_effect = store.delete.side_effect = OSError("disk full")
+    cache = UserCache(store, ttl=30, clock=clock)
+
+    assert cache.get("k", lambda: "v") == "v"
+    cache.invalidate("k")
+    assert cache.get("k", lambda: "w") == "w"
+
+
+def test_sqlite_store_round_trip_and_expiry(tmp_path):
+    store = SqliteUserCacheStore(str(tmp_path / "users.db"))
+    store.put("live", '{"a": 1}', expires_at=4_000_000_000)
+    store.put("expired", '{"a": 2}', expires_at=1)
+
+    assert store.get("live") == '{"a": 1}'
+    assert store.get("expired") is None
+    store.delete("live")
+    assert store.get("live") is None
+
+
+def test_get_user_reads_through_the_cache(cognito):
+    first = index.get_user("ana@example.com")
+    second = index.get_user(" Ana@Example.com")
+
+    assert json.loads(first["body"]) == json.loads(second["body"])
+    assert cognito.admin_get_user.call_count == 1
+
+
+@pytest.mark.parametrize("write", [
+    lambda: index.update_user("ana@example.com", {"custom:firstName": "Ana"}),
+    lambda: index.delete_user("ana@example.com"),
+    lambda: index.sign_up("pw", "ana@example.com", "Ana", "Li"),
+])
+def test_writes_invalidate_the_user(cognito, write):
+    index.get_user("ana@example.com")
+    assert write()["statusCode"] == 200
+    index.get_user("ana@example.com")
+
+    assert cognito.admin_get_user.call_count == 2
+
+
+def test_confirming_the_email_invalidates_the_token_owner(cognito):
+    import jwt
+    access_token = jwt.encode({"username": "ana@example.com"}, "k" * 32, algorithm="HS256")
+    index.get_user("ana@example.com")
+    index.get_user("bo@example.com")
+
+    assert index.confirm_email(access_token, "123456")["statusCode"] == 200
+    index.get_user("ana@example.com")
+    index.get_user("bo@example.com")
+
+    assert [call.kwargs["Username"] for call in cognito.admin_get_user.call_args_list] == [
+        "ana@example.com", "bo@example.com", "ana@example.com",
+    ]
+
+
+def test_failed_writes_keep_the_entry(cognito):
+    cognito.exceptions.UserNotFoundException = type("UserNotFoundException", (Exception,), {})
+    cognito.admin_delete_user.side_effect = cognito.exceptions.UserNotFoundException()
+    index.get_user("ana@example.com")
+
+    assert index.delete_user("ana@example.com")["statusCode"] == 404
+    index.get_user("ana@example.com")
+    assert cognito.admin_get_user.call_count == 1
+
+
+def test_set_user_cache_store_returns_the_previous_store():
+    store = MemoryStore()
+    previous = index.set_user_cache_store(store)
+    try:
+        assert index.user_cache.store is store
+    finally:
+        assert index.set_user_cache_store(previous) is store
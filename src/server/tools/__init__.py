@@ -0,0 +1,6 @@
+"""
+Local development and performance tooling for the RCW client backend.
+
+Nothing in this package is deployed; the Lambda bundle only contains index.py.
+Run the tools from the src/server directory, e.g. ``python -m tools.benchmark``.
+"""
@@ -0,0 +1,178 @@
+"""
+Push simulated users through the auth and contact flows of lambda_handler.
+
+Each simulated user signs up, is confirmed, logs in, verifies their email, reads
+and updates their profile, resets their password, logs in again and sends a
+contact message. All of this runs against the in-memory Cognito and SES fakes
+(tools.fake_aws), and SSM values are pre-seeded in index's parameter cache, so no
+AWS access is needed. With zero fake latency, the timings are the handler
+overhead itself.
+
+Usage:
+    python -m tools.auth_load --users 2000 --threads 8
+    python -m tools.auth_load --users 500 --cognito-latency lognormal:20:0.5 --cognito-max-rps 120
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import index
+from tools.benchmark import percentile
+from tools.events import FakeLambdaContext, api_gateway_event
+from tools.fake_aws import FakeCognito, FakeSES, installed
+
+LOAD_ENVIRONMENT = "load"
+PASSWORD = "Str0ng!Passw0rd"
+NEW_PASSWORD = "N3w!Passw0rd#2"
+
+
+def seed_parameters(cognito, ses_sender="noreply@example.com", ses_recipient="office@example.com"):
+    """Put the SSM values the auth routes read straight into index's parameter cache."""
+    namespace = f"/rcw-client-backend-{LOAD_ENVIRONMENT}/"
+    values = {
+        "COGNITO_USER_POOL_ID": cognito.user_pool_id,
+        "COGNITO_CLIENT_ID": cognito.client_id,
+        "SESIdentitySenderParameter": ses_sender,
+        "SESRecipientParameter": ses_recipient,
+    }
+    for name, value in values.items():
+        index.ssm_parameter_cache.put(namespace + name, value, ttl=365 * 24 * 3600)
+
+
+class UserJourney:
+    """Runs one user through every auth route, recording (route, status, milliseconds) per step."""
+
+    def __init__(self, number, cognito):
+        self.email = f"member{number}@example.com"
+        self.cognito = cognito
+        self.results = []
+
+    def call(self, method, path, body=None, query=None, headers=None):
+        event = api_gateway_event(method, path, body=body, query=query, headers=headers)
+        started_at = time.perf_counter()
+        response = index.lambda_handler(event, FakeLambdaContext())
+        self.results.append((f"{method} {path}", response["statusCode"], (time.perf_counter() - started_at) * 1000))
+        return response["statusCode"], json.loads(response["body"])
+
+    def run(self):
+        email = self.email
+        self.call("POST", "/signup", {"email": email, "password": PASSWORD, "first_name": "Load", "last_name": "User"})
+        self.call("POST", "/confirm", {"email": email})
+        status, body = self.call("POST", "/login", {"email": email, "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {body['id_token']}"} if status == 200 else None
+        if status == 200:
+            access_token = body["access_token"]
+            self.call("POST", "/confirm-email-resend", {"access_token": access_token})
+            code = self.cognito.last_code(email, "verify_email")
+            self.call("POST", "/confirm-email", {"access_token": access_token, "confirmation_code": code})
+        if status == 200:
+            self.call("POST", "/token/refresh", {"refresh_token": body["refresh_token"]})
+        self.call("GET", "/user", query={"email": email}, headers=headers)
+        self.call("PATCH", "/user", {"email": email, "attribute_updates": {"custom:firstName": "Renamed"}}, headers=headers)
+        self.call("POST", "/forgot-password", {"email": email})
+        code = self.cognito.last_code(email, "forgot_password")
+        self.call("POST", "/confirm-forgot-password",
+                  {"email": email, "confirmation_code": code, "new_password": NEW_PASSWORD})
+        self.call("POST", "/login", {"email": email, "password": NEW_PASSWORD})
+        self.call("POST", "/contact-us", {"first_name": "Load", "email": email, "message": "Hello from the load test"})
+        return self.results
+
+
+def run_load(users=100, threads=1, cognito=None, ses=None):
+    """
+    Run the journeys and return per-route statistics.
+
+    :param users: Number of simulated users.
+    :param threads: Concurrent journeys.
+    :param cognito: FakeCognito to use (a zero-latency one by default).
+    :param ses: FakeSES to use (a zero-latency one by default).
+    """
+    cognito = cognito or FakeCognito()
+    ses = ses or FakeSES()
+    previous_environment = os.environ.get("ENVIRONMENT")
+    os.environ["ENVIRONMENT"] = LOAD_ENVIRONMENT
+    previous_sink = index.set_metrics_sink(lambda record: json.dumps(record))
+    index.clear_caches()
+    seed_parameters(cognito)
+
+    try:
+        with installed(index, cognito=cognito, ses=ses):
+            started_at = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                journeys = list(pool.map(lambda number: UserJourney(number, cognito).run(), range(users)))
+            wall_seconds = time.perf_counter() - started_at
+    finally:
+        index.set_metrics_sink(previous_sink)
+        index.clear_caches()
+        if previous_environment is None:
+            os.environ.pop("ENVIRONMENT", None)
+        else:
+            os.environ["ENVIRONMENT"] = previous_environment
+
+    durations = defaultdict(list)
+    statuses = defaultdict(Counter)
+    for results in journeys:
+        for route, status, milliseconds in results:
+            durations[route].append(milliseconds)
+            statuses[route][status] += 1
+
+    routes = {}
+    for route, values in durations.items():
+        values.sort()
+        routes[route] = {
+            "requests": len(values),
+            "status_codes": {str(status): count for status, count in sorted(statuses[route].items())},
+            "p50_ms": round(percentile(values, 0.50), 3),
+            "p95_ms": round(percentile(values, 0.95), 3),
+            "p99_ms": round(percentile(values, 0.99), 3),
+        }
+    total = sum(route["requests"] for route in routes.values())
+    return {
+        "users": users,
+        "threads": threads,
+        "requests": total,
+        "throughput_rps": round(total / wall_seconds, 1),
+        "cognito_calls": dict(cognito.calls),
+        "cognito_throttled": dict(cognito.throttled),
+        "emails_sent": len(ses.sent),
+        "routes": routes,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run simulated users through the auth flows.")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--cognito-latency", default="0", help='Latency spec, e.g. "lognormal:20:0.5".')
+    parser.add_argument("--cognito-throttle-rate", type=float, default=0.0)
+    parser.add_argument("--cognito-max-rps", type=float, default=None, help="Token-bucket limit on Cognito calls.")
+    parser.add_argument("--ses-latency", default="0")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default=None, help="Write the results as JSON.")
+    args = parser.parse_args(argv)
+
+    cognito = FakeCognito(latency=args.cognito_latency, throttle_rate=args.cognito_throttle_rate,
+                          max_rps=args.cognito_max_rps, seed=args.seed)
+    ses = FakeSES(latency=args.ses_latency, seed=args.seed)
+    results = run_load(args.users, args.threads, cognito, ses)
+
+    print(f"{results['users']} users, {results['requests']} requests, {results['throughput_rps']} req/s")
+    print(f"{'route':<30}{'requests':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  status codes")
+    for route, stats in results["routes"].items():
+        print(f"{route:<30}{stats['requests']:>9}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}"
+              f"{stats['p99_ms']:>9.2f}  {stats['status_codes']}")
+    if results["cognito_throttled"]:
+        print(f"Throttled Cognito calls: {results['cognito_throttled']}")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(results, output_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
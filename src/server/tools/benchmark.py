@@ -0,0 +1,425 @@
+"""
+Offline benchmark for lambda_handler.
+
+Drives every registered route with realistic API Gateway events against local
+stand-ins: botocore Stubber for Cognito, SES and SSM, and the fake PayPal server
+(tools.fake_paypal) with configurable latency. Nothing leaves the machine.
+
+For each route it reports the cold (first) call, p50/p95/p99 latency of the warm
+calls, throughput, and the number of downstream calls per invocation. The results
+are written as JSON so runs can be compared.
+
+Usage:
+    python -m tools.benchmark --iterations 200 --paypal-latency-ms 20
+    python -m tools.benchmark --output after.json --compare before.json
+    python -m tools.benchmark --route "POST /create-paypal-order" --paypal-latency lognormal:40:0.6 --paypal-throttle-rate 0.05
+"""
+import argparse
+import base64
+import json
+import os
+import platform
+import sys
+import time
+import uuid
+from collections import Counter
+
+import jwt
+from botocore.stub import Stubber
+
+import index
+from tools.events import FakeLambdaContext, api_gateway_event
+from tools.fake_paypal import Faults, FakePayPalServer
+
+BENCHMARK_ENVIRONMENT = "bench"
+SSM_NAMESPACE = f"/rcw-client-backend-{BENCHMARK_ENVIRONMENT}/"
+SSM_VALUES = {
+    "COGNITO_USER_POOL_ID": "us-west-1_BENCHPOOL",
+    "COGNITO_CLIENT_ID": "benchclientid0123456789",
+    "PAYPAL_CLIENT_ID": "bench-paypal-client-id",
+    "PAYPAL_SECRET": "bench-paypal-secret",
+    "SESIdentitySenderParameter": "noreply@example.com",
+    "SESRecipientParameter": "office@example.com",
+}
+
+
+# Throwaway HS256 key the benchmark's tokens are signed with, served as the user pool's JWKS.
+SIGNING_KEY = "benchmark-signing-key-for-local-runs-only"
+SIGNING_KEY_ID = "benchmark-key"
+JWKS = {"keys": [{
+    "kty": "oct", "kid": SIGNING_KEY_ID, "alg": "HS256", "use": "sig",
+    "k": base64.urlsafe_b64encode(SIGNING_KEY.encode()).rstrip(b"=").decode(),
+}]}
+
+
+def id_token(email, groups=()):
+    """Build a Cognito-shaped ID token for the benchmark user pool."""
+    now = int(time.time())
+    claims = {
+        "sub": str(uuid.uuid4()),
+        "email_verified": True,
+        "iss": "https://cognito-idp.us-west-1.amazonaws.com/us-west-1_BENCHPOOL",
+        "cognito:username": email,
+        "custom:firstName": "Bench",
+        "custom:lastName": "User",
+        "aud": SSM_VALUES["COGNITO_CLIENT_ID"],
+        "token_use": "id",
+        "auth_time": now,
+        "exp": now + 3600,
+        "iat": now,
+        "email": email,
+    }
+    if groups:
+        claims["cognito:groups"] = list(groups)
+    return jwt.encode(claims, SIGNING_KEY, algorithm="HS256", headers={"kid": SIGNING_KEY_ID})
+
+
+def code_delivery():
+    return {"CodeDeliveryDetails": {"Destination": "b***@e***", "DeliveryMedium": "EMAIL", "AttributeName": "email"}}
+
+
+# Cognito operation -> canned response builder (shapes follow the Cognito API model).
+COGNITO_RESPONSES = {
+    "sign_up": lambda email: {"UserConfirmed": False, "UserSub": str(uuid.uuid4())},
+    "admin_confirm_sign_up": lambda email: {},
+    "verify_user_attribute": lambda email: {},
+    "get_user_attribute_verification_code": lambda email: code_delivery(),
+    "initiate_auth": lambda email: {
+        "ChallengeParameters": {},
+        "AuthenticationResult": {
+            "AccessToken": "bench-access-token",
+            "ExpiresIn": 3600,
+            "TokenType": "Bearer",
+            "RefreshToken": "bench-refresh-token",
+            "IdToken": id_token(email),
+        },
+    },
+    "forgot_password": lambda email: code_delivery(),
+    "confirm_forgot_password": lambda email: {},
+    "admin_get_user": lambda email: {
+        "Username": email,
+        "UserAttributes": [
+            {"Name": "sub", "Value": str(uuid.uuid4())},
+            {"Name": "email_verified", "Value": "true"},
+            {"Name": "custom:firstName", "Value": "Bench"},
+            {"Name": "custom:lastName", "Value": "User"},
+            {"Name": "email", "Value": email},
+        ],
+        "Enabled": True,
+        "UserStatus": "CONFIRMED",
+    },
+    "admin_set_user_password": lambda email: {},
+    "admin_update_user_attributes": lambda email: {},
+    "admin_delete_user": lambda email: {},
+}
+
+SES_RESPONSES = {
+    "send_email": lambda email: {"MessageId": f"0100018f-{uuid.uuid4()}-000000"},
+}
+
+
+class Scenario:
+    """
+    One benchmarked route: how to build its event and which AWS operations it may call.
+
+    :param method: HTTP method.
+    :param path: Route path.
+    :param build: Callable taking (iteration, email) and returning (body, query).
+    :param cognito: Cognito operations to stub, in call order.
+    :param ses: SES operations to stub, in call order.
+    :param authorized: Send the user's ID token as a bearer token.
+    :param groups: Cognito groups the user's ID token lists.
+    """
+
+    def __init__(self, method, path, build, cognito=(), ses=(), authorized=False, groups=()):
+        self.method = method
+        self.path = path
+        self.build = build
+        self.cognito = cognito
+        self.ses = ses
+        self.authorized = authorized
+        self.groups = groups
+
+    @property
+    def name(self):
+        return f"{self.method} {self.path}"
+
+    def event(self, iteration):
+        email = f"member{iteration}@example.com"
+        body, query = self.build(iteration, email)
+        headers = {"Authorization": f"Bearer {id_token(email, self.groups)}"} if self.authorized else None
+        return email, api_gateway_event(self.method, self.path, body=body, query=query, headers=headers)
+
+
+# Operations per benchmarked bulk request: below the default write burst, so none waits on the limiter.
+BULK_OPERATIONS = 4
+
+SCENARIOS = [
+    Scenario("POST", "/signup", lambda i, email: (
+        {"email": email, "password": "Str0ng!Passw0rd", "first_name": "Bench", "last_name": "User"}, None),
+        cognito=("sign_up",)),
+    Scenario("POST", "/confirm", lambda i, email: ({"email": email}, None), cognito=("admin_confirm_sign_up",)),
+    Scenario("POST", "/confirm-email", lambda i, email: (
+        {"access_token": "bench-access-token", "confirmation_code": "123456"}, None),
+        cognito=("verify_user_attribute",)),
+    Scenario("POST", "/confirm-email-resend", lambda i, email: ({"access_token": "bench-access-token"}, None),
+             cognito=("get_user_attribute_verification_code",)),
+    Scenario("POST", "/login", lambda i, email: ({"email": email, "password": "Str0ng!Passw0rd"}, None),
+             cognito=("initiate_auth",)),
+    Scenario("POST", "/token/refresh", lambda i, email: ({"refresh_token": "bench-refresh-token"}, None),
+             cognito=("initiate_auth",)),
+    Scenario("POST", "/forgot-password", lambda i, email: ({"email": email}, None), cognito=("forgot_password",)),
+    Scenario("POST", "/confirm-forgot-password", lambda i, email: (
+        {"email": email, "confirmation_code": "123456", "new_password": "N3w!Passw0rd"}, None),
+        cognito=("confirm_forgot_password",)),
+    Scenario("GET", "/user", lambda i, email: (None, {"email": email}), cognito=("admin_get_user",), authorized=True),
+    Scenario("PATCH", "/user", lambda i, email: (
+        {"email": email, "attribute_updates": {"custom:firstName": "Renamed"}}, None),
+        cognito=("admin_update_user_attributes",), authorized=True),
+    Scenario("DELETE", "/user", lambda i, email: (None, {"email": email}), cognito=("admin_delete_user",),
+             authorized=True),
+    Scenario("POST", "/admin/users/batch", lambda i, email: (
+        {"operations": [{"action": "update", "email": f"roster{n}-{email}", "attribute_updates": {"custom:lastName": "Li"}}
+                        for n in range(BULK_OPERATIONS)]}, None),
+        cognito=("admin_update_user_attributes",) * BULK_OPERATIONS, authorized=True, groups=("admin",)),
+    Scenario("POST", "/contact-us", lambda i, email: (
+        {"first_name": "Bench", "email": email, "message": "Service times this Sunday?"}, None),
+        ses=("send_email",)),
+    Scenario("POST", "/create-paypal-order", lambda i, email: (
+        {"amount": 25, "custom_id": f"donation-{i}", "currency": "USD"}, None)),
+    Scenario("POST", "/create-paypal-subscription", lambda i, email: (
+        {"amount": 10 + i % 3 * 5, "custom_id": f"weekly-{i}"}, None)),
+]
+
+
+def ssm_page():
+    return {"Parameters": [
+        {"Name": SSM_NAMESPACE + name, "Type": "SecureString", "Value": value, "Version": 1}
+        for name, value in SSM_VALUES.items()
+    ]}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class DownstreamCounter:
+    """Counts AWS operations (via botocore events) and PayPal requests (via the fake server)."""
+
+    def __init__(self, clients, paypal):
+        self.aws_calls = Counter()
+        self.paypal = paypal
+        self.clients = clients
+        for service, aws_client in clients.items():
+            aws_client.meta.events.register(
+                "before-parameter-build.*.*",
+                lambda model, service=service, **kwargs: self.aws_calls.update([f"{service}.{model.name}"]),
+                unique_id=f"benchmark-counter-{service}",
+            )
+
+    def serve_jwks(self, user_pool_id):
+        """Stand-in for the user pool's JWKS download, counted like the other downstream calls."""
+        self.aws_calls.update(["cognito-idp.GetJWKS"])
+        return JWKS
+
+    def close(self):
+        for service, aws_client in self.clients.items():
+            aws_client.meta.events.unregister("before-parameter-build.*.*", unique_id=f"benchmark-counter-{service}")
+
+    def reset(self):
+        self.aws_calls.clear()
+        self.paypal.reset_calls()
+
+    def snapshot(self):
+        calls = Counter(self.aws_calls)
+        calls.update({f"paypal.{key}": value for key, value in self.paypal.calls.items()})
+        return calls
+
+
+def invoke(scenario, iteration, clients, ssm_client):
+    """Run one request with fresh stubs queued for every AWS call it may make; return (ms, status)."""
+    email, event = scenario.event(iteration)
+    cognito_client, ses_client = clients["cognito-idp"], clients["ses"]
+
+    with Stubber(cognito_client) as cognito_stub, Stubber(ses_client) as ses_stub, Stubber(ssm_client) as ssm_stub:
+        for operation in scenario.cognito:
+            cognito_stub.add_response(operation, COGNITO_RESPONSES[operation](email))
+        for operation in scenario.ses:
+            ses_stub.add_response(operation, SES_RESPONSES[operation](email))
+        ssm_stub.add_response("get_parameters_by_path", ssm_page())
+
+        context = FakeLambdaContext()
+        start = time.perf_counter()
+        response = index.lambda_handler(event, context)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+    return elapsed_ms, response["statusCode"]
+
+
+def benchmark_scenario(scenario, iterations, warmup, clients, ssm_client, counter):
+    """Benchmark one route: a cold call, warm-up calls, then the measured warm calls."""
+    index.clear_caches()
+    counter.reset()
+    cold_ms, cold_status = invoke(scenario, 0, clients, ssm_client)
+    cold_calls = counter.snapshot()
+
+    for iteration in range(1, warmup + 1):
+        invoke(scenario, iteration, clients, ssm_client)
+
+    counter.reset()
+    durations = []
+    statuses = Counter()
+    started = time.perf_counter()
+    for iteration in range(warmup + 1, warmup + 1 + iterations):
+        elapsed_ms, status = invoke(scenario, iteration, clients, ssm_client)
+        durations.append(elapsed_ms)
+        statuses[status] += 1
+    wall_seconds = time.perf_counter() - started
+
+    durations.sort()
+    warm_calls = counter.snapshot()
+    return {
+        "iterations": iterations,
+        "errors": sum(count for status, count in statuses.items() if status >= 500),
+        "status_codes": {str(status): count for status, count in sorted(statuses.items())},
+        "cold_ms": round(cold_ms, 3),
+        "cold_status": cold_status,
+        "cold_downstream_calls": dict(sorted(cold_calls.items())),
+        "p50_ms": round(percentile(durations, 0.50), 3),
+        "p95_ms": round(percentile(durations, 0.95), 3),
+        "p99_ms": round(percentile(durations, 0.99), 3),
+        "mean_ms": round(sum(durations) / len(durations), 3),
+        "max_ms": round(durations[-1], 3),
+        # Handler-only throughput; stub setup between requests is excluded from the latency numbers.
+        "throughput_rps": round(iterations / wall_seconds, 1),
+        "downstream_calls_per_request": {
+            key: round(value / iterations, 3) for key, value in sorted(warm_calls.items())
+        },
+    }
+
+
+def configure_environment(paypal):
+    """Point index.py at the local stand-ins and give boto3 dummy credentials."""
+    os.environ.update(paypal.env())
+    os.environ["ENVIRONMENT"] = BENCHMARK_ENVIRONMENT
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-west-1")
+    os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+    os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+
+
+def run_benchmark(iterations=100, warmup=5, paypal_latency_ms=0.0, routes=None, paypal_latency=None, paypal_faults=None):
+    """
+    Benchmark every route (or the named subset) and return the results dictionary.
+
+    :param iterations: Measured warm invocations per route.
+    :param warmup: Unmeasured invocations after the cold call.
+    :param paypal_latency_ms: Latency the fake PayPal server adds to every request.
+    :param routes: Optional list of route names such as "POST /login".
+    :param paypal_latency: Latency distribution spec for the fake PayPal server; overrides paypal_latency_ms.
+    :param paypal_faults: Faults the fake PayPal server injects into every endpoint.
+    """
+    scenarios = [scenario for scenario in SCENARIOS if not routes or scenario.name in routes]
+    registered = {f"{method} {path}" for path, method in index.ROUTES}
+    missing = registered - {scenario.name for scenario in SCENARIOS}
+    if missing:
+        raise RuntimeError(f"No benchmark scenario for routes: {sorted(missing)}")
+
+    latency = paypal_latency or paypal_latency_ms / 1000.0
+    with FakePayPalServer(latency=latency, faults=paypal_faults) as paypal:
+        configure_environment(paypal)
+        clients = {"cognito-idp": index.get_cognito_client(), "ses": index.get_ses_client()}
+        ssm_client = index.get_ssm_client()
+        counter = DownstreamCounter(dict(clients, ssm=ssm_client), paypal)
+        previous_fetcher = index.set_jwks_fetcher(counter.serve_jwks)
+        # Keep the cost of building and serializing the EMF record, but not the terminal output.
+        previous_sink = index.set_metrics_sink(lambda record: json.dumps(record))
+        # The stubs have no Cognito quota; waiting on the bulk rate limits would only measure the limiter.
+        previous_limits = dict(index.bulk_rate_limits)
+        index.bulk_rate_limits.update(read=index.TokenBucket(0), write=index.TokenBucket(0))
+
+        results = {}
+        try:
+            for scenario in scenarios:
+                results[scenario.name] = benchmark_scenario(scenario, iterations, warmup, clients, ssm_client, counter)
+        finally:
+            index.set_metrics_sink(previous_sink)
+            index.set_jwks_fetcher(previous_fetcher)
+            index.bulk_rate_limits.update(previous_limits)
+            counter.close()
+            index.clear_caches()
+
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {
+            "iterations": iterations,
+            "warmup": warmup,
+            "paypal_latency": repr(paypal.latency),
+            "paypal_faults": vars(paypal.faults),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "routes": results,
+    }
+
+
+def format_report(results, baseline=None):
+    """Render the results (and deltas against a baseline run) as a text table."""
+    lines = [
+        f"{'route':<34}{'cold ms':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'err':>5}  downstream/request",
+    ]
+    for name, route in results["routes"].items():
+        calls = ", ".join(f"{key}={value:g}" for key, value in route["downstream_calls_per_request"].items()) or "-"
+        lines.append(
+            f"{name:<34}{route['cold_ms']:>9.2f}{route['p50_ms']:>9.2f}{route['p95_ms']:>9.2f}"
+            f"{route['p99_ms']:>9.2f}{route['throughput_rps']:>9.1f}{route['errors']:>5}  {calls}"
+        )
+        previous = (baseline or {}).get("routes", {}).get(name)
+        if previous:
+            deltas = "  ".join(
+                f"{metric} {route[metric] - previous[metric]:+.2f}ms ({(route[metric] / previous[metric] - 1) * 100:+.0f}%)"
+                for metric in ("p50_ms", "p95_ms", "p99_ms") if previous.get(metric)
+            )
+            lines.append(f"{'':<34}vs baseline: {deltas}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark lambda_handler routes against local stand-ins.")
+    parser.add_argument("--iterations", type=int, default=100, help="Measured warm invocations per route.")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured invocations after the cold call.")
+    parser.add_argument("--paypal-latency-ms", type=float, default=0.0, help="Latency added by the fake PayPal API.")
+    parser.add_argument("--paypal-latency", default=None, help='Latency distribution, e.g. "lognormal:40:0.6".')
+    parser.add_argument("--paypal-error-rate", type=float, default=0.0, help="Fraction of PayPal calls answered with 500.")
+    parser.add_argument("--paypal-throttle-rate", type=float, default=0.0, help="Fraction of PayPal calls answered with 429.")
+    parser.add_argument("--paypal-timeout-rate", type=float, default=0.0, help="Fraction of PayPal calls that time out.")
+    parser.add_argument("--route", action="append", dest="routes", help='Only run this route, e.g. "POST /login".')
+    parser.add_argument("--output", default=None, help="Where to write the JSON results.")
+    parser.add_argument("--compare", default=None, help="A previous JSON result to compare against.")
+    args = parser.parse_args(argv)
+
+    faults = Faults(args.paypal_error_rate, args.paypal_throttle_rate, args.paypal_timeout_rate)
+    results = run_benchmark(
+        args.iterations, args.warmup, args.paypal_latency_ms, args.routes,
+        paypal_latency=args.paypal_latency, paypal_faults=faults,
+    )
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    output = args.output or os.path.join("benchmark_results", time.strftime("%Y%m%dT%H%M%SZ", time.gmtime()) + ".json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as output_file:
+        json.dump(results, output_file, indent=2)
+
+    print(format_report(results, baseline))
+    print(f"\nResults written to {output}")
+    return 0 if all(route["errors"] == 0 for route in results["routes"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
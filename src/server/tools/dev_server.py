@@ -0,0 +1,324 @@
+"""
+Local HTTP server in front of lambda_handler.
+
+Each HTTP request becomes an API Gateway proxy event and is handed to a simulated
+Lambda container. Containers behave the way Lambda's do:
+
+- A container serves one request at a time. Concurrent requests go to other
+  containers, up to --workers of them.
+- The first request a container serves pays the cold start. In process mode, that
+  means a fresh interpreter importing index.py, so every container has its own
+  caches and clients.
+- Idle containers are reused, the most recently used first. They are recycled after
+  --idle-timeout seconds without traffic or after --max-invocations requests.
+
+In thread mode, all containers share one imported index.py. Requests still run
+concurrently, but module state (caches, clients) is shared, as if every container
+were already warm.
+
+Responses carry X-Container-Id, X-Cold-Start and X-Init-Duration-Ms headers, and a
+Lambda-style REPORT line is logged for every request.
+
+Usage:
+    python -m tools.dev_server --port 3001 --workers 4
+    python -m tools.dev_server --mode thread --workers 16 --idle-timeout 60
+"""
+import argparse
+import itertools
+import json
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from tools.events import FakeLambdaContext, api_gateway_event
+
+logger = logging.getLogger("dev_server")
+
+container_ids = itertools.count(1)
+
+
+def container_main(connection):
+    """Entry point of a container process: import index, then serve events until told to stop."""
+    started_at = time.perf_counter()
+    import index
+    init_ms = (time.perf_counter() - started_at) * 1000
+    connection.send(init_ms)
+
+    while True:
+        event = connection.recv()
+        if event is None:
+            break
+        try:
+            response = index.lambda_handler(event, FakeLambdaContext())
+        except Exception as e:
+            # lambda_handler catches its own errors; this mirrors a crashed runtime.
+            response = {"statusCode": 502, "headers": {}, "body": json.dumps({"message": f"Runtime error: {e}"})}
+        connection.send(response)
+    connection.close()
+
+
+class ProcessContainer:
+    """A container backed by its own interpreter, so module state is per container."""
+
+    def __init__(self, context):
+        self.id = next(container_ids)
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=container_main, args=(child_connection,), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.init_ms = None
+        self.invocations = 0
+        self.last_used = time.monotonic()
+
+    def invoke(self, event):
+        if self.init_ms is None:
+            self.init_ms = self.connection.recv()
+        self.connection.send(event)
+        return self.connection.recv()
+
+    def stop(self):
+        try:
+            self.connection.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+
+
+class ThreadContainer:
+    """A container sharing this process's index module with every other thread container."""
+
+    def __init__(self, context=None):
+        self.id = next(container_ids)
+        started_at = time.perf_counter()
+        import index
+        self.index = index
+        self.init_ms = (time.perf_counter() - started_at) * 1000
+        self.invocations = 0
+        self.last_used = time.monotonic()
+
+    def invoke(self, event):
+        return self.index.lambda_handler(event, FakeLambdaContext())
+
+    def stop(self):
+        pass
+
+
+class ContainerPool:
+    """
+    Hands out idle containers, creating new ones (cold starts) while under the limit.
+
+    :param factory: Callable creating a container.
+    :param max_containers: Maximum number of concurrent containers.
+    :param idle_timeout: Seconds after which an idle container is recycled.
+    :param max_invocations: Recycle a container after this many requests (0 for never).
+    """
+
+    def __init__(self, factory, max_containers, idle_timeout=300.0, max_invocations=0):
+        self.factory = factory
+        self.max_containers = max_containers
+        self.idle_timeout = idle_timeout
+        self.max_invocations = max_invocations
+        self.idle = []
+        self.busy = 0
+        self.cold_starts = 0
+        self.condition = threading.Condition()
+
+    def acquire(self):
+        """Return (container, cold) for the next request, blocking while every container is busy."""
+        expired = []
+        warm = None
+        with self.condition:
+            while True:
+                expired.extend(self._take_expired())
+                if self.idle:
+                    # Lambda favours the most recently used container, which is the warmest.
+                    warm = self.idle.pop()
+                    self.busy += 1
+                    break
+                if self.busy + len(self.idle) < self.max_containers:
+                    self.busy += 1
+                    self.cold_starts += 1
+                    break
+                self.condition.wait()
+
+        for container in expired:
+            container.stop()
+        if warm is not None:
+            return warm, False
+        try:
+            return self.factory(), True
+        except Exception:
+            with self.condition:
+                self.busy -= 1
+                self.condition.notify()
+            raise
+
+    def release(self, container):
+        container.invocations += 1
+        container.last_used = time.monotonic()
+        retire = self.max_invocations and container.invocations >= self.max_invocations
+        with self.condition:
+            self.busy -= 1
+            if not retire:
+                self.idle.append(container)
+            self.condition.notify()
+        if retire:
+            container.stop()
+
+    def discard(self, container):
+        """Retire a container that failed mid-request instead of returning it to the idle list."""
+        with self.condition:
+            self.busy -= 1
+            self.condition.notify()
+        container.stop()
+
+    def close(self):
+        with self.condition:
+            containers, self.idle = self.idle, []
+        for container in containers:
+            container.stop()
+
+    def _take_expired(self):
+        now = time.monotonic()
+        expired = [container for container in self.idle if now - container.last_used >= self.idle_timeout]
+        if expired:
+            self.idle = [container for container in self.idle if container not in expired]
+        return expired
+
+
+class LambdaProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def handle_request(self):
+        url = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length).decode("utf-8") if length else None
+        query = dict(parse_qsl(url.query, keep_blank_values=True)) or None
+        event = api_gateway_event(
+            self.command, url.path, body=body, query=query,
+            headers=dict(self.headers.items()), source_ip=self.client_address[0],
+        )
+
+        pool = self.server.pool
+        container, cold = pool.acquire()
+        started_at = time.perf_counter()
+        try:
+            response = container.invoke(event)
+        except Exception as e:
+            # The container died (e.g. its process exited and the pipe closed); never reuse it.
+            duration_ms = (time.perf_counter() - started_at) * 1000
+            pool.discard(container)
+            logger.error("Container %s failed on %s %s: %r", container.id, self.command, url.path, e)
+            response = {"statusCode": 502, "headers": {}, "body": json.dumps({"message": f"Container failed: {e!r}"})}
+        else:
+            duration_ms = (time.perf_counter() - started_at) * 1000
+            pool.release(container)
+
+        cold_init = cold and container.init_ms is not None
+        init_note = "\tInit Duration: %.2f ms" % container.init_ms if cold_init else ""
+        logger.info(
+            "REPORT %s %s %s\tContainer: %s\tDuration: %.2f ms%s",
+            self.command, url.path, response['statusCode'], container.id, duration_ms, init_note,
+        )
+
+        data = (response.get("body") or "").encode("utf-8")
+        self.send_response(response["statusCode"])
+        for name, value in (response.get("headers") or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("X-Container-Id", str(container.id))
+        self.send_header("X-Cold-Start", "true" if cold else "false")
+        if cold_init:
+            self.send_header("X-Init-Duration-Ms", f"{container.init_ms:.2f}")
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = handle_request
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DevServer:
+    """
+    The HTTP front end and its container pool.
+
+    :param host: Interface to bind.
+    :param port: Port to bind; 0 picks a free one.
+    :param workers: Maximum number of concurrent containers.
+    :param mode: "process" for isolated containers, "thread" for a shared in-process module.
+    :param idle_timeout: Seconds after which an idle container is recycled.
+    :param max_invocations: Recycle a container after this many requests (0 for never).
+    """
+
+    def __init__(self, host="127.0.0.1", port=3001, workers=4, mode="process", idle_timeout=300.0, max_invocations=0):
+        if mode == "process":
+            context = multiprocessing.get_context("spawn")
+            factory = lambda: ProcessContainer(context)
+        elif mode == "thread":
+            factory = ThreadContainer
+        else:
+            raise ValueError(f"Unknown mode {mode!r}; expected 'process' or 'thread'.")
+
+        self.pool = ContainerPool(factory, workers, idle_timeout, max_invocations)
+        self.httpd = ThreadingHTTPServer((host, port), LambdaProxyHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.pool = self.pool
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.pool.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve lambda_handler over HTTP with simulated Lambda containers.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3001)
+    parser.add_argument("--workers", type=int, default=4, help="Maximum concurrent containers.")
+    parser.add_argument("--mode", choices=("process", "thread"), default="process")
+    parser.add_argument("--idle-timeout", type=float, default=300.0, help="Recycle containers idle this long (seconds).")
+    parser.add_argument("--max-invocations", type=int, default=0, help="Recycle containers after this many requests.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    server = DevServer(args.host, args.port, args.workers, args.mode, args.idle_timeout, args.max_invocations)
+    print(f"Serving lambda_handler on {server.base_url} ({args.mode} mode, up to {args.workers} containers)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        server.pool.close()
+        print(f"Stopped after {server.pool.cold_starts} cold starts.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Builders for API Gateway (REST API, Lambda proxy integration) events.
+"""
+import json
+import time
+import uuid
+
+
+def api_gateway_event(method, path, body=None, query=None, headers=None, source_ip="127.0.0.1", stage="local"):
+    """
+    Build an API Gateway proxy event shaped like the ones the deployed Lambda receives.
+
+    :param method: HTTP method, e.g. "POST".
+    :param path: Resource path, e.g. "/login".
+    :param body: JSON-serializable body, a raw string, or None.
+    :param query: Dictionary of query string parameters, or None.
+    :param headers: Dictionary of request headers.
+    :param source_ip: Caller IP recorded in the request context.
+    :param stage: API Gateway stage name.
+    :return: The event dictionary.
+    """
+    headers = dict(headers or {})
+    if body is not None and not isinstance(body, str):
+        body = json.dumps(body)
+        headers.setdefault("Content-Type", "application/json")
+    headers.setdefault("Accept", "application/json")
+    request_id = str(uuid.uuid4())
+
+    return {
+        "resource": path,
+        "path": path,
+        "httpMethod": method,
+        "headers": headers,
+        "multiValueHeaders": {name: [value] for name, value in headers.items()},
+        "queryStringParameters": query,
+        "multiValueQueryStringParameters": {name: [value] for name, value in query.items()} if query else None,
+        "pathParameters": None,
+        "stageVariables": None,
+        "requestContext": {
+            "resourcePath": path,
+            "httpMethod": method,
+            "path": f"/{stage}{path}",
+            "stage": stage,
+            "requestId": request_id,
+            "requestTimeEpoch": int(time.time() * 1000),
+            "identity": {"sourceIp": source_ip, "userAgent": headers.get("User-Agent", "rcw-local")},
+        },
+        "body": body,
+        "isBase64Encoded": False,
+    }
+
+
+class FakeLambdaContext:
+    """Minimal stand-in for the Lambda context object."""
+
+    def __init__(self, function_name="rcw-client-backend-local", memory_limit_in_mb=512, timeout_seconds=30):
+        self.function_name = function_name
+        self.function_version = "$LATEST"
+        self.memory_limit_in_mb = memory_limit_in_mb
+        self.aws_request_id = str(uuid.uuid4())
+        self.invoked_function_arn = f"arn:aws:lambda:us-west-1:000000000000:function:{function_name}"
+        self._deadline = time.monotonic() + timeout_seconds
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
@@ -0,0 +1,491 @@
+"""
+In-memory stand-ins for the Cognito Identity Provider and SES clients used by index.py.
+
+The fakes keep state (users, passwords, confirmation codes, tokens, sent mail) and
+raise the same modeled botocore exception classes the real clients raise, built
+from the botocore service models. Handlers therefore take the same error paths
+they take in AWS. initiate_auth issues Cognito-shaped JWTs that jwt.decode parses.
+Every call can add latency and be throttled, either at random or by a
+requests-per-second limit.
+
+Usage:
+    from tools.fake_aws import FakeCognito, FakeSES, installed
+
+    cognito = FakeCognito(latency="lognormal:15:0.4", max_rps=50)
+    with installed(index, cognito=cognito, ses=FakeSES()):
+        index.lambda_handler(event, context)
+"""
+import base64
+import contextlib
+import functools
+import random
+import re
+import secrets
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+
+import jwt
+from botocore.errorfactory import ClientExceptionsFactory
+from botocore.exceptions import ClientError
+from botocore.session import get_session
+
+from tools.fake_paypal import Latency
+
+# Attributes the fake user pool accepts, matching the schema of the deployed pool.
+USER_POOL_SCHEMA = frozenset({
+    "email", "email_verified", "name", "given_name", "family_name", "phone_number",
+    "phone_number_verified", "custom:firstName", "custom:lastName",
+})
+
+# The default Cognito password policy.
+PASSWORD_RULES = [
+    (lambda password: len(password) >= 8, "Password not long enough"),
+    (lambda password: re.search(r"[a-z]", password), "Password must have lowercase characters"),
+    (lambda password: re.search(r"[A-Z]", password), "Password must have uppercase characters"),
+    (lambda password: re.search(r"[0-9]", password), "Password must have numeric characters"),
+    (lambda password: re.search(r"[^A-Za-z0-9]", password), "Password must have symbol characters"),
+]
+
+
+@functools.lru_cache(maxsize=None)
+def service_exceptions(service_name):
+    """Return the modeled exception classes of a service, as client.exceptions would."""
+    model = get_session().get_service_model(service_name)
+    return ClientExceptionsFactory().create_client_exceptions(model)
+
+
+class FakeService:
+    """
+    Latency, throttling, call counting and error raising shared by the fakes.
+
+    :param service_name: botocore service name, used for the exception classes.
+    :param latency: Added latency per call: seconds, a Latency, or a spec such as "uniform:5:20".
+    :param throttle_rate: Fraction of calls rejected as throttled.
+    :param max_rps: Token-bucket limit in calls per second (None for no limit).
+    :param seed: Seed for latency sampling and throttling, for repeatable runs.
+    """
+
+    THROTTLE_CODE = "TooManyRequestsException"
+    THROTTLE_MESSAGE = "Rate exceeded"
+
+    def __init__(self, service_name, latency=0.0, throttle_rate=0.0, max_rps=None, seed=None):
+        self.exceptions = service_exceptions(service_name)
+        self.latency = Latency.parse(latency)
+        self.throttle_rate = throttle_rate
+        self.max_rps = max_rps
+        self.rng = random.Random(seed)
+        self.calls = Counter()
+        self.throttled = Counter()
+        self._lock = threading.RLock()
+        self._tokens = float(max_rps or 0)
+        self._refilled_at = time.monotonic()
+
+    def error(self, operation, code, message, status=400):
+        """Build the exception the real client raises for an error code."""
+        error_response = {
+            "Error": {"Code": code, "Message": message},
+            "ResponseMetadata": {"RequestId": str(uuid.uuid4()), "HTTPStatusCode": status},
+        }
+        error_class = getattr(self.exceptions, code, ClientError)
+        return error_class(error_response, operation)
+
+    def begin(self, operation):
+        """Count the call, wait out its latency and raise if it is throttled."""
+        with self._lock:
+            self.calls[operation] += 1
+            delay = self.latency.sample(self.rng)
+            throttled = self.rng.random() < self.throttle_rate or not self._take_token()
+            if throttled:
+                self.throttled[operation] += 1
+        if delay:
+            time.sleep(delay)
+        if throttled:
+            raise self.error(operation, self.THROTTLE_CODE, self.THROTTLE_MESSAGE)
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+            self.throttled.clear()
+
+    def _take_token(self):
+        if not self.max_rps:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.max_rps, self._tokens + (now - self._refilled_at) * self.max_rps)
+        self._refilled_at = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class FakeUser:
+    def __init__(self, username, password, attributes):
+        now = datetime.now(timezone.utc)
+        self.username = username
+        self.sub = str(uuid.uuid4())
+        self.password = password
+        self.attributes = dict(attributes, sub=self.sub)
+        self.status = "UNCONFIRMED"
+        self.enabled = True
+        self.created = now
+        self.modified = now
+        self.codes = {}
+
+    def attribute_list(self):
+        return [{"Name": name, "Value": value} for name, value in self.attributes.items()]
+
+
+FAKE_KEY_ID = "fake-cognito-key"
+
+
+class FakeCognito(FakeService):
+    """
+    Stateful fake of the Cognito Identity Provider operations index.py calls.
+
+    Confirmation codes are not delivered anywhere; read them with ``last_code``.
+    Tokens are HS256 JWTs with Cognito's claims, signed with ``signing_key``.
+
+    :param user_pool_id: The only user pool ID the fake accepts.
+    :param client_id: The only app client ID the fake accepts.
+    :param token_lifetime: Lifetime of ID and access tokens, in seconds.
+    :param signing_key: Key used to sign the tokens.
+    """
+
+    def __init__(self, user_pool_id="us-west-1_FAKEPOOL", client_id="fakeclientid0123456789",
+                 token_lifetime=3600, signing_key="fake-cognito-signing-key-for-local-tests", region="us-west-1",
+                 **service_options):
+        super().__init__("cognito-idp", **service_options)
+        self.user_pool_id = user_pool_id
+        self.client_id = client_id
+        self.token_lifetime = token_lifetime
+        self.signing_key = signing_key
+        self.issuer = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}"
+        self.users = {}
+        self.access_tokens = {}
+        self.refresh_tokens = {}
+
+    # Helpers
+    def jwks(self, user_pool_id=None):
+        """Return the JWKS index.py verifies this fake's tokens with (an HS256 "oct" key)."""
+        secret = base64.urlsafe_b64encode(self.signing_key.encode()).rstrip(b"=").decode()
+        return {"keys": [{"kty": "oct", "kid": FAKE_KEY_ID, "alg": "HS256", "use": "sig", "k": secret}]}
+
+    def token(self, email, /, token_use="id", key_id=FAKE_KEY_ID, **claims):
+        """Mint one Cognito-shaped token for email, with any claim overridden (e.g. exp, aud)."""
+        now = int(time.time())
+        user = self.users.get(email.lower())
+        sub = user.sub if user is not None else str(uuid.uuid5(uuid.NAMESPACE_URL, email))
+        payload = {"sub": sub, "iss": self.issuer, "token_use": token_use,
+                   "auth_time": now, "iat": now, "exp": now + self.token_lifetime}
+        if token_use == "id":
+            payload.update({"aud": self.client_id, "email": email, "cognito:username": email})
+        else:
+            payload.update({"client_id": self.client_id, "username": email, "scope": "aws.cognito.signin.user.admin"})
+        payload.update(claims)
+        return jwt.encode(payload, self.signing_key, algorithm="HS256", headers={"kid": key_id})
+
+    def add_user(self, email, password, confirmed=True, **attributes):
+        """Create a user directly, bypassing sign-up and confirmation."""
+        with self._lock:
+            user = FakeUser(email, password, {"email": email, **attributes})
+            if confirmed:
+                user.status = "CONFIRMED"
+                user.attributes["email_verified"] = "true"
+            self.users[email.lower()] = user
+            return user
+
+    def last_code(self, email, purpose):
+        """Return the last code sent to a user for "sign_up", "forgot_password" or "verify_email", or None."""
+        user = self.users.get(email.lower())
+        return user.codes.get(purpose) if user else None
+
+    def _user(self, operation, username, message="User does not exist."):
+        # The email attribute is a sign-in alias, so users are found by their current email too.
+        key = (username or "").lower()
+        user = self.users.get(key) or next(
+            (user for user in self.users.values() if user.attributes.get("email", "").lower() == key), None)
+        if user is None:
+            raise self.error(operation, "UserNotFoundException", message)
+        return user
+
+    def _check_pool(self, operation, user_pool_id):
+        if user_pool_id != self.user_pool_id:
+            raise self.error(operation, "ResourceNotFoundException", f"User pool {user_pool_id} does not exist.")
+
+    def _check_client(self, operation, client_id):
+        if client_id != self.client_id:
+            raise self.error(operation, "ResourceNotFoundException", "User pool client does not exist.")
+
+    def _check_password(self, operation, password):
+        for rule, message in PASSWORD_RULES:
+            if not rule(password or ""):
+                raise self.error(operation, "InvalidPasswordException", f"Password did not conform with policy: {message}")
+
+    def _user_for_token(self, operation, access_token):
+        username = self.access_tokens.get(access_token)
+        if username is None:
+            raise self.error(operation, "NotAuthorizedException", "Invalid Access Token")
+        try:
+            jwt.decode(access_token, self.signing_key, algorithms=["HS256"], options={"verify_aud": False})
+        except jwt.ExpiredSignatureError:
+            raise self.error(operation, "NotAuthorizedException", "Access Token has expired")
+        return self._user(operation, username)
+
+    def _send_code(self, user, purpose):
+        user.codes[purpose] = f"{self.rng.randrange(10 ** 6):06d}"
+        email = user.attributes.get("email", user.username)
+        local, _, domain = email.partition("@")
+        return {"Destination": f"{local[:1]}***@{domain[:1]}***", "DeliveryMedium": "EMAIL", "AttributeName": "email"}
+
+    def _check_code(self, operation, user, purpose, code):
+        if user.codes.get(purpose) is None:
+            raise self.error(operation, "ExpiredCodeException", "Invalid code provided, please request a code again.")
+        if code != user.codes[purpose]:
+            raise self.error(operation, "CodeMismatchException", "Invalid verification code provided, please try again.")
+        del user.codes[purpose]
+
+    def _issue_tokens(self, user, include_refresh=True):
+        now = int(time.time())
+        common = {"sub": user.sub, "iss": self.issuer, "auth_time": now, "iat": now, "exp": now + self.token_lifetime}
+        id_claims = {
+            **common,
+            "aud": self.client_id,
+            "token_use": "id",
+            "cognito:username": user.username,
+            "email": user.attributes.get("email"),
+            "email_verified": user.attributes.get("email_verified") == "true",
+            "event_id": str(uuid.uuid4()),
+        }
+        id_claims.update({name: value for name, value in user.attributes.items() if name.startswith("custom:")})
+        access_claims = {
+            **common,
+            "client_id": self.client_id,
+            "token_use": "access",
+            "scope": "aws.cognito.signin.user.admin",
+            "username": user.username,
+            "jti": str(uuid.uuid4()),
+        }
+        headers = {"kid": FAKE_KEY_ID}
+        access_token = jwt.encode(access_claims, self.signing_key, algorithm="HS256", headers=headers)
+        self.access_tokens[access_token] = user.username.lower()
+        result = {
+            "AccessToken": access_token,
+            "ExpiresIn": self.token_lifetime,
+            "TokenType": "Bearer",
+            "IdToken": jwt.encode(id_claims, self.signing_key, algorithm="HS256", headers=headers),
+        }
+        if include_refresh:
+            refresh_token = secrets.token_urlsafe(96)
+            self.refresh_tokens[refresh_token] = user.username.lower()
+            result["RefreshToken"] = refresh_token
+        return result
+
+    # Operations (names and shapes follow the boto3 cognito-idp client)
+    def sign_up(self, ClientId, Username, Password, UserAttributes=(), **kwargs):
+        self.begin("SignUp")
+        with self._lock:
+            self._check_client("SignUp", ClientId)
+            if Username.lower() in self.users:
+                raise self.error("SignUp", "UsernameExistsException", "An account with the given email already exists.")
+            self._check_password("SignUp", Password)
+            attributes = {attribute["Name"]: attribute["Value"] for attribute in UserAttributes}
+            unknown = set(attributes) - USER_POOL_SCHEMA
+            if unknown:
+                raise self.error("SignUp", "InvalidParameterException",
+                                 f"Attributes did not conform to the schema: {sorted(unknown)[0]}: Attribute does not exist in the schema.")
+            user = FakeUser(Username, Password, attributes)
+            self.users[Username.lower()] = user
+            return {"UserConfirmed": False, "UserSub": user.sub, "CodeDeliveryDetails": self._send_code(user, "sign_up")}
+
+    def admin_confirm_sign_up(self, UserPoolId, Username, **kwargs):
+        self.begin("AdminConfirmSignUp")
+        with self._lock:
+            self._check_pool("AdminConfirmSignUp", UserPoolId)
+            user = self._user("AdminConfirmSignUp", Username)
+            if user.status == "CONFIRMED":
+                raise self.error("AdminConfirmSignUp", "NotAuthorizedException",
+                                 "User cannot be confirmed. Current status is CONFIRMED")
+            user.status = "CONFIRMED"
+            user.codes.pop("sign_up", None)
+            return {}
+
+    def initiate_auth(self, ClientId, AuthFlow, AuthParameters, **kwargs):
+        self.begin("InitiateAuth")
+        with self._lock:
+            self._check_client("InitiateAuth", ClientId)
+            if AuthFlow == "USER_PASSWORD_AUTH":
+                user = self._user("InitiateAuth", AuthParameters.get("USERNAME"))
+                if user.password != AuthParameters.get("PASSWORD") or not user.enabled:
+                    raise self.error("InitiateAuth", "NotAuthorizedException", "Incorrect username or password.")
+                if user.status != "CONFIRMED":
+                    raise self.error("InitiateAuth", "UserNotConfirmedException", "User is not confirmed.")
+                return {"ChallengeParameters": {}, "AuthenticationResult": self._issue_tokens(user)}
+            if AuthFlow in ("REFRESH_TOKEN_AUTH", "REFRESH_TOKEN"):
+                username = self.refresh_tokens.get(AuthParameters.get("REFRESH_TOKEN"))
+                if username is None or username not in self.users:
+                    raise self.error("InitiateAuth", "NotAuthorizedException", "Invalid Refresh Token")
+                return {"ChallengeParameters": {}, "AuthenticationResult": self._issue_tokens(self.users[username], include_refresh=False)}
+            raise self.error("InitiateAuth", "InvalidParameterException", f"Unsupported auth flow {AuthFlow}")
+
+    def get_user(self, AccessToken, **kwargs):
+        self.begin("GetUser")
+        with self._lock:
+            user = self._user_for_token("GetUser", AccessToken)
+            return {"Username": user.username, "UserAttributes": user.attribute_list()}
+
+    def get_user_attribute_verification_code(self, AccessToken, AttributeName, **kwargs):
+        self.begin("GetUserAttributeVerificationCode")
+        with self._lock:
+            user = self._user_for_token("GetUserAttributeVerificationCode", AccessToken)
+            return {"CodeDeliveryDetails": self._send_code(user, "verify_email")}
+
+    def verify_user_attribute(self, AccessToken, AttributeName, Code, **kwargs):
+        self.begin("VerifyUserAttribute")
+        with self._lock:
+            user = self._user_for_token("VerifyUserAttribute", AccessToken)
+            self._check_code("VerifyUserAttribute", user, "verify_email", Code)
+            user.attributes[f"{AttributeName}_verified"] = "true"
+            return {}
+
+    def forgot_password(self, ClientId, Username, **kwargs):
+        self.begin("ForgotPassword")
+        with self._lock:
+            self._check_client("ForgotPassword", ClientId)
+            user = self._user("ForgotPassword", Username, "Username/client id combination not found.")
+            return {"CodeDeliveryDetails": self._send_code(user, "forgot_password")}
+
+    def confirm_forgot_password(self, ClientId, Username, ConfirmationCode, Password, **kwargs):
+        self.begin("ConfirmForgotPassword")
+        with self._lock:
+            self._check_client("ConfirmForgotPassword", ClientId)
+            user = self._user("ConfirmForgotPassword", Username, "Username/client id combination not found.")
+            self._check_password("ConfirmForgotPassword", Password)
+            self._check_code("ConfirmForgotPassword", user, "forgot_password", ConfirmationCode)
+            user.password = Password
+            return {}
+
+    def admin_get_user(self, UserPoolId, Username, **kwargs):
+        self.begin("AdminGetUser")
+        with self._lock:
+            self._check_pool("AdminGetUser", UserPoolId)
+            user = self._user("AdminGetUser", Username)
+            return {
+                "Username": user.username,
+                "UserAttributes": user.attribute_list(),
+                "UserCreateDate": user.created,
+                "UserLastModifiedDate": user.modified,
+                "Enabled": user.enabled,
+                "UserStatus": user.status,
+            }
+
+    def admin_set_user_password(self, UserPoolId, Username, Password, Permanent=False, **kwargs):
+        self.begin("AdminSetUserPassword")
+        with self._lock:
+            self._check_pool("AdminSetUserPassword", UserPoolId)
+            user = self._user("AdminSetUserPassword", Username)
+            self._check_password("AdminSetUserPassword", Password)
+            user.password = Password
+            user.status = "CONFIRMED" if Permanent else "FORCE_CHANGE_PASSWORD"
+            user.modified = datetime.now(timezone.utc)
+            return {}
+
+    def admin_update_user_attributes(self, UserPoolId, Username, UserAttributes, **kwargs):
+        self.begin("AdminUpdateUserAttributes")
+        with self._lock:
+            self._check_pool("AdminUpdateUserAttributes", UserPoolId)
+            user = self._user("AdminUpdateUserAttributes", Username)
+            for attribute in UserAttributes:
+                if attribute["Name"] not in USER_POOL_SCHEMA:
+                    raise self.error("AdminUpdateUserAttributes", "InvalidParameterException",
+                                     "Attribute does not exist in the schema.")
+            user.attributes.update({attribute["Name"]: attribute["Value"] for attribute in UserAttributes})
+            user.modified = datetime.now(timezone.utc)
+            return {}
+
+    def admin_delete_user(self, UserPoolId, Username, **kwargs):
+        self.begin("AdminDeleteUser")
+        with self._lock:
+            self._check_pool("AdminDeleteUser", UserPoolId)
+            user = self._user("AdminDeleteUser", Username)
+            del self.users[user.username.lower()]
+            for tokens in (self.access_tokens, self.refresh_tokens):
+                for token in [token for token, owner in tokens.items() if owner == user.username.lower()]:
+                    del tokens[token]
+            return {}
+
+
+class FakeSES(FakeService):
+    """
+    Fake of the SES send_email operation. Sent messages are kept in ``sent``.
+
+    In sandbox mode (the default for new SES accounts) both the sender and every
+    recipient must be verified identities; otherwise only the sender must be.
+
+    :param verified_identities: Email addresses or domains that count as verified.
+    :param sandbox: Whether recipients must be verified too.
+    """
+
+    THROTTLE_CODE = "Throttling"
+    THROTTLE_MESSAGE = "Maximum sending rate exceeded."
+
+    def __init__(self, verified_identities=("noreply@example.com", "office@example.com"), sandbox=True,
+                 region="us-west-1", **service_options):
+        super().__init__("ses", **service_options)
+        self.verified_identities = set(verified_identities)
+        self.sandbox = sandbox
+        self.region = region
+        self.sent = []
+
+    def is_verified(self, address):
+        return address in self.verified_identities or address.partition("@")[2] in self.verified_identities
+
+    def send_email(self, Source, Destination, Message, **kwargs):
+        self.begin("SendEmail")
+        addresses = [address for key in ("ToAddresses", "CcAddresses", "BccAddresses")
+                     for address in Destination.get(key, [])]
+        if not addresses:
+            raise self.error("SendEmail", "InvalidParameterValue", "Missing final '@domain'")
+        checked = [Source] + (addresses if self.sandbox else [])
+        unverified = [address for address in checked if not self.is_verified(address)]
+        if unverified:
+            raise self.error("SendEmail", "MessageRejected",
+                             f"Email address is not verified. The following identities failed the check in region "
+                             f"{self.region.upper()}: {', '.join(unverified)}")
+        message_id = f"0100{uuid.uuid4().hex[:12]}-{uuid.uuid4()}-000000"
+        with self._lock:
+            self.sent.append({"MessageId": message_id, "Source": Source, "Destination": Destination,
+                              "Message": Message, **kwargs})
+        return {"MessageId": message_id}
+
+
+@contextlib.contextmanager
+def installed(index_module, cognito=None, ses=None):
+    """
+    Serve index.py's Cognito and SES clients from the given fakes for the duration of the block.
+
+    Tokens are verified against the fake Cognito's JWKS instead of the real user pool's.
+
+    :param index_module: The imported index module.
+    :param cognito: A FakeCognito to use as index.client.
+    :param ses: A FakeSES to use as index.ses.
+    """
+    replacements = {"client": cognito, "ses": ses}
+    module_globals = vars(index_module)
+    previous = {name: module_globals.get(name) for name, fake in replacements.items() if fake is not None}
+    previous_fetcher = index_module.set_jwks_fetcher(cognito.jwks) if cognito is not None else None
+    try:
+        for name in previous:
+            module_globals[name] = replacements[name]
+        yield
+    finally:
+        if previous_fetcher is not None:
+            index_module.set_jwks_fetcher(previous_fetcher)
+        for name, value in previous.items():
+            if value is None:
+                module_globals.pop(name, None)
+            else:
+                module_globals[name] = value
@@ -0,0 +1,395 @@
+"""
+Local stand-in for the PayPal REST endpoints used by index.py.
+
+Serves the OAuth token, checkout order, catalog product, billing plan and billing
+subscription endpoints with PayPal-shaped responses, so the donation flows can run
+offline. Point index.py at it with the environment variables from ``env()``.
+
+Latency follows a configurable distribution, and faults can be injected globally
+or per endpoint: 500 errors, 429 rate limiting, and timeouts (the server holds the
+request, then drops the connection without answering). Requests with a
+PayPal-Request-Id it has seen get the first response again, as PayPal does.
+
+Usage:
+    python -m tools.fake_paypal --port 8089 --latency-ms 50
+    python -m tools.fake_paypal --latency lognormal:40:0.5 --throttle-rate 0.05 --seed 7
+    python -m tools.fake_paypal --fault /v1/billing/plans:error_rate=0.2,timeout_rate=0.01
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Endpoint path -> environment variable index.py reads it from.
+PAYPAL_ENDPOINTS = {
+    "/v1/oauth2/token": "PAYPAL_AUTH_TOKEN_LINK",
+    "/v2/checkout/orders": "PAYPAL_CHECKOUT_ORDER_LINK",
+    "/v1/catalogs/products": "PAYPAL_CATALOGUE_PRODUCT_LINK",
+    "/v1/billing/plans": "PAYPAL_BILLING_PLANS_LINK",
+    "/v1/billing/subscriptions": "PAYPAL_BILLING_SUBSCRIPTION_LINK",
+}
+
+
+def new_id(prefix, length=17):
+    return prefix + uuid.uuid4().hex[:length].upper()
+
+
+class Latency:
+    """
+    A latency distribution, sampled in seconds.
+
+    Specs are written as "kind:arg:arg" with arguments in milliseconds:
+    "50" or "constant:50", "uniform:20:80", "normal:50:10" (mean, stddev),
+    "lognormal:40:0.5" (median, sigma; long right tail like real networks) and
+    "exponential:50" (mean).
+    """
+
+    KINDS = {"constant": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+
+    def __init__(self, kind="constant", *args):
+        if kind not in self.KINDS or len(args) != self.KINDS[kind]:
+            raise ValueError(f"Latency {kind!r} takes {self.KINDS.get(kind, '?')} argument(s), got {len(args)}.")
+        self.kind = kind
+        self.args = tuple(float(arg) for arg in args)
+
+    @classmethod
+    def parse(cls, spec):
+        """Build a Latency from a spec string, seconds as a number, or an existing Latency."""
+        if isinstance(spec, Latency):
+            return spec
+        if spec is None:
+            return cls("constant", 0)
+        if isinstance(spec, (int, float)):
+            return cls("constant", spec * 1000)
+        kind, *args = str(spec).split(":")
+        if not args:
+            return cls("constant", kind)
+        return cls(kind, *args)
+
+    def sample(self, rng):
+        if self.kind == "constant":
+            ms = self.args[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(*self.args)
+        elif self.kind == "normal":
+            ms = rng.gauss(*self.args)
+        elif self.kind == "lognormal":
+            median, sigma = self.args
+            ms = rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        else:
+            ms = rng.expovariate(1 / self.args[0]) if self.args[0] > 0 else 0.0
+        return max(0.0, ms) / 1000
+
+    def __repr__(self):
+        return ":".join([self.kind, *(f"{arg:g}" for arg in self.args)])
+
+
+class Faults:
+    """
+    Fault injection rates for one endpoint (or all of them).
+
+    :param error_rate: Fraction of requests answered with 500 INTERNAL_SERVER_ERROR.
+    :param throttle_rate: Fraction answered with 429 RATE_LIMIT_REACHED.
+    :param timeout_rate: Fraction held for hang_seconds and then dropped without a response.
+    :param hang_seconds: How long a timed-out request is held; longer than the client timeout by default.
+    :param retry_after: Retry-After header sent with 429s, in seconds (None to omit it).
+    """
+
+    def __init__(self, error_rate=0.0, throttle_rate=0.0, timeout_rate=0.0, hang_seconds=15.0, retry_after=None):
+        if error_rate + throttle_rate + timeout_rate > 1:
+            raise ValueError("Fault rates must add up to at most 1.")
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.timeout_rate = timeout_rate
+        self.hang_seconds = hang_seconds
+        self.retry_after = retry_after
+
+    @classmethod
+    def parse(cls, spec):
+        """Parse "error_rate=0.1,throttle_rate=0.05" into Faults."""
+        values = {}
+        for item in filter(None, spec.split(",")):
+            key, _, value = item.partition("=")
+            values[key.strip()] = float(value)
+        return cls(**values)
+
+    def pick(self, rng):
+        """Return "timeout", "throttle", "error" or None for one request."""
+        draw = rng.random()
+        for outcome, rate in (("timeout", self.timeout_rate), ("throttle", self.throttle_rate), ("error", self.error_rate)):
+            if draw < rate:
+                return outcome
+            draw -= rate
+        return None
+
+
+class FakePayPalHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without this Nagle adds ~40ms per response.
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        server = self.server.fake
+        path = self.path.split("?", 1)[0]
+        server.record(f"POST {path}")
+
+        length = int(self.headers.get("Content-Length", 0))
+        raw_body = self.rfile.read(length) if length else b""
+
+        delay, fault, faults = server.plan_request(path)
+        if delay:
+            time.sleep(delay)
+        if fault == "timeout":
+            server.record(f"POST {path} timeout")
+            time.sleep(faults.hang_seconds)
+            self.close_connection = True
+            return
+        if fault == "throttle":
+            server.record(f"POST {path} 429")
+            headers = {"Retry-After": f"{faults.retry_after:g}"} if faults.retry_after is not None else None
+            return self.send_json(429, {
+                "name": "RATE_LIMIT_REACHED",
+                "message": "Too many requests. Blocked due to rate limiting.",
+                "debug_id": uuid.uuid4().hex[:13],
+            }, headers)
+        if fault == "error":
+            server.record(f"POST {path} 500")
+            return self.send_json(500, {
+                "name": "INTERNAL_SERVER_ERROR",
+                "message": "An internal server error occurred.",
+                "debug_id": uuid.uuid4().hex[:13],
+            })
+
+        if path == "/v1/oauth2/token":
+            if not self.headers.get("Authorization", "").startswith("Basic "):
+                return self.send_json(401, {"error": "invalid_client", "error_description": "Client Authentication failed"})
+            return self.send_json(200, server.issue_token())
+
+        if path not in PAYPAL_ENDPOINTS:
+            return self.send_json(404, {"name": "RESOURCE_NOT_FOUND", "message": "The specified resource does not exist."})
+
+        token = self.headers.get("Authorization", "").replace("Bearer ", "", 1)
+        if token not in server.tokens:
+            return self.send_json(401, {"error": "invalid_token", "error_description": "Token signature verification failed"})
+
+        try:
+            payload = json.loads(raw_body or b"{}")
+        except ValueError:
+            return self.send_json(400, {"name": "INVALID_REQUEST", "message": "Request is not well-formed."})
+
+        builders = {
+            "/v2/checkout/orders": server.order,
+            "/v1/catalogs/products": server.product,
+            "/v1/billing/plans": server.plan,
+            "/v1/billing/subscriptions": server.subscription,
+        }
+        request_id = self.headers.get("PayPal-Request-Id")
+        if request_id:
+            # Like PayPal: a repeated request ID gets the first response back, with 200 instead of 201.
+            body, created = server.idempotent_response(path, request_id, lambda: builders[path](payload))
+            return self.send_json(201 if created else 200, body)
+        return self.send_json(201, builders[path](payload))
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Paypal-Debug-Id", uuid.uuid4().hex[:13])
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakePayPalServer:
+    """
+    In-process fake PayPal API server.
+
+    ``calls`` counts requests per "POST <path>", and injected faults per
+    "POST <path> 429|500|timeout".
+
+    :param host: Interface to bind.
+    :param port: Port to bind (0 picks a free one).
+    :param latency: Added latency per request: seconds, a Latency, or a spec such as "lognormal:40:0.5".
+    :param faults: Faults applied to every endpoint.
+    :param endpoint_faults: Dictionary of endpoint path -> Faults, overriding ``faults`` for that path.
+    :param seed: Seed for latency sampling and fault selection, for repeatable runs.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, faults=None, endpoint_faults=None, seed=None):
+        self.latency = Latency.parse(latency)
+        self.faults = faults or Faults()
+        self.endpoint_faults = dict(endpoint_faults or {})
+        self.rng = random.Random(seed)
+        self.calls = Counter()
+        self.tokens = set()
+        self.request_ids = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), FakePayPalHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self):
+        """Return the PAYPAL_* environment variables that point index.py at this server."""
+        return {variable: self.base_url + path for path, variable in PAYPAL_ENDPOINTS.items()}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def record(self, key):
+        with self._lock:
+            self.calls[key] += 1
+
+    def reset_calls(self):
+        with self._lock:
+            self.calls.clear()
+
+    def plan_request(self, path):
+        """Return (delay seconds, fault or None, Faults in effect) for one request to path."""
+        faults = self.endpoint_faults.get(path, self.faults)
+        with self._lock:
+            return self.latency.sample(self.rng), faults.pick(self.rng), faults
+
+    def idempotent_response(self, path, request_id, build):
+        """Return (body, created): the body first built for this PayPal-Request-Id, and whether it is new."""
+        with self._lock:
+            key = (path, request_id)
+            created = key not in self.request_ids
+            if created:
+                self.request_ids[key] = build()
+            return self.request_ids[key], created
+
+    # Response builders (shapes follow the PayPal REST API documentation).
+    def issue_token(self):
+        token = "A21AA" + uuid.uuid4().hex
+        with self._lock:
+            self.tokens.add(token)
+        return {
+            "scope": "https://uri.paypal.com/services/payments/payment https://uri.paypal.com/services/subscriptions",
+            "access_token": token,
+            "token_type": "Bearer",
+            "app_id": "APP-80W284485P519543T",
+            "expires_in": 32400,
+            "nonce": time.strftime("%Y-%m-%dT%H:%M:%SZ") + uuid.uuid4().hex[:20],
+        }
+
+    def order(self, payload):
+        order_id = new_id("", 17)
+        return {
+            "id": order_id,
+            "status": "CREATED",
+            "links": [
+                {"href": f"{self.base_url}/v2/checkout/orders/{order_id}", "rel": "self", "method": "GET"},
+                {"href": f"https://www.sandbox.paypal.com/checkoutnow?token={order_id}", "rel": "approve", "method": "GET"},
+                {"href": f"{self.base_url}/v2/checkout/orders/{order_id}", "rel": "update", "method": "PATCH"},
+                {"href": f"{self.base_url}/v2/checkout/orders/{order_id}/capture", "rel": "capture", "method": "POST"},
+            ],
+        }
+
+    def product(self, payload):
+        product_id = new_id("PROD-", 17)
+        return {
+            "id": product_id,
+            "name": payload.get("name"),
+            "description": payload.get("description"),
+            "type": payload.get("type"),
+            "category": payload.get("category"),
+            "create_time": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "links": [{"href": f"{self.base_url}/v1/catalogs/products/{product_id}", "rel": "self", "method": "GET"}],
+        }
+
+    def plan(self, payload):
+        plan_id = new_id("P-", 24)
+        return {
+            "id": plan_id,
+            "product_id": payload.get("product_id"),
+            "name": payload.get("name"),
+            "status": payload.get("status", "ACTIVE"),
+            "description": payload.get("description"),
+            "usage_type": "LICENSED",
+            "create_time": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "links": [{"href": f"{self.base_url}/v1/billing/plans/{plan_id}", "rel": "self", "method": "GET"}],
+        }
+
+    def subscription(self, payload):
+        subscription_id = new_id("I-", 12)
+        return {
+            "status": "APPROVAL_PENDING",
+            "id": subscription_id,
+            "plan_id": payload.get("plan_id"),
+            "custom_id": payload.get("custom_id"),
+            "create_time": time.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "links": [
+                {"href": f"https://www.sandbox.paypal.com/webapps/billing/subscriptions?ba_token=BA-{new_id('', 17)}",
+                 "rel": "approve", "method": "GET"},
+                {"href": f"{self.base_url}/v1/billing/subscriptions/{subscription_id}", "rel": "edit", "method": "PATCH"},
+                {"href": f"{self.base_url}/v1/billing/subscriptions/{subscription_id}", "rel": "self", "method": "GET"},
+            ],
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local fake PayPal API server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added latency per request in milliseconds.")
+    parser.add_argument("--latency", default=None, help='Latency distribution, e.g. "uniform:20:80" or "lognormal:40:0.5".')
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429.")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="Fraction of requests that never get an answer.")
+    parser.add_argument("--hang-seconds", type=float, default=15.0, help="How long timed-out requests are held.")
+    parser.add_argument("--retry-after", type=float, default=None, help="Retry-After seconds sent with 429s.")
+    parser.add_argument("--fault", action="append", default=[], metavar="PATH:RATES",
+                        help='Per-endpoint faults, e.g. "/v1/billing/plans:error_rate=0.2,throttle_rate=0.1".')
+    parser.add_argument("--seed", type=int, default=None, help="Seed for repeatable latency and faults.")
+    args = parser.parse_args(argv)
+
+    faults = Faults(args.error_rate, args.throttle_rate, args.timeout_rate, args.hang_seconds, args.retry_after)
+    endpoint_faults = {}
+    for spec in args.fault:
+        path, _, rates = spec.partition(":")
+        endpoint_faults[path] = Faults.parse(rates)
+    server = FakePayPalServer(
+        args.host, args.port, latency=args.latency or args.latency_ms / 1000.0,
+        faults=faults, endpoint_faults=endpoint_faults, seed=args.seed,
+    )
+    for variable, value in server.env().items():
+        print(f"export {variable}={value}")
+    print(f"Fake PayPal API listening on {server.base_url} (Ctrl+C to stop)", flush=True)
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
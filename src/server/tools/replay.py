@@ -0,0 +1,334 @@
+"""
+Replay a traffic capture against lambda_handler and the local stand-ins.
+
+Captures are the gzip JSONL files index.py writes when TRAFFIC_CAPTURE_PATH is set.
+Requests are replayed in their original order and spacing: at recorded speed
+("1x"), N times faster ("10x"), or back to back ("max"). They run on worker threads
+against the in-memory Cognito and SES fakes and the fake PayPal server, so
+production traffic shapes can be measured offline. All requests for one (pseudonymized)
+email go to the same worker, so one user's sign-up, confirmation and login are never
+reordered.
+
+Secrets in a capture are redacted, so the replay fills them back in:
+- Every captured email gets a confirmed fake user with a known password, unless
+  its first request is /signup.
+- Access and refresh tokens in bodies come from logging in one of the confirmed
+  fake users (captures do not say whose token it was).
+- Redacted Authorization headers become a bearer ID token of the user the request
+  is about, or of one of the confirmed fake users (of an admin on /admin/ routes).
+- Confirmation codes are requested from the fake just before the request runs.
+
+Usage:
+    python -m tools.replay capture.jsonl.gz --speed 1x
+    python -m tools.replay capture-*.jsonl.gz --speed max --workers 16 --output replay.json
+"""
+import argparse
+import contextlib
+import glob
+import gzip
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+
+import index
+from tools.benchmark import percentile
+from tools.events import FakeLambdaContext, api_gateway_event
+from tools.fake_aws import FakeCognito, FakeSES, installed
+from tools.fake_paypal import FakePayPalServer
+
+REPLAY_ENVIRONMENT = "replay"
+REPLAY_PASSWORD = "Repl4y!Passw0rd"
+
+
+def read_capture(*paths):
+    """Return the records of one or more capture files (globs allowed), ordered by arrival time."""
+    records = []
+    for pattern in paths:
+        for path in sorted(glob.glob(pattern)) or [pattern]:
+            with gzip.open(path, "rt", encoding="utf-8") as capture:
+                records.extend(json.loads(line) for line in capture if line.strip())
+    return sorted(records, key=lambda record: record["t"])
+
+
+def parse_speed(speed):
+    """Turn "1x", "2.5x" or "max" into a speed factor (None for max)."""
+    if str(speed).lower() == "max":
+        return None
+    factor = float(str(speed).lower().rstrip("x"))
+    if factor <= 0:
+        raise ValueError("Speed must be positive.")
+    return factor
+
+
+def record_email(record):
+    """Return the (pseudonymized) email a captured request is about, or None."""
+    body = record.get("body")
+    email = body.get("email") if isinstance(body, dict) else None
+    return email or (record.get("query") or {}).get("email")
+
+
+class ReplayStandIns:
+    """
+    Fake Cognito, SES and PayPal, wired into index.py for the duration of a replay.
+
+    Redacted fields in captured requests are filled in from the fakes; see the module docstring.
+    """
+
+    def __init__(self, cognito=None, ses=None, paypal=None):
+        self.cognito = cognito or FakeCognito()
+        self.ses = ses or FakeSES()
+        self.paypal = paypal or FakePayPalServer()
+        self.tokens = {}
+        self.turn = itertools.count()
+        self._lock = threading.RLock()
+
+    @contextlib.contextmanager
+    def active(self):
+        namespace = f"/rcw-client-backend-{REPLAY_ENVIRONMENT}/"
+        values = {
+            "COGNITO_USER_POOL_ID": self.cognito.user_pool_id,
+            "COGNITO_CLIENT_ID": self.cognito.client_id,
+            "PAYPAL_CLIENT_ID": "replay-paypal-client-id",
+            "PAYPAL_SECRET": "replay-paypal-secret",
+            "SESIdentitySenderParameter": "noreply@example.com",
+            "SESRecipientParameter": "office@example.com",
+        }
+        saved_environment = dict(os.environ)
+        previous_sink = index.set_metrics_sink(lambda record: json.dumps(record))
+        self.paypal.start()
+        try:
+            os.environ.update(self.paypal.env(), ENVIRONMENT=REPLAY_ENVIRONMENT)
+            index.clear_caches()
+            for name, value in values.items():
+                index.ssm_parameter_cache.put(namespace + name, value, ttl=365 * 24 * 3600)
+            with installed(index, cognito=self.cognito, ses=self.ses):
+                yield self
+        finally:
+            self.paypal.stop()
+            index.set_metrics_sink(previous_sink)
+            index.clear_caches()
+            os.environ.clear()
+            os.environ.update(saved_environment)
+
+    def provision(self, records):
+        """Create a confirmed user for every captured email whose first request is not a sign-up."""
+        seen = set()
+        for record in records:
+            email = record_email(record)
+            if not email or email in seen:
+                continue
+            seen.add(email)
+            if record["path"] != "/signup":
+                self.cognito.add_user(email, REPLAY_PASSWORD)
+
+    def any_confirmed_user(self):
+        """Return a confirmed fake user's email, rotating between them, or None."""
+        with self.cognito._lock:
+            confirmed = sorted(email for email, user in self.cognito.users.items() if user.status == "CONFIRMED")
+        return confirmed[next(self.turn) % len(confirmed)] if confirmed else None
+
+    def authentication_result(self, email):
+        """Log a fake user in once and return their AuthenticationResult."""
+        with self._lock:
+            if email not in self.tokens:
+                result = self.cognito.initiate_auth(
+                    ClientId=self.cognito.client_id, AuthFlow="USER_PASSWORD_AUTH",
+                    AuthParameters={"USERNAME": email, "PASSWORD": REPLAY_PASSWORD},
+                )
+                self.tokens[email] = result["AuthenticationResult"]
+            return self.tokens[email]
+
+    def access_token(self, email):
+        return self.authentication_result(email)["AccessToken"]
+
+    def materialize(self, record):
+        """Build the API Gateway event for a captured request, filling in redacted values."""
+        body = record.get("body")
+        if isinstance(body, dict):
+            body = dict(body)
+            email = body.get("email")
+            if email is None and index.REDACTED in (body.get("access_token"), body.get("refresh_token")):
+                email = self.any_confirmed_user()
+            for field in ("password", "new_password"):
+                if body.get(field) == index.REDACTED:
+                    body[field] = REPLAY_PASSWORD
+            if body.get("access_token") == index.REDACTED and email:
+                body["access_token"] = self.access_token(email)
+            if body.get("refresh_token") == index.REDACTED and email:
+                body["refresh_token"] = self.authentication_result(email)["RefreshToken"]
+            if body.get("confirmation_code") == index.REDACTED and email:
+                body["confirmation_code"] = self.confirmation_code(record["path"], email, body.get("access_token"))
+        elif body == index.REDACTED:
+            body = None
+
+        headers = {name: value for name, value in (record.get("headers") or {}).items() if value != index.REDACTED}
+        if any(name.lower() == "authorization" and value == index.REDACTED
+               for name, value in (record.get("headers") or {}).items()):
+            email = record_email(record) or self.any_confirmed_user()
+            if record["path"].startswith("/admin/"):
+                admin_token = self.cognito.token("admin@example.invalid", **{"cognito:groups": [index.ADMIN_GROUP]})
+                headers["Authorization"] = f"Bearer {admin_token}"
+            elif email:
+                headers["Authorization"] = f"Bearer {self.authentication_result(email)['IdToken']}"
+        return api_gateway_event(record["method"], record["path"], body=body, query=record.get("query"), headers=headers)
+
+    def confirmation_code(self, path, email, access_token):
+        try:
+            if path == "/confirm-email":
+                self.cognito.get_user_attribute_verification_code(AccessToken=access_token, AttributeName="email")
+                return self.cognito.last_code(email, "verify_email")
+            if path == "/confirm-forgot-password":
+                self.cognito.forgot_password(ClientId=self.cognito.client_id, Username=email)
+                return self.cognito.last_code(email, "forgot_password")
+        except Exception:
+            pass
+        return "000000"
+
+
+def replay(records, speed="1x", workers=8, stand_ins=None):
+    """
+    Replay records and return per-route latency statistics.
+
+    :param records: Capture records, as returned by read_capture.
+    :param speed: "1x", "Nx" or "max".
+    :param workers: Maximum concurrent invocations.
+    :param stand_ins: ReplayStandIns to use (default fakes without added latency).
+    """
+    factor = parse_speed(speed)
+    stand_ins = stand_ins or ReplayStandIns()
+    results = []
+    results_lock = threading.Lock()
+    lanes = [queue.Queue() for _ in range(max(1, workers))]
+
+    def run_lane(lane):
+        while True:
+            item = lane.get()
+            if item is None:
+                return
+            record, due = item
+            started_at = time.perf_counter()
+            try:
+                event = stand_ins.materialize(record)
+                started_at = time.perf_counter()
+                status, error = index.lambda_handler(event, FakeLambdaContext())["statusCode"], None
+            except Exception as e:
+                # Count the record as failed (status 0: no response) and keep draining the lane.
+                status, error = 0, f"{type(e).__name__}: {e}"
+            duration_ms = (time.perf_counter() - started_at) * 1000
+            lag_ms = max(0.0, (started_at - due) * 1000) if due is not None else 0.0
+            with results_lock:
+                results.append((f"{record['method']} {record['path']}", status, duration_ms, lag_ms, record, error))
+
+    with stand_ins.active():
+        stand_ins.provision(records)
+        threads = [threading.Thread(target=run_lane, args=(lane,), daemon=True) for lane in lanes]
+        for thread in threads:
+            thread.start()
+        first_arrival = records[0]["t"] if records else 0.0
+        started_at = time.perf_counter()
+        for number, record in enumerate(records):
+            due = None
+            if factor is not None:
+                due = started_at + (record["t"] - first_arrival) / factor
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            key = record_email(record)
+            lane = zlib.crc32(key.encode()) if key else number
+            lanes[lane % len(lanes)].put((record, due))
+        for lane in lanes:
+            lane.put(None)
+        for thread in threads:
+            thread.join()
+        wall_seconds = time.perf_counter() - started_at
+
+    return summarize(results, wall_seconds, speed)
+
+
+def summarize(results, wall_seconds, speed):
+    durations, recorded, lags = defaultdict(list), defaultdict(list), defaultdict(list)
+    statuses, mismatches, errors = defaultdict(Counter), Counter(), defaultdict(Counter)
+    for route, status, duration_ms, lag_ms, record, error in results:
+        if error:
+            errors[route][error] += 1
+        durations[route].append(duration_ms)
+        lags[route].append(lag_ms)
+        statuses[route][status] += 1
+        if record.get("duration_ms") is not None:
+            recorded[route].append(record["duration_ms"])
+        if record.get("status") is not None and record["status"] != status:
+            mismatches[route] += 1
+
+    routes = {}
+    for route, values in sorted(durations.items(), key=lambda item: -len(item[1])):
+        values.sort()
+        captured = sorted(recorded[route])
+        routes[route] = {
+            "requests": len(values),
+            "status_codes": {str(status): count for status, count in sorted(statuses[route].items())},
+            "status_mismatches": mismatches[route],
+            "errors": dict(errors[route].most_common()),
+            "p50_ms": round(percentile(values, 0.50), 3),
+            "p95_ms": round(percentile(values, 0.95), 3),
+            "p99_ms": round(percentile(values, 0.99), 3),
+            "recorded_p50_ms": round(percentile(captured, 0.50), 3) if captured else None,
+            "recorded_p95_ms": round(percentile(captured, 0.95), 3) if captured else None,
+            "mean_lag_ms": round(sum(lags[route]) / len(lags[route]), 3),
+        }
+    return {
+        "speed": str(speed),
+        "requests": len(results),
+        "wall_seconds": round(wall_seconds, 3),
+        "throughput_rps": round(len(results) / wall_seconds, 1) if wall_seconds else None,
+        "routes": routes,
+    }
+
+
+def format_report(summary):
+    lines = [
+        f"{summary['requests']} requests at {summary['speed']} in {summary['wall_seconds']:.2f}s "
+        f"({summary['throughput_rps']} req/s)",
+        f"{'route':<34}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'rec p50':>9}{'lag ms':>8}  status codes",
+    ]
+    for route, stats in summary["routes"].items():
+        recorded = f"{stats['recorded_p50_ms']:.2f}" if stats["recorded_p50_ms"] is not None else "-"
+        lines.append(
+            f"{route:<34}{stats['requests']:>7}{stats['p50_ms']:>9.2f}{stats['p95_ms']:>9.2f}{stats['p99_ms']:>9.2f}"
+            f"{recorded:>9}{stats['mean_lag_ms']:>8.1f}  {stats['status_codes']}"
+        )
+        for error, count in stats["errors"].items():
+            lines.append(f"    {count} x {error}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay captured traffic against lambda_handler.")
+    parser.add_argument("captures", nargs="+", help="Capture files (gzip JSONL); globs are expanded.")
+    parser.add_argument("--speed", default="1x", help='"1x", "Nx" (e.g. "10x") or "max".')
+    parser.add_argument("--workers", type=int, default=8, help="Maximum concurrent invocations.")
+    parser.add_argument("--cognito-latency", default="0", help='Latency spec for the Cognito fake, e.g. "lognormal:20:0.5".')
+    parser.add_argument("--paypal-latency", default="0", help="Latency spec for the fake PayPal server.")
+    parser.add_argument("--output", default=None, help="Write the summary as JSON.")
+    args = parser.parse_args(argv)
+
+    records = read_capture(*args.captures)
+    stand_ins = ReplayStandIns(
+        cognito=FakeCognito(latency=args.cognito_latency),
+        paypal=FakePayPalServer(latency=args.paypal_latency),
+    )
+    summary = replay(records, args.speed, args.workers, stand_ins)
+    print(format_report(summary))
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(summary, output_file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
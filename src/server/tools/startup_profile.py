@@ -0,0 +1,171 @@
+"""
+Cold-start profile of index.py, measured in fresh interpreters.
+
+Each run starts a new Python process with STARTUP_PROFILE=true, imports index,
+optionally builds the AWS clients (as a first request that reaches AWS would),
+and sends one OPTIONS request. The startup report index.py would log in Lambda is
+collected from each run, and the median of every step is reported.
+
+Usage:
+    python -m tools.startup_profile --runs 10 --clients
+    python -m tools.startup_profile --runs 10 --clients --output after.json --compare before.json
+    python -m tools.startup_profile --importtime 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SERVER_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+REPORT_MARKER = "STARTUP_PROFILE_REPORT "
+
+CHILD_SCRIPT = f"""
+import json, time
+started_at = time.perf_counter()
+import index
+import_ms = (time.perf_counter() - started_at) * 1000
+if {{clients}}:
+    index.get_cognito_client()
+    index.get_ses_client()
+    index.get_ssm_client()
+index.lambda_handler({{{{"httpMethod": "OPTIONS", "path": "/login"}}}}, None)
+report = dict(index.startup_profile.report, import_ms=round(import_ms, 3))
+print({REPORT_MARKER!r} + json.dumps(report))
+"""
+
+
+def child_environment(extra=None):
+    env = dict(os.environ, STARTUP_PROFILE="true")
+    env.setdefault("AWS_DEFAULT_REGION", "us-west-1")
+    env.update(extra or {})
+    return env
+
+
+def profile_once(clients=False):
+    """Run one cold start in a fresh interpreter and return its startup report."""
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT.format(clients=bool(clients))],
+        cwd=SERVER_DIR, env=child_environment(), capture_output=True, text=True, check=True,
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith(REPORT_MARKER):
+            return json.loads(line[len(REPORT_MARKER):])
+    raise RuntimeError(f"No startup report in output:\n{result.stdout}\n{result.stderr}")
+
+
+def summarize(reports):
+    """Combine several startup reports into medians per metric and per step."""
+    def median(values):
+        values = [value for value in values if value is not None]
+        if not values:
+            return None
+        middle = statistics.median(values)
+        return int(middle) if all(isinstance(value, int) for value in values) else round(middle, 3)
+
+    step_names = []
+    for report in reports:
+        for step in report["steps"]:
+            if step["name"] not in step_names:
+                step_names.append(step["name"])
+
+    steps = []
+    for name in step_names:
+        samples = [step for report in reports for step in report["steps"] if step["name"] == name]
+        steps.append({
+            "name": name,
+            "phase": samples[0]["phase"],
+            "duration_ms": median(sample["duration_ms"] for sample in samples),
+            "rss_delta_kb": median(sample["rss_delta_kb"] for sample in samples),
+        })
+
+    return {
+        "runs": len(reports),
+        "import_ms": median(report["import_ms"] for report in reports),
+        "init_ms": median(report["init_ms"] for report in reports),
+        "first_invocation_ms": median(report["first_invocation_ms"] for report in reports),
+        "rss_kb": median(report["rss_kb"] for report in reports),
+        "steps": steps,
+    }
+
+
+def import_times(top):
+    """Return the slowest packages index.py imports directly, according to python -X importtime."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import index"],
+        cwd=SERVER_DIR, env=child_environment({"STARTUP_PROFILE": "false"}),
+        capture_output=True, text=True, check=True,
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Each nesting level adds two spaces; index itself is at depth 0, its own imports at depth 1.
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if cumulative.strip().isdigit() and depth == 1:
+            modules.append({"module": name.strip(), "cumulative_ms": int(cumulative) / 1000})
+    return sorted(modules, key=lambda module: module["cumulative_ms"], reverse=True)[:top]
+
+
+def format_report(summary, baseline=None):
+    def delta(key, current, previous):
+        if previous is None or current is None or previous.get(key) is None:
+            return ""
+        return f"{current - previous[key]:+.2f}"
+
+    baseline_steps = {step["name"]: step for step in (baseline or {}).get("steps", [])}
+    lines = [
+        f"{summary['runs']} cold starts (medians): import {summary['import_ms']:.2f} ms, "
+        f"init {summary['init_ms']:.2f} ms, first invocation {summary['first_invocation_ms']:.2f} ms, "
+        f"rss {summary['rss_kb']} KiB",
+        "",
+        f"{'step':<28}{'phase':<12}{'ms':>9}{'rss KiB':>9}{'Δ ms':>9}",
+    ]
+    for step in summary["steps"]:
+        lines.append(
+            f"{step['name']:<28}{step['phase']:<12}{step['duration_ms']:>9.2f}"
+            f"{step['rss_delta_kb'] if step['rss_delta_kb'] is not None else '-':>9}"
+            f"{delta('duration_ms', step['duration_ms'], baseline_steps.get(step['name'])):>9}"
+        )
+    if baseline:
+        lines.append(f"{'init vs baseline':<40}{delta('init_ms', summary['init_ms'], baseline):>18}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the cold start of index.py.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to sample.")
+    parser.add_argument("--clients", action="store_true", help="Also build the Cognito, SES and SSM clients.")
+    parser.add_argument("--output", default=None, help="Write the summary as JSON.")
+    parser.add_argument("--compare", default=None, help="A previous JSON summary to compare against.")
+    parser.add_argument("--importtime", type=int, default=0, metavar="N",
+                        help="Also list the N slowest imports from python -X importtime.")
+    args = parser.parse_args(argv)
+
+    summary = summarize([profile_once(args.clients) for _ in range(args.runs)])
+    summary["generated_at"] = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    summary["clients"] = args.clients
+    if args.importtime:
+        summary["slowest_imports"] = import_times(args.importtime)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    print(format_report(summary, baseline))
+    for module in summary.get("slowest_imports", []):
+        print(f"  {module['module']:<40}{module['cumulative_ms']:>9.2f} ms")
+
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(summary, output_file, indent=2)
+        print(f"\nResults written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())